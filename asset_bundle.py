@@ -0,0 +1,136 @@
+"""Pack the images and sounds of PyTetris into one indexed file, and load them from it.
+
+The bundle starts with MAGIC and the byte length of a JSON index, which maps the
+relative path of each asset, such as 'images/plate.png', to its (offset, size) in
+the data following the index.
+
+Build the bundle on the root directory of the repository:
+    python asset_bundle.py
+"""
+import io
+import json
+import mmap
+import struct
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent
+BUNDLE_PATH = ROOT / 'assets.bin'
+DIRECTORIES = ('images', 'sounds')
+MAGIC = b'PTAB'
+HEADER = struct.Struct('<4sI')
+
+
+def pack(root, names, output):
+    """Write the files into a bundle.
+       Args:
+            root: Path, the directory which the names are relative to
+            names: iterable of the relative paths of the files
+            output: Path of the bundle
+    """
+    names = [Path(name).as_posix() for name in names]
+    contents = [(root / name).read_bytes() for name in names]
+    index = {}
+    offset = 0
+    for name, content in zip(names, contents):
+        index[name] = [offset, len(content)]
+        offset += len(content)
+    header = json.dumps(index).encode()
+
+    with open(output, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for content in contents:
+            f.write(content)
+
+
+class BundleFile(io.RawIOBase):
+    """Read-only file object on a part of the memory-mapped bundle.
+       Only the bytes requested by the reader are copied.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.view[self.position:self.position + len(buffer)]
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        self.position = max(offset, 0)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class AssetBundle:
+    """Bundle opened only once and memory-mapped. The assets are got as
+       buffers on the mapped memory without being copied.
+        Args:
+            path: str or Path of the bundle
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            self.mmap.close()
+            raise ValueError(f'{path} is not an asset bundle.')
+        self.view = memoryview(self.mmap)
+        self.index = json.loads(bytes(self.view[HEADER.size:HEADER.size + size]))
+        self.start = HEADER.size + size
+
+    def __contains__(self, path):
+        return Path(path).as_posix() in self.index
+
+    def buffer(self, path):
+        """Return the memoryview of the asset.
+        """
+        offset, size = self.index[Path(path).as_posix()]
+        offset += self.start
+        return self.view[offset:offset + size]
+
+    def open(self, path):
+        """Return a file object of the asset, which can be passed to
+           pygame.image.load and pygame.mixer.Sound.
+        """
+        return BundleFile(self.buffer(path))
+
+    def close(self):
+        self.view.release()
+        self.mmap.close()
+
+
+def open_bundle(path=BUNDLE_PATH):
+    """Return the AssetBundle, or None if it is not built.
+    """
+    if not Path(path).is_file():
+        return None
+    return AssetBundle(path)
+
+
+def main(root=ROOT, output=BUNDLE_PATH):
+    names = sorted(
+        path.relative_to(root) for directory in DIRECTORIES
+        for path in (root / directory).iterdir() if path.is_file())
+    pack(root, names, output)
+    print(f'{len(names)} files are packed into {output}.')
+
+
+if __name__ == '__main__':
+    main()
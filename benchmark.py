@@ -0,0 +1,85 @@
+"""Compare the speed of the extension module pytetris_utils with its pure Python implementation.
+
+Build the extension module first to measure both of them:
+    python cython_code/setup.py build_ext --inplace
+    python benchmark.py
+"""
+import random
+import timeit
+
+import pytetris_utils_py
+from tetris_engine import COLLISION_TABLE, FULL, ROWS, Board, kernel
+
+
+def create_boards(n, seed=0):
+    """Make boards which have random stacks of blocks in the lower half.
+    """
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(n):
+        top = rng.randint(ROWS // 2, ROWS - 2)
+        rows = [0] * top + [rng.randint(0, FULL - 1) for _ in range(ROWS - top)]
+        for i in rng.sample(range(top, ROWS), 2):
+            rows[i] = FULL
+        boards.append(Board(rows))
+    return boards
+
+
+def create_functions(utils, boards):
+    rotations = [rotation for table in COLLISION_TABLE for rotation in table]
+
+    def collides():
+        for board in boards:
+            for rotation in rotations:
+                for masks in rotation.masks.values():
+                    utils.collides(board.rows, masks, 0)
+
+    def drop_distance():
+        for board in boards:
+            for rotation in rotations:
+                for col, masks in rotation.masks.items():
+                    utils.drop_distance(
+                        board.rows, board.heights, rotation.profile, masks, rotation.bottom, 0, col)
+
+    def find_full_rows():
+        for board in boards:
+            utils.find_full_rows(board.rows, range(ROWS - 4, ROWS), FULL)
+
+    def collapse():
+        for board in boards:
+            rows = board.rows[:]
+            utils.collapse(rows, utils.find_full_rows(rows, range(ROWS), FULL))
+
+    return {
+        'collides': collides,
+        'drop_distance': drop_distance,
+        'find_full_rows': find_full_rows,
+        'collapse': collapse
+    }
+
+
+def main(number=20):
+    boards = create_boards(100)
+    implementations = {'python': pytetris_utils_py}
+    if kernel is not pytetris_utils_py:
+        implementations['native'] = kernel
+    else:
+        print('pytetris_utils is not built or is outdated; only the pure Python implementation is measured.')
+
+    results = {}
+    for name, utils in implementations.items():
+        for function_name, function in create_functions(utils, boards).items():
+            results[name, function_name] = min(timeit.repeat(function, number=number, repeat=3))
+
+    header = f'{"function":<16}' + ''.join(f'{name:>12}' for name in implementations)
+    print(header + (f'{"speedup":>12}' if len(implementations) == 2 else ''))
+    for function_name in create_functions(pytetris_utils_py, boards):
+        times = [results[name, function_name] for name in implementations]
+        line = f'{function_name:<16}' + ''.join(f'{t * 1000:>10.1f}ms' for t in times)
+        if len(times) == 2:
+            line += f'{times[0] / times[1]:>11.1f}x'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
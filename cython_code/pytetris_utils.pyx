@@ -2,20 +2,89 @@
 # cython: wraparound=False
 # cython: language_level=3
 
+ctypedef fused coordinate:
+    int
+    long
+
+
+cpdef void update_blockset_row(coordinate[:, :, ::1] blockset, int step):
 
-cpdef void update_blockset_row(int[:, :, ::1] blockset, int step):
-    
     cdef int i, j
-    
+
     for i in range(4):
         for j in range(4):
             blockset[i, j, 0] += step
 
 
-cpdef void update_blockset_col(int[:, :, ::1] blockset, int step):
+cpdef void update_blockset_col(coordinate[:, :, ::1] blockset, int step):
 
     cdef int i, j
-    
+
     for i in range(4):
         for j in range(4):
-            blockset[i, j, 1] += step
\ No newline at end of file
+            blockset[i, j, 1] += step
+
+
+cpdef bint collides(list rows, tuple masks, int row):
+    """Return True if any of the (row, mask) pairs overlaps the rows moved by row.
+       Rows above the block area are empty.
+    """
+    cdef int r
+    cdef long mask
+
+    for r, mask in masks:
+        r += row
+        if r >= 0 and <long>rows[r] & mask:
+            return True
+    return False
+
+
+cpdef list find_full_rows(list rows, object changed, long full):
+    """Return the full rows in ascending order, looking at only the changed rows.
+    """
+    cdef int r
+    cdef set found = set()
+
+    for r in changed:
+        if <long>rows[r] == full:
+            found.add(r)
+    return sorted(found)
+
+
+cpdef void collapse(list rows, list deleted):
+    """Move the rows above the deleted rows down in place, keeping their order.
+    """
+    cdef int src, dest, i
+    cdef set skip
+
+    if not deleted:
+        return
+    skip = set(deleted)
+    dest = deleted[len(deleted) - 1]
+    for src in range(dest, -1, -1):
+        if src not in skip:
+            rows[dest] = rows[src]
+            dest -= 1
+    for i in range(dest + 1):
+        rows[i] = 0
+
+
+cpdef int drop_distance(list rows, list heights, tuple profile, tuple masks,
+                        int bottom, int row, int col):
+    """Return the number of rows the blocks can fall.
+    """
+    cdef int n = len(rows)
+    cdef int distance = n
+    cdef int r, c, d
+
+    for c, r in profile:
+        d = n - <int>heights[c + col] - 1 - (r + row)
+        if d < distance:
+            distance = d
+    # The blocks have been slid under other blocks.
+    if distance < 0:
+        distance = 0
+        while row + distance + 1 + bottom < n and \
+                not collides(rows, masks, row + distance + 1):
+            distance += 1
+    return distance
@@ -1,5 +1,14 @@
-from distutils.core import setup
+"""Build the extension module pytetris_utils.
+
+Run on the root directory of the repository to put the built module next to
+tetris_engine.py:
+    python cython_code/setup.py build_ext --inplace
+"""
+import os
+
+from setuptools import Extension, setup
 from Cython.Build import cythonize
 
 
-setup(ext_modules=cythonize('pytetris_utils.pyx'))
+source = os.path.join(os.path.dirname(os.path.relpath(__file__)), 'pytetris_utils.pyx')
+setup(ext_modules=cythonize([Extension('pytetris_utils', [source])]))
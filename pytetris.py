@@ -1,20 +1,24 @@
-import copy
-import glob
+import io
 import itertools
+import math
 import pygame
-import random
 import re
 import sys
-from collections import namedtuple
-from enum import Enum, auto
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
 from pathlib import Path
-from pygame.locals import QUIT, K_DOWN, K_RIGHT, K_LEFT, K_UP, KEYDOWN, MOUSEBUTTONDOWN, Rect
+from pygame.locals import (
+    QUIT, K_DOWN, K_RIGHT, K_LEFT, K_UP, K_SPACE, K_F3, KEYDOWN, KEYUP, MOUSEBUTTONDOWN, RESIZABLE, VIDEORESIZE,
+    WINDOWFOCUSLOST, Rect)
 
-import numpy as np
-
-from pytetris_utils import update_blockset_row, update_blockset_col
+from asset_bundle import ROOT, open_bundle
+from tetris_ai import AIPlayer
+from tetris_engine import COLS, ROWS, SHAPES, TICK_RATE, Action, Event, Scheduler, Status, TetrisEngine
 
 
+# The positions and sizes are given on this screen, and multiplied by the scale of LAYOUT.
 SCREEN = Rect(0, 0, 700, 600)
 # block area
 BLOCK_AREA_LEFT = 150
@@ -47,15 +51,37 @@ REPEAT_TEXT_Y = 330
 GAMEOVER_TOP = 220
 GAMEOVER_BOUND_TOP = 170
 GAMEOVER_LEFT = 130
-# the number of columns and rows in block area
-COLS = 10
-ROWS = 20
+# frames from the game over until the repeat button is shown
+REPEAT_DELAY = 100
 # block size
 BLOCK_SIZE = 20
+# ticks per second of the game logic, independent of the frame rate
+LOGIC_RATE = TICK_RATE
+FPS = 60
+# alpha value of the blocks which show the landing position
+GHOST_ALPHA = 80
+# push only the changed areas of the screen to the display
+DIRTY_RECTS = True
+# print the time of each phase until the first frame
+STARTUP_REPORT = False
+# steps of the scale, so that the images are not scaled for each pixel of resizing
+SCALE_STEP = 0.05
+# draw the falling blocks between the rows by the time passed since the last tick
+INTERPOLATE = True
+# show the input latency at the top left, which F3 toggles
+LATENCY_OVERLAY = False
+# print the input latency at exit
+LATENCY_REPORT = False
+# let AIPlayer play the game, taking an action every AI_DELAY ticks
+AI_PLAYER = False
+AI_DELAY = 6
+# the keys whose moves are repeated by the engine while they are held
+HELD_KEYS = {K_LEFT: Action.LEFT, K_RIGHT: Action.RIGHT, K_DOWN: Action.DOWN}
 # text color
 COLOR_WHITE = (255, 255, 250)
 COLOR_PINK = (235, 107, 212)
 COLOR_GREEN = (0, 100, 0)
+COLOR_ORANGE = (250, 102, 14)
 # button position
 RESTART_LEFT = 310
 RESTART_TOP = 330
@@ -69,6 +95,18 @@ REPEAT_X = 343
 REPEAT_Y = 400
 
 
+# areas drawn directly on the screen, not by the sprites, which can change in each status
+DIRTY_AREAS = {
+    Status.PLAY: (
+        Rect(DISPLAY_X, DISPLAY_Y, 100, 100),
+        Rect(SCORE_AREA_X, SCORE_AREA_Y, 200, 180)),
+    Status.PAUSE: (),
+    Status.START: (Rect(START_TEXT_X - 10, START_TEXT_Y, 120, 50),),
+    Status.GAMEOVER: (),
+    Status.REPEAT: (Rect(REPEAT_TEXT_X - 10, REPEAT_TEXT_Y, 140, 50),)
+}
+
+
 BlockSet = namedtuple('BlockSet', 'file next coordinates')
 
 
@@ -120,78 +158,477 @@ class SoundFiles(Files):
         super().__init__(name, 'sounds')
 
 
-BLUE = BlockSet(ImageFiles.BLOCK_BLUE, [[0.5, 2], [1.5, 2], [2.5, 2], [3.5, 2]],
-                np.array([[[-1, 4], [0, 4], [1, 4], [2, 4]], [[-1, 4], [-1, 5], [-1, 6], [-1, 7]], [[-1, 4], [0, 4], [1, 4], [2, 4]], [[-1, 4], [-1, 5], [-1, 6], [-1, 7]]]))
-DARK = BlockSet(ImageFiles.BLOCK_DARK, [[1.5, 1], [2.5, 1], [2.5, 2], [2.5, 3]],
-                np.array([[[-1, 3], [0, 3], [0, 4], [0, 5]], [[-1, 4], [0, 4], [1, 4], [1, 3]], [[-1, 3], [-1, 4], [-1, 5], [0, 5]], [[-1, 4], [-1, 5], [0, 4], [1, 4]]]))
-GREEN = BlockSet(ImageFiles.BLOCK_GREEN, [[1.5, 2], [1.5, 3], [2.5, 1], [2.5, 2]],
-                 np.array([[[-1, 4], [-1, 5], [0, 3], [0, 4]], [[-1, 3], [0, 3], [0, 4], [1, 4]], [[-1, 4], [-1, 5], [0, 3], [0, 4]], [[-1, 3], [0, 3], [0, 4], [1, 4]]]))
-ORANGE = BlockSet(ImageFiles.BLOCK_ORANGE, [[1.5, 3], [2.5, 1], [2.5, 2], [2.5, 3]],
-                  np.array([[[-1, 5], [0, 3], [0, 4], [0, 5]], [[-1, 3], [-1, 4], [0, 4], [1, 4]], [[-1, 3], [-1, 4], [-1, 5], [0, 3]], [[-1, 4], [0, 4], [1, 4], [1, 5]]]))
-PURPLE = BlockSet(ImageFiles.BLOCK_PURPLE, [[1.5, 2], [2.5, 1], [2.5, 2], [2.5, 3]],
-                  np.array([[[-1, 4], [0, 3], [0, 4], [0, 5]], [[-1, 4], [0, 4], [1, 4], [0, 3]], [[-1, 3], [-1, 4], [-1, 5], [0, 4]], [[-1, 4], [0, 4], [1, 4], [0, 5]]]))
-RED = BlockSet(ImageFiles.BLOCK_RED, [[1.5, 1], [1.5, 2], [2.5, 2], [2.5, 3]],
-               np.array([[[-1, 3], [-1, 4], [0, 4], [0, 5]], [[-1, 4], [0, 3], [0, 4], [1, 3]], [[-1, 3], [-1, 4], [0, 4], [0, 5]], [[-1, 4], [0, 3], [0, 4], [1, 3]]]))
-YELLOW = BlockSet(ImageFiles.BLOCK_YELLOW, [[1.5, 1.5], [1.5, 2.5], [2.5, 1.5], [2.5, 2.5]],
-                  np.array([[[-1, 4], [0, 4], [-1, 5], [0, 5]], [[-1, 4], [0, 4], [-1, 5], [0, 5]], [[-1, 4], [0, 4], [-1, 5], [0, 5]], [[-1, 4], [0, 4], [-1, 5], [0, 5]]]))
+# minimum seconds between the plays of the same sound effect
+SOUND_INTERVALS = {SoundFiles.ROTATE: 0.05}
+
+
+BLUE = BlockSet(ImageFiles.BLOCK_BLUE, [[0.5, 2], [1.5, 2], [2.5, 2], [3.5, 2]], SHAPES[0])
+DARK = BlockSet(ImageFiles.BLOCK_DARK, [[1.5, 1], [2.5, 1], [2.5, 2], [2.5, 3]], SHAPES[1])
+GREEN = BlockSet(ImageFiles.BLOCK_GREEN, [[1.5, 2], [1.5, 3], [2.5, 1], [2.5, 2]], SHAPES[2])
+ORANGE = BlockSet(ImageFiles.BLOCK_ORANGE, [[1.5, 3], [2.5, 1], [2.5, 2], [2.5, 3]], SHAPES[3])
+PURPLE = BlockSet(ImageFiles.BLOCK_PURPLE, [[1.5, 2], [2.5, 1], [2.5, 2], [2.5, 3]], SHAPES[4])
+RED = BlockSet(ImageFiles.BLOCK_RED, [[1.5, 1], [1.5, 2], [2.5, 2], [2.5, 3]], SHAPES[5])
+YELLOW = BlockSet(ImageFiles.BLOCK_YELLOW, [[1.5, 1.5], [1.5, 2.5], [2.5, 1.5], [2.5, 2.5]], SHAPES[6])
 BLOCKSETS = [BLUE, DARK, GREEN, ORANGE, PURPLE, RED, YELLOW]
 
 
-class Status(Enum):
-    START = auto()
-    PLAY = auto()
-    PAUSE = auto()
-    GAMEOVER = auto()
-    REPEAT = auto()
-    WAITING = auto()
-    DROPPING = auto()
+class Layout:
+    """Scale factor from the positions and sizes on SCREEN to the ones on the window.
+        Args:
+            scale: float, 1 for the window of the size of SCREEN
+    """
+
+    def __init__(self, scale=1):
+        self.scale = scale
+
+    def __call__(self, value):
+        """Return the length on the window.
+        """
+        return round(value * self.scale)
+
+    def point(self, x, y):
+        return self(x), self(y)
+
+    def rect(self, rect):
+        return Rect(self(rect.left), self(rect.top), self(rect.width), self(rect.height))
+
+    def fit(self, size):
+        """Set the largest scale with which SCREEN fits into the window.
+           Args:
+                size: (width, height) of the window
+           Returns:
+                True if the scale is changed
+        """
+        scale = min(size[0] / SCREEN.width, size[1] / SCREEN.height)
+        scale = max(round(scale / SCALE_STEP), 1) * SCALE_STEP
+        if changed := scale != self.scale:
+            self.scale = scale
+        return changed
+
+
+LAYOUT = Layout()
+
+
+def open_asset(path, bundle=None):
+    """Return a file object of the asset in the bundle, or the path of the file
+       under the root directory of the repository if the bundle does not have it.
+       Args:
+            path: str or Path relative to the root directory, such as Files.path
+            bundle: AssetBundle or None
+    """
+    if bundle is not None and path in bundle:
+        return bundle.open(path)
+    return str(ROOT / path)
+
+
+class ImageCache:
+    """Images decoded and converted only once, and shared by sprites.
+       The surfaces are keyed by (path, size, alpha, scale), and the ones for
+       each scale are scaled only once from the original images.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.decoding = {}
+        self.bundle = None
+
+    def preload(self, paths, executor):
+        """Decode the image files in the threads of the executor. They are
+           converted on the main thread, when they are got at the first time.
+           Args:
+                paths: iterable of str or Path, the image files
+                executor: concurrent.futures.Executor
+        """
+        for path in paths:
+            self.decoding[Path(path)] = executor.submit(self.decode, path)
+
+    def get(self, path, size=None, alpha=False):
+        """Return the surface of the image for the scale of LAYOUT, loading it at the first time.
+           Args:
+                path: str or Path, the image file
+                size: (width, height) on SCREEN to scale the image to, or None for the original size
+                alpha: True to keep per pixel alpha, or int of the alpha value of the surface
+        """
+        return self.lookup(path, size, alpha, LAYOUT.scale)
+
+    def lookup(self, path, size, alpha, scale):
+        key = (Path(path), size, alpha, scale)
+        if (surface := self.surfaces.get(key)) is None:
+            surface = self.surfaces[key] = self.load(path, size, alpha, scale)
+        return surface
+
+    def load(self, path, size, alpha, scale):
+        if not isinstance(alpha, bool):
+            image = self.lookup(path, size, False, scale).copy()
+            image.set_alpha(alpha)
+            return image
+        if size is not None or scale != 1:
+            image = self.lookup(path, None, alpha, 1)
+            width, height = image.get_size() if size is None else size
+            return pygame.transform.scale(image, (round(width * scale), round(height * scale)))
+        # The decoded image is released once converted, so only the converted one is kept.
+        if (future := self.decoding.pop(Path(path), None)) is not None:
+            image = future.result()
+        else:
+            image = self.decode(path)
+        return image.convert_alpha() if alpha else image.convert()
+
+    def discard(self, scale):
+        """Discard the surfaces scaled for the other scales than the given one.
+        """
+        self.surfaces = {key: surface for key, surface in self.surfaces.items() if key[3] in (1, scale)}
+
+    def decode(self, path):
+        return pygame.image.load(open_asset(path, self.bundle), Path(path).name)
+
+    def clear(self):
+        self.surfaces = {}
+        self.decoding = {}
+
+
+IMAGES = ImageCache()
+
+
+class SoundCache:
+    """Sounds decoded only once, and shared. The files can be read in advance.
+    """
+
+    def __init__(self):
+        self.sounds = {}
+        self.reading = {}
+        self.bundle = None
+
+    def preload(self, paths, executor):
+        """Read the sound files in the threads of the executor.
+           Args:
+                paths: iterable of str or Path, the sound files
+                executor: concurrent.futures.Executor
+        """
+        for path in paths:
+            # The sounds in the bundle are already mapped in memory.
+            if self.bundle is None or path not in self.bundle:
+                self.reading[Path(path)] = executor.submit((ROOT / path).read_bytes)
+
+    def get(self, path):
+        key = Path(path)
+        if (sound := self.sounds.get(key)) is None:
+            if (future := self.reading.pop(key, None)) is not None:
+                sound = pygame.mixer.Sound(file=io.BytesIO(future.result()))
+            else:
+                sound = pygame.mixer.Sound(open_asset(path, self.bundle))
+            self.sounds[key] = sound
+        return sound
+
+    def clear(self):
+        self.sounds = {}
+        self.reading = {}
+
+
+SOUNDS = SoundCache()
+
+
+class SoundService:
+    """Sound effects played on the mixer channels reserved for each of them.
+       play only puts a request into the queue, and the requests are played by
+       flush once in each frame. The requests repeated within the interval of
+       the effect are ignored. Nothing is played until start is called, or if
+       the mixer is not initialized, e.g. in headless mode.
+        Args:
+            intervals: dict of SoundFiles to the minimum seconds between the plays
+            clock: function which returns seconds
+    """
+
+    def __init__(self, intervals=None, clock=time.monotonic):
+        self.intervals = SOUND_INTERVALS if intervals is None else intervals
+        self.clock = clock
+        self.queue = deque()
+        self.last = {}
+        self.channels = {}
+
+    @property
+    def enabled(self):
+        return bool(self.channels)
+
+    def start(self):
+        """Reserve a channel for each sound effect and decode all of them.
+        """
+        if not pygame.mixer.get_init():
+            return
+        pygame.mixer.set_reserved(len(SoundFiles))
+        for i, file in enumerate(SoundFiles):
+            self.channels[file] = (pygame.mixer.Channel(i), SOUNDS.get(file.path))
+
+    def play(self, file):
+        """Request the sound effect to be played.
+           Args:
+                file: SoundFiles
+        """
+        if not self.enabled:
+            return
+        now = self.clock()
+        if (last := self.last.get(file)) is not None and now - last < self.intervals.get(file, 0):
+            return
+        self.last[file] = now
+        self.queue.append(file)
+
+    def flush(self):
+        """Play the requested sound effects, stopping the ones still playing on the same channels.
+        """
+        while self.queue:
+            channel, sound = self.channels[self.queue.popleft()]
+            channel.play(sound)
+
+
+AUDIO = SoundService()
+
+
+class SoundEffect:
+    """Sound effect requested to the sound service when it is played.
+    """
+
+    def __init__(self, file, service=None):
+        self.file = file
+        self.service = AUDIO if service is None else service
+
+    def play(self):
+        self.service.play(self.file)
+
+
+def preload_assets(executor, bundle=None):
+    """Start reading and decoding the assets and loading the system fonts
+       in the threads of the executor.
+       Args:
+            executor: concurrent.futures.Executor
+            bundle: AssetBundle which the assets are read from, or None to read the files
+    """
+    IMAGES.bundle = SOUNDS.bundle = bundle
+    IMAGES.preload((file.path for file in ImageFiles), executor)
+    SOUNDS.preload((file.path for file in SoundFiles), executor)
+    executor.submit(pygame.font.get_fonts)
+
+
+class StartupTimer:
+    """Time taken by each phase of the startup.
+        Args:
+            clock: function which returns seconds
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = self.last = clock()
+        self.phases = []
+
+    def mark(self, phase):
+        """Record the time since the last mark as the phase.
+        """
+        now = self.clock()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [f'{phase:<16}{seconds * 1000:>8.1f}ms' for phase, seconds in self.phases]
+        lines.append(f'{"total":<16}{(self.last - self.start) * 1000:>8.1f}ms')
+        return '\n'.join(lines)
+
+
+class LatencyMonitor:
+    """Time from the inputs until the frames showing them are pushed to the display.
+       The inputs are marked when they are received, applied when the engine runs
+       the tick with them, and measured when the frame is presented.
+        Args:
+            size: int, the number of the latest samples kept for the percentiles
+            clock: function which returns seconds
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, size=600, clock=time.perf_counter):
+        self.clock = clock
+        self.samples = deque(maxlen=size)
+        self.pending = []
+        self.applied = []
+        self.text = None
+        self.image = None
+        self.rect = Rect(0, 0, 0, 0)
+
+    def input(self):
+        self.pending.append(self.clock())
+
+    def apply(self):
+        """Mark the inputs received so far as applied in the tick being run.
+        """
+        if self.pending:
+            self.applied.extend(self.pending)
+            self.pending = []
+
+    def present(self):
+        """Record the latency of the applied inputs, after the frame is pushed to the display.
+        """
+        if self.applied:
+            now = self.clock()
+            self.samples.extend(now - received for received in self.applied)
+            self.applied = []
+
+    def percentiles(self):
+        """Return {percentile: seconds} of the samples by the nearest rank, or {} if none.
+        """
+        if not self.samples:
+            return {}
+        samples = sorted(self.samples)
+        return {p: samples[max(math.ceil(p / 100 * len(samples)) - 1, 0)] for p in self.PERCENTILES}
+
+    def report(self):
+        if not (percentiles := self.percentiles()):
+            return 'input latency: no samples'
+        values = '  '.join(f'p{p} {seconds * 1000:.1f}ms' for p, seconds in percentiles.items())
+        return f'input latency  {values}  ({len(self.samples)} samples)'
+
+    def draw(self, screen):
+        """Draw the report at the top left of the screen.
+           Returns:
+                list of the areas of the last and this overlay
+        """
+        if (text := self.report()) != self.text:
+            self.text = text
+            self.image = TEXTS.font(LAYOUT(18)).render(text, True, COLOR_WHITE)
+        last = self.rect
+        self.rect = screen.blit(self.image, LAYOUT.point(10, 10))
+        return [last, self.rect]
+
+
+class TextCache:
+    """Fonts created only once for each size, and the text rendered with them.
+       The surfaces are keyed by (text, size, color, antialias), and the least
+       recently used one is discarded when more than maxsize are cached.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size):
+        if (font := self.fonts.get(size)) is None:
+            font = self.fonts[size] = pygame.font.SysFont(None, size)
+        return font
+
+    def render(self, text, size, color, antialias=True):
+        """Return the surface of the text, rendering it if it is not cached.
+           Args:
+                text: str to render
+                size: int, the font size on SCREEN
+                color: (r, g, b) of the text
+                antialias: bool, True to render with smooth edges
+        """
+        size = LAYOUT(size)
+        key = (text, size, color, antialias)
+        if (surface := self.surfaces.get(key)) is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = self.surfaces[key] = self.font(size).render(text, antialias, color)
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+
+TEXTS = TextCache()
 
 
 class PyTetris:
 
-    def __init__(self, screen):
+    def __init__(self, screen, engine=None):
         self.screen = screen
-        self.matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]
+        self.engine = TetrisEngine() if engine is None else engine
         self.blocks = [None for _ in range(4)]
+        self.ghosts = [None for _ in range(4)]
+        self.actions = []
+        # the keys held, in the order they were pressed
+        self.held = []
+        self.latency = LatencyMonitor()
+        # AIPlayer which gives the actions instead of the keys, or None
+        self.player = None
+        # the states after the last two ticks, which the sprites are drawn from
+        self.snapshot = self.previous = self.engine.snapshot()
         self.create_screens()
         self.create_sounds()
-        self.block_status = Status.WAITING
-        self.status = Status.START
+        self.handlers = {
+            Event.CREATED: self.create_block,
+            Event.ROTATED: self.play_rotate_sound,
+            Event.GROUNDED: self.update_matrix,
+            Event.DELETED: self.delete_blocks,
+            Event.MOVED: self.move_ground_blocks,
+            Event.GAMEOVER: self.play_gameover_sound
+        }
+
+    @property
+    def status(self):
+        return self.engine.status
+
+    @status.setter
+    def status(self, status):
+        self.engine.status = status
+
+    @property
+    def block_status(self):
+        return self.engine.block_status
 
     def initialize(self):
         self.all_blocks_clear()
-        self.score.initialize()
-        self.level = self.score.level
-        self.timer_value = 40
-        self.drop_timer = self.timer_value
-        self.ground_timer = 60
-        self.judge_timer = self.timer_value
-        self.next_blockset = None
-        self.create_block()
-        self.block_status = Status.DROPPING
-        self.status = Status.PLAY
-        self.update = self.update_moving_block
+        self.actions = []
+        self.engine.initialize()
+        self.handle_events(self.engine.events)
+        self.snapshot = self.previous = self.engine.snapshot()
 
     def all_blocks_clear(self):
-        for row in itertools.chain((r for r in self.matrix), [self.blocks]):
+        for row in (self.blocks, self.ghosts):
             for i, block in enumerate(row):
                 if block:
-                    row[i] = block.kill()
+                    row[i] = self.pool.release(block)
+        self.ground.clear()
 
     def create_sounds(self):
-        self.rotate_sound = pygame.mixer.Sound(SoundFiles.ROTATE.path)
-        self.break_sound = pygame.mixer.Sound(SoundFiles.FANFARE.path)
-        self.gameover_sound = pygame.mixer.Sound(SoundFiles.GAMEOVER.path)
+        self.rotate_sound = SoundEffect(SoundFiles.ROTATE)
+        self.break_sound = SoundEffect(SoundFiles.FANFARE)
+        self.gameover_sound = SoundEffect(SoundFiles.GAMEOVER)
+
+    def preload_images(self):
+        """Load the images of blocks at startup, so that no file is read during a game.
+        """
+        for blockset in BLOCKSETS:
+            IMAGES.get(blockset.file.path)
+            IMAGES.get(blockset.file.path, alpha=GHOST_ALPHA)
 
     def create_screens(self):
+        self.preload_images()
         self.create_play_screen()
         self.create_start_screen()
         self.create_pause_screen()
         self.create_gameover_screen()
 
+    def create_background(self, group):
+        """Compose the static parts of the play screen into one surface.
+           Args:
+                group: sprite group of the plates and buttons which never move
+           Returns:
+                pygame.Surface of the screen size
+        """
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill(COLOR_GREEN)
+        group.draw(background)
+        self.next_block_display.draw_label(background)
+        self.score.draw_labels(background)
+        return background
+
     def create_play_screen(self):
         _ = Plate(ImageFiles.PLATE.path)
-        self.score = Score(self.screen)
+        self.score = ScoreBoard(self.screen, self.engine.score)
+        self.ground = GroundBlocks(self.screen)
+        # 4 dropping blocks and their ghosts
+        self.pool = BlockPool(8)
         self.next_block_display = NextBlockDisplay(ImageFiles.PLATE.path, self.screen)
         self.stop_button = StopButton(ImageFiles.STOP.path, STOP_LEFT, STOP_TOP)
         self.pause_button = StopButton(ImageFiles.PAUSE.path, PAUSE_LEFT, PAUSE_TOP)
@@ -211,186 +648,147 @@ class PyTetris:
         self.gameover_screen = GameOver(
             ImageFiles.GAMEOVER_SCREEN.path, self.screen, self)
 
-    def get_blockset_index(self):
-        index = random.randint(0, len(BLOCKSETS) - 1)
-        return index
+    def update(self, ticks=1):
+        """Advance the engine by the ticks due, and publish the snapshot after each tick.
+           The operations received since the last frame are applied in the first tick.
+           Args:
+                ticks: int, the number of ticks to run, given by Scheduler
+        """
+        for _ in range(ticks):
+            if self.player is not None:
+                self.actions.extend(self.player.act())
+            if self.actions:
+                self.latency.apply()
+            events = self.engine.step(self.actions, self.held)
+            self.actions = []
+            self.handle_events(events)
+            self.previous, self.snapshot = self.snapshot, self.engine.snapshot()
+
+    def present(self, alpha=1.0):
+        """Make the sprites of the dropping blocks and ghosts follow the latest snapshot.
+           Only the sprites are moved, so that the frame can be drawn whenever the
+           renderer is ready, regardless of the ticks run.
+           Args:
+                alpha: float, the fraction of the tick passed since the latest snapshot.
+                       The blocks falling by a row in the last tick are drawn between
+                       the rows, and 1 draws them at the latest snapshot.
+        """
+        current, previous = self.snapshot, self.previous
+        # Grounded blocks are moved by the ground, not by the snapshot.
+        if current.status != Status.PLAY or current.block_status != Status.DROPPING:
+            return
+        offset = 0.0
+        if previous.piece == current.piece and previous.block_status == Status.DROPPING and all(
+                row == prev_row + 1 and col == prev_col
+                for (row, col), (prev_row, prev_col) in zip(current.blocks, previous.blocks)):
+            offset = alpha - 1.0
+        for block, (row, col) in zip(self.blocks, current.blocks):
+            block.row = row + offset
+            block.col = col
+            self.set_block_center(block)
+        for ghost, (row, col) in zip(self.ghosts, current.ghosts):
+            ghost.row = row
+            ghost.col = col
+            self.set_block_center(ghost)
+
+    def handle_events(self, events):
+        for event in events:
+            self.handlers[event]()
 
     def create_block(self):
-        if self.next_blockset is None:
-            blockset = BLOCKSETS[self.get_blockset_index()]
-        else:
-            blockset = self.next_blockset
-
-        blockset_index = self.get_blockset_index()
-        self.next_blockset = BLOCKSETS[blockset_index]
-        self.next_block_display.set_images(blockset_index)
-        for i, (row, col) in enumerate(blockset.coordinates[0]):
-            self.blocks[i] = Block(blockset.file.path, row, col)
-        self.blockset = copy.deepcopy(blockset.coordinates)
-        # self.index is used to rotate blocks.
-        self.index = 0
+        blockset = BLOCKSETS[self.engine.blockset_index]
+        self.next_block_display.set_images(self.engine.next_blockset)
+        # Ghosts are created first to be drawn under the dropping blocks.
+        for i, (row, col) in enumerate(self.engine.ghost_blocks()):
+            self.ghosts[i] = self.pool.acquire(blockset.file.path, row, col, GHOST_ALPHA)
+        for i, block in enumerate(self.engine.blocks):
+            self.blocks[i] = self.pool.acquire(blockset.file.path, block.row, block.col)
+
+    def kill_ghosts(self):
+        for i, ghost in enumerate(self.ghosts):
+            if ghost:
+                self.ghosts[i] = self.pool.release(ghost)
 
     def set_block_center(self, block):
-        block.rect.centerx = BLOCK_AREA_LEFT + block.col * BLOCK_SIZE
-        block.rect.centery = BLOCK_AREA_TOP + block.row * BLOCK_SIZE
-
-    def update_moving_block(self):
-        self.drop_timer -= 1
-        if self.status == Status.PLAY and self.drop_timer == 0:
-            self.move_down()
-            self.drop_timer = self.timer_value
-        if (lower := min(block.row for block in self.blocks)) < 0:
-            self.correct_top(lower)
-
-        for block in self.blocks:
-            self.set_block_center(block)
+        block.rect.centerx = LAYOUT(BLOCK_AREA_LEFT + block.col * BLOCK_SIZE)
+        block.rect.centery = LAYOUT(BLOCK_AREA_TOP + block.row * BLOCK_SIZE)
 
-        self.judge_timer -= 1
-        if self.judge_timer == 0:
-            self.judge_timer = self.timer_value
-            if any(self.judge_ground(block) for block in self.blocks):
-                self.update_matrix()
-                if any(all(row) for row in self.matrix):
-                    self.ground_timer = 50
-                    self.block_status = Status.WAITING
-                    self.update = self.update_ground_blocks
-                # Game over
-                elif any(block for block in self.matrix[0]):
-                    self.status = Status.GAMEOVER
-                    self.gameover_sound.play()
-                else:
-                    self.create_block()
-                    self.drop_timer = 1
-
-    def update_ground_blocks(self):
-        self.ground_timer -= 1
-        if self.ground_timer == 40:
-            if deleted_rows := self.delete_blocks():
-                self.break_sound.play()
-                self.score.add(deleted_rows)
-                if self.level != self.score.level:
-                    self.timer_value -= 2
-                    self.level = self.score.level
-        if self.ground_timer == 20:
-            self.move_ground_blocks()
-        if self.ground_timer == 0:
-            self.create_block()
-            self.drop_timer = 1
-            self.block_status = Status.DROPPING
-            self.update = self.update_moving_block
+    def resize(self, size, sprites):
+        """Lay out the screens again for the window size, if the scale is changed.
+           Args:
+                size: (width, height) of the window
+                sprites: iterable of the sprites in the groups
+           Returns:
+                True if the screens are laid out again
+        """
+        if not LAYOUT.fit(size):
+            return False
+        IMAGES.discard(LAYOUT.scale)
+        for sprite in sprites:
+            sprite.layout()
+        for block in itertools.chain(self.blocks, self.ghosts):
+            if block:
+                self.set_block_center(block)
+        self.ground.layout()
+        self.score.values = None
+        return True
+
+    def update_matrix(self):
+        """Draw the grounded blocks on the ground and release their sprites.
+           The blocks already on the ground are overwritten, if the dropping
+           blocks were corrected onto them.
+        """
+        self.kill_ghosts()
+        for i, (row, col) in enumerate(self.engine.grounded_blocks):
+            self.ground.put(row, col, self.blocks[i].filename)
+            self.blocks[i] = self.pool.release(self.blocks[i])
 
     def delete_blocks(self):
-        deleted_rows = 0
-        for row in self.matrix:
-            if all(row):
-                deleted_rows += 1
-                for i, block in enumerate(row):
-                    row[i] = block.kill()
-        return deleted_rows
+        self.break_sound.play()
+        self.ground.delete_rows(self.engine.deleted_rows)
 
     def move_ground_blocks(self):
-        self.matrix.sort(key=lambda row: 1 if any(row) else 0)
-        for i, row in enumerate(self.matrix):
-            for block in row:
-                if block:
-                    block.row = i
-                    self.set_block_center(block)
+        self.ground.collapse(self.engine.deleted_rows)
 
-    def check_matrix(self, new_row, new_col):
-        if self.matrix[new_row][new_col]:
-            return True
-        return False
+    def play_rotate_sound(self):
+        self.rotate_sound.play()
 
-    def judge_left(self, block):
-        new_col = block.col - 1
-        if new_col < 0 or self.check_matrix(block.row, new_col):
-            return False
-        return True
+    def play_gameover_sound(self):
+        self.gameover_sound.play()
 
-    def judge_right(self, block):
-        new_col = block.col + 1
-        if new_col >= COLS or self.check_matrix(block.row, new_col):
-            return False
-        return True
+    def move_right(self):
+        self.latency.input()
+        self.actions.append(Action.RIGHT)
 
-    def judge_down(self, block):
-        new_row = block.row + 1
-        if new_row >= ROWS or self.check_matrix(new_row, block.col):
-            return False
-        return True
+    def move_left(self):
+        self.latency.input()
+        self.actions.append(Action.LEFT)
 
-    def judge_ground(self, block):
-        if block.row == ROWS - 1 or self.check_matrix(block.row + 1, block.col):
-            return True
-        return False
+    def move_down(self):
+        self.latency.input()
+        self.actions.append(Action.DOWN)
 
-    def correct_top(self, lower):
-        """If the blocks which rows are out of the block area are found in dropping blocks,
-           correct their rows, and kill the blocks already in the matrix to make spaces
-           for the dropping blocks.
-           Args:
-                lower: int, the number of rows out of the block area
-        """
-        for block in self.blocks:
-            block.row += abs(lower)
-        for block in self.blocks:
-            if old_block := self.matrix[block.row][block.col]:
-                old_block.kill()
+    def rotate(self):
+        self.latency.input()
+        self.actions.append(Action.ROTATE)
 
-    def update_matrix(self):
-        for block in self.blocks:
-            self.matrix[block.row][block.col] = block
-
-    def move_right(self, step=1):
-        if all(self.judge_right(block) for block in self.blocks):
-            update_blockset_col(self.blockset, step)
-            for block in self.blocks:
-                block.col += 1
-
-    def move_left(self, step=-1):
-        if all(self.judge_left(block) for block in self.blocks):
-            update_blockset_col(self.blockset, step)
-            for block in self.blocks:
-                block.col -= 1
-
-    def move_down(self, step=1):
-        if all(self.judge_down(block) for block in self.blocks):
-            update_blockset_row(self.blockset, step)
-            for block in self.blocks:
-                block.row += step
-
-    def judge_rotate(self, rotated_pos):
-        """Check whether blocks can be rotated or not.
-           Args:
-                rotated_pos: list, the positions after rotated
-        """
-        # Check right side
-        if (over := max(col - (COLS - 1) for _, col in rotated_pos)) > 0:
-            if any(self.matrix[row][col - over] for row, col in rotated_pos):
-                return False, 0
-            return True, over
-        # Check left side
-        elif (over := min(col for _, col in rotated_pos)) < 0:
-            if any(self.matrix[row][col - over] for row, col in rotated_pos):
-                return False, 0
-            return True, over
-        else:
-            if any(self.matrix[row][col] for row, col in rotated_pos):
-                return False, 0
-            return True, 0
+    def hard_drop(self):
+        self.latency.input()
+        self.actions.append(Action.HARD_DROP)
 
-    def rotate(self):
-        next_index = self.index + 1
-        if next_index > 3:
-            next_index = 0
-        rotated_pos = self.blockset[next_index]
-        rotatable, over = self.judge_rotate(rotated_pos)
-        if rotatable:
-            self.rotate_sound.play()
-            self.index = next_index
-            for block, (row, col) in zip(self.blocks, rotated_pos):
-                block.row = row
-                block.col = col - over
+    def hold(self, action):
+        """Tell the engine that the key of the action is held down.
+        """
+        if action not in self.held:
+            self.held.append(action)
+
+    def release(self, action=None):
+        """Tell the engine that the key of the action is released, or all of them if None.
+        """
+        if action is None:
+            self.held.clear()
+        elif action in self.held:
+            self.held.remove(action)
 
     def click(self, x, y):
         """Changes status, when a button is clicked.
@@ -402,13 +800,11 @@ class PyTetris:
         # pause button on play screen
         elif self.status == Status.PLAY and \
                 self.pause_button.rect.collidepoint(x, y):
-            self.update_before_pause = self.update
             self.status = Status.PAUSE
         # restart button on pause screen
         elif self.status == Status.PAUSE and \
                 self.restart_button.rect.collidepoint(x, y):
             self.status = Status.PLAY
-            self.update = self.update_before_pause
         # start button on start screen
         elif self.status == Status.START and \
                 self.start_button.rect.collidepoint(x, y):
@@ -422,55 +818,106 @@ class PyTetris:
 
 class Block(pygame.sprite.Sprite):
 
-    def __init__(self, filename, row, col):
+    def __init__(self, filename, row, col, alpha=False):
         super().__init__(self.containers)
-        self.image = pygame.image.load(filename).convert()
-        self.rect = self.image.get_rect()
+        self.filename = filename
+        self.alpha = alpha
+        self.layout()
         self.row = row
         self.col = col
         self.stop = False
 
+    def layout(self):
+        self.image = IMAGES.get(self.filename, alpha=self.alpha)
+        self.rect = self.image.get_rect()
+
+    def reset(self, filename, row, col, alpha=False):
+        self.filename = filename
+        self.alpha = alpha
+        self.layout()
+        self.row = row
+        self.col = col
+        self.add(self.containers)
+
+
+class BlockPool:
+    """Block sprites created once and reused, instead of being created for
+       each dropping block and killed when it is grounded.
+        Args:
+            size: int, the number of the sprites created in advance
+    """
+
+    def __init__(self, size):
+        self.free = [Block(BLOCKSETS[0].file.path, 0, 0) for _ in range(size)]
+        for block in self.free:
+            block.kill()
+
+    def acquire(self, filename, row, col, alpha=False):
+        """Return a sprite with the image at the position, adding it to its groups.
+        """
+        if not self.free:
+            return Block(filename, row, col, alpha)
+        block = self.free.pop()
+        block.reset(filename, row, col, alpha)
+        return block
+
+    def release(self, block):
+        """Remove the sprite from its groups to be reused.
+           Returns:
+                None, to be assigned to the place of the sprite
+        """
+        block.kill()
+        self.free.append(block)
+
 
 class Plate(pygame.sprite.Sprite):
 
     def __init__(self, filename):
         super().__init__(self.containers)
-        self.image = pygame.image.load(filename).convert()
-        self.image = pygame.transform.scale(self.image, (200, 5))
+        self.filename = filename
+        self.layout()
+
+    def layout(self):
+        self.image = IMAGES.get(self.filename, (200, 5))
         self.rect = self.image.get_rect()
-        self.rect.left = BLOCK_AREA_LEFT - 10
-        self.rect.bottom = BLOCK_AREA_BOTTOM
+        self.rect.left = LAYOUT(BLOCK_AREA_LEFT - 10)
+        self.rect.bottom = LAYOUT(BLOCK_AREA_BOTTOM)
 
 
 class NextBlockDisplay(pygame.sprite.Sprite):
 
     def __init__(self, file_path, screen):
         super().__init__(self.containers)
-        self.image = pygame.image.load(file_path).convert()
-        self.image = pygame.transform.scale(self.image, (100, 5))
-        self.rect = self.image.get_rect()
-        self.rect.left = NEXT_BLOCK_AREA_LEFT
-        self.rect.bottom = NEXT_BLOCK_AREA_BOTTOM
-        self.sysfont = pygame.font.SysFont(None, 30)
+        self.file_path = file_path
         self.screen = screen
+        self.blockset_index = None
+        self.layout()
+
+    def layout(self):
+        self.image = IMAGES.get(self.file_path, (100, 5))
+        self.rect = self.image.get_rect()
+        self.rect.left = LAYOUT(NEXT_BLOCK_AREA_LEFT)
+        self.rect.bottom = LAYOUT(NEXT_BLOCK_AREA_BOTTOM)
         self.assemble_blocks()
+        if self.blockset_index is not None:
+            self.set_images(self.blockset_index)
 
     def assemble_blocks(self):
         self.images = {}
         for i, blockset in enumerate(BLOCKSETS):
-            self.images[i] = tuple(
-                pygame.image.load(blockset.file.path).convert() for _ in range(4))
+            self.images[i] = (IMAGES.get(blockset.file.path),) * 4
 
-    def update(self):
-        text = self.sysfont.render(
-            'NEXT', True, COLOR_WHITE)
-        self.screen.blit(text, (NEXT_TEXT_X, NEXT_TEXT_Y))
+    def draw_label(self, surface):
+        text = TEXTS.render('NEXT', 30, COLOR_WHITE)
+        surface.blit(text, LAYOUT.point(NEXT_TEXT_X, NEXT_TEXT_Y))
 
+    def update(self):
         for block, (row, col) in zip(self.next_blocks, self.positions):
             self.screen.blit(
-                block, (DISPLAY_X + col * BLOCK_SIZE, DISPLAY_Y + row * BLOCK_SIZE))
+                block, LAYOUT.point(DISPLAY_X + col * BLOCK_SIZE, DISPLAY_Y + row * BLOCK_SIZE))
 
     def set_images(self, blockset_index):
+        self.blockset_index = blockset_index
         self.next_blocks = self.images[blockset_index]
         blockset = BLOCKSETS[blockset_index]
         self.positions = blockset.next
@@ -478,43 +925,94 @@ class NextBlockDisplay(pygame.sprite.Sprite):
 
 class Button(pygame.sprite.Sprite):
 
-    def __init__(self, file_path, width, height):
+    def __init__(self, file_path, x, y, width, height):
         super().__init__(self.containers)
-        self.image = pygame.image.load(file_path).convert_alpha()
-        self.image = pygame.transform.scale(self.image, (width, height))
+        self.file_path = file_path
+        self.x = x
+        self.y = y
+        self.size = (width, height)
+        self.layout()
+
+    def layout(self):
+        self.image = IMAGES.get(self.file_path, self.size, alpha=True)
         self.rect = self.image.get_rect()
+        self.rect.left = LAYOUT(self.x)
+        self.rect.top = LAYOUT(self.y)
 
 
 class StopButton(Button):
 
     def __init__(self, file_path, left, top, width=40, height=40):
-        super().__init__(file_path, width, height)
-        self.rect.left = left
-        self.rect.top = top
+        super().__init__(file_path, left, top, width, height)
 
 
 class RestartButton(Button):
 
     def __init__(self, file_path, left, top, width=50, height=50):
-        super().__init__(file_path, width, height)
-        self.rect.left = left
-        self.rect.top = top
+        super().__init__(file_path, left, top, width, height)
 
 
 class StartButton(Button):
 
     def __init__(self, file_path, left, top, width=50, height=50):
-        super().__init__(file_path, width, height)
-        self.rect.left = left
-        self.rect.top = top
+        super().__init__(file_path, left, top, width, height)
 
 
 class RepeatButton(Button):
 
     def __init__(self, file_path, center_x, center_y, width=50, height=50):
-        super().__init__(file_path, width, height)
-        self.rect.centerx = center_x
-        self.rect.centery = center_y
+        super().__init__(file_path, center_x, center_y, width, height)
+
+    def layout(self):
+        super().layout()
+        self.rect.center = LAYOUT.point(self.x, self.y)
+
+
+class Timeline:
+    """Frames of an animation compiled once, and looked up by the number of the frames elapsed.
+        Args:
+            frames: list of the frames, each of which is shown for one frame
+            loop: int, the index of the frame to which the timeline goes back after the last,
+                  or None to hold the last frame
+    """
+
+    def __init__(self, frames, loop=None):
+        self.frames = frames
+        self.loop = loop
+
+    @classmethod
+    def compile(cls, keyframes, loop=None):
+        """Create the timeline from (frame, duration) pairs.
+        """
+        return cls([frame for frame, duration in keyframes for _ in range(duration)], loop)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, elapsed):
+        if elapsed >= len(self.frames):
+            if self.loop is None:
+                return self.frames[-1]
+            elapsed = self.loop + (elapsed - self.loop) % (len(self.frames) - self.loop)
+        return self.frames[elapsed]
+
+
+def compile_message(text, color, x, y, sizes=(40, 50, 40), duration=20):
+    """Compile the message pulsing through the sizes into a timeline of
+       (surface, position), which is shifted to the left while it is enlarged.
+        Args:
+            text: str, the message
+            color: (r, g, b)
+            x: int, the left of the message in the smallest size
+            y: int, the top of the message
+            sizes: the font sizes, each of which is shown for the duration
+            duration: int, the number of the frames
+    """
+    keyframes = []
+    for size in sizes[-1:] + sizes:
+        position = LAYOUT.point(x - (size - min(sizes)), y)
+        keyframes.append(((TEXTS.render(text, size, color), position), duration))
+    return Timeline.compile(keyframes, loop=0)
 
 
 class Pause(pygame.sprite.Sprite):
@@ -522,72 +1020,56 @@ class Pause(pygame.sprite.Sprite):
     def __init__(self, root, screen):
         super().__init__(self.containers)
         self.screen = screen
-        self.images = [image for image in self.create_image(root)]
-        self.images_count = len(self.images)
-        self.timer = 20
-        self.index = 0
-        self.image = self.images[self.index]
+        self.root = root
+        self.elapsed = 0
+        self.layout()
+
+    def layout(self):
+        images = [image for image in self.create_image(self.root)]
+        # The first image is shown for two periods before the images are repeated.
+        keyframes = [(image, 20) for image in images[:1] + images]
+        self.timeline = Timeline.compile(keyframes, loop=20)
+        self.text = TEXTS.render('PAUSE', 50, COLOR_WHITE)
+        self.text_position = LAYOUT.point(PAUSE_TEXT_X, PAUSE_TEXT_Y)
+        self.image = self.timeline[self.elapsed]
         self.rect = self.image.get_rect()
-        self.rect.left = PAUSE_IMAGE_LEFT
-        self.rect.top = PAUSE_IMAGE_TOP
-        self.pause_sysfont = pygame.font.SysFont(None, 50)
+        self.rect.left = LAYOUT(PAUSE_IMAGE_LEFT)
+        self.rect.top = LAYOUT(PAUSE_IMAGE_TOP)
 
     def create_image(self, root):
-        pattern = re.compile('pause\d+\.png')
+        pattern = re.compile(r'pause\d+\.png')
         for file in ImageFiles:
             if pattern.match(file.value):
-                yield pygame.image.load(file.path).convert()
-
-    def draw_text(self):
-        text = self.pause_sysfont.render('PAUSE', True, COLOR_WHITE)
-        self.screen.blit(text, (PAUSE_TEXT_X, PAUSE_TEXT_Y))
-
-    def draw_image(self):
-        self.timer -= 1
-        if self.timer == 0:
-            if self.index >= self.images_count:
-                self.index = 0
-            self.image = self.images[self.index]
-            self.index += 1
-            self.timer = 20
+                yield IMAGES.get(file.path)
 
     def update(self):
-        self.draw_image()
-        self.draw_text()
+        self.elapsed += 1
+        self.image = self.timeline[self.elapsed]
+        self.screen.blit(self.text, self.text_position)
 
 
 class Start(pygame.sprite.Sprite):
 
     def __init__(self, filename, screen):
         super().__init__(self.containers)
-        self.image = pygame.image.load(filename).convert()
-        self.rect = self.image.get_rect()
-        self.rect.left = 50
-        self.rect.top = 50
+        self.filename = filename
         self.screen = screen
-        self.timer = 20
-        self.index = -1
-        self.title_font = pygame.font.SysFont(None, 70)
-        self.message_size = (40, 50, 40)
-
-    def draw_text(self):
-        self.timer -= 1
-        if self.timer == 0:
-            self.index += 1
-            if self.index >= len(self.message_size):
-                self.index = -1
-            self.timer = 20
-
-        size = self.message_size[self.index]
-        message_font = pygame.font.SysFont(None, self.message_size[self.index])
-        message = message_font.render('START', True, COLOR_PINK)
-        delta = 10 if size == 50 else 0
-        self.screen.blit(message, (START_TEXT_X - delta, START_TEXT_Y))
-        title = self.title_font.render('TETRIS', True, COLOR_WHITE)
-        self.screen.blit(title, (TITLE_X, TITLE_Y))
+        self.elapsed = 0
+        self.layout()
+
+    def layout(self):
+        self.image = IMAGES.get(self.filename)
+        self.rect = self.image.get_rect()
+        self.rect.left = LAYOUT(50)
+        self.rect.top = LAYOUT(50)
+        self.message = compile_message('START', COLOR_PINK, START_TEXT_X, START_TEXT_Y)
+        self.title = TEXTS.render('TETRIS', 70, COLOR_WHITE)
+        self.title_position = LAYOUT.point(TITLE_X, TITLE_Y)
 
     def update(self):
-        self.draw_text()
+        self.elapsed += 1
+        self.screen.blit(*self.message[self.elapsed])
+        self.screen.blit(self.title, self.title_position)
 
 
 class GameOver(pygame.sprite.Sprite):
@@ -596,121 +1078,232 @@ class GameOver(pygame.sprite.Sprite):
         super().__init__(self.containers)
         self.screen = screen
         self.game = game
-        self.image = pygame.image.load(file_path).convert_alpha()
-        self.rect = self.image.get_rect()
-        self.index = -1
-        self.message_size = (40, 50, 40)
+        self.file_path = file_path
         self.initialize()
+        self.layout()
+
+    def layout(self):
+        self.image = IMAGES.get(self.file_path, alpha=True)
+        self.rect = self.image.get_rect()
+        self.drop = Timeline([LAYOUT.point(GAMEOVER_LEFT, top) for top in self.compile_drop()])
+        self.message = compile_message('REPEAT', COLOR_WHITE, REPEAT_TEXT_X, REPEAT_TEXT_Y)
+        self.rect.topleft = self.drop[self.elapsed]
 
     def initialize(self):
         self.status = None
-        self.timer = 100
-        self.top = 0
-        self.is_drop = True
-        self.stop = 0
-
-    def draw_text(self):
-        self.timer -= 1
-        if self.timer == 0:
-            self.index += 1
-            if self.index >= len(self.message_size):
-                self.index = -1
-            self.timer = 20
-
-        size = self.message_size[self.index]
-        message_font = pygame.font.SysFont(None, self.message_size[self.index])
-        message = message_font.render('REPEAT', True, COLOR_WHITE)
-        delta = 10 if size == 50 else 0
-        self.screen.blit(message, (REPEAT_TEXT_X - delta, REPEAT_TEXT_Y))
-
-    def draw_image(self):
-        if self.stop <= 2:
-            if self.is_drop:
-                if self.top <= GAMEOVER_TOP:
-                    self.top += 20
+        self.elapsed = 0
+
+    @staticmethod
+    def compile_drop():
+        """Return the tops of the image in each frame. The image drops,
+           bounces once and rests.
+        """
+        tops = [0]
+        top = 0
+        is_drop = True
+        stop = 0
+        while stop < 2:
+            if is_drop:
+                if top <= GAMEOVER_TOP:
+                    top += 20
                 else:
-                    self.stop += 1
-                    self.is_drop = False
-            if self.stop == 1 and not self.is_drop:
-                if self.top >= GAMEOVER_BOUND_TOP:
-                    self.top -= 5
+                    stop += 1
+                    is_drop = False
+            if stop == 1 and not is_drop:
+                if top >= GAMEOVER_BOUND_TOP:
+                    top -= 5
                 else:
-                    self.is_drop = True
-        self.rect.left = GAMEOVER_LEFT
-        self.rect.top = self.top
+                    is_drop = True
+            tops.append(top)
+        return tops
 
     def update(self):
+        self.elapsed += 1
         if self.status == Status.REPEAT:
-            self.draw_text()
-        self.draw_image()
-        if self.status != Status.REPEAT:
-            self.timer -= 1
-            if self.timer == 0:
-                self.timer = 20
-                self.game.status = Status.REPEAT
-                self.status = Status.REPEAT
+            self.screen.blit(*self.message[self.elapsed - REPEAT_DELAY])
+        self.rect.topleft = self.drop[self.elapsed]
+        if self.status != Status.REPEAT and self.elapsed == REPEAT_DELAY:
+            self.game.status = Status.REPEAT
+            self.status = Status.REPEAT
 
 
-class Score:
+class GroundBlocks:
+    """The grounded blocks drawn on one surface instead of a sprite for each.
+       Only the cells put and the rows moved are drawn again, and their areas
+       are returned by draw to be pushed to the display.
+    """
 
     def __init__(self, screen):
-        self.sysfont = pygame.font.SysFont(None, 30)
         self.screen = screen
-        self.initialize()
+        self.matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]
+        self.layout()
 
-    def initialize(self):
-        self.level = 1
-        self.lines = 0
-        self.score = 0
+    def layout(self):
+        """Create the surface for the scale of LAYOUT, and draw the blocks on it again.
+        """
+        self.image = pygame.Surface(LAYOUT.point(COLS * BLOCK_SIZE, ROWS * BLOCK_SIZE)).convert()
+        self.rect = self.image.get_rect()
+        self.rect.left = LAYOUT(BLOCK_AREA_LEFT - BLOCK_SIZE // 2)
+        self.rect.top = LAYOUT(BLOCK_AREA_TOP - BLOCK_SIZE // 2)
+        self.image.fill(COLOR_GREEN)
+        for row, files in enumerate(self.matrix):
+            for col, filename in enumerate(files):
+                if filename:
+                    self.image.blit(IMAGES.get(filename), LAYOUT.point(col * BLOCK_SIZE, row * BLOCK_SIZE))
+        self.dirty = [self.rect]
+
+    def clear(self):
+        self.matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]
+        self.image.fill(COLOR_GREEN)
+        self.dirty = [self.rect]
+
+    def put(self, row, col, filename):
+        """Draw the image of a block in the cell.
+           Args:
+                row: int, the row of the cell
+                col: int, the column of the cell
+                filename: str, the image file of the block
+        """
+        self.matrix[row][col] = filename
+        left, top = LAYOUT.point(col * BLOCK_SIZE, row * BLOCK_SIZE)
+        area = Rect(left, top, LAYOUT(BLOCK_SIZE), LAYOUT(BLOCK_SIZE))
+        self.image.blit(IMAGES.get(filename), area)
+        self.dirty.append(area.move(self.rect.topleft))
+
+    def draw_row(self, row):
+        area = LAYOUT.rect(Rect(0, row * BLOCK_SIZE, COLS * BLOCK_SIZE, BLOCK_SIZE))
+        self.image.fill(COLOR_GREEN, area)
+        for col, filename in enumerate(self.matrix[row]):
+            if filename:
+                self.image.blit(IMAGES.get(filename), LAYOUT.point(col * BLOCK_SIZE, row * BLOCK_SIZE))
+        self.dirty.append(area.move(self.rect.topleft))
+
+    def delete_rows(self, rows):
+        for row in rows:
+            self.matrix[row] = [None for _ in range(COLS)]
+            self.draw_row(row)
+
+    def collapse(self, deleted_rows):
+        """Move the rows above the deleted rows down in one sweep. Only the rows
+           whose cells are changed are drawn again.
+           Args:
+                deleted_rows: list of the deleted rows in ascending order
+        """
+        if not deleted_rows:
+            return
+        deleted = set(deleted_rows)
+        dest = deleted_rows[-1]
+        for src in range(deleted_rows[-1], -1, -1):
+            if src in deleted:
+                continue
+            if dest != src:
+                changed = self.matrix[dest] != self.matrix[src]
+                self.matrix[dest] = self.matrix[src]
+                if changed:
+                    self.draw_row(dest)
+            dest -= 1
+        for i in range(dest + 1):
+            changed = any(self.matrix[i])
+            self.matrix[i] = [None for _ in range(COLS)]
+            if changed:
+                self.draw_row(i)
 
     def draw(self):
-        score_area_y = SCORE_AREA_Y
-        for text, num in zip(['LEVEL', 'LINES', 'SCORE'], [f'{self.level}', f'{self.lines}', f'{self.score}']):
-            line_1 = self.sysfont.render(text, True, COLOR_WHITE)
-            line_2 = self.sysfont.render(num, True, (250, 102, 14))
-            self.screen.blit(line_1, (SCORE_AREA_X, score_area_y))
-            score_area_y += 20
-            self.screen.blit(line_2, (SCORE_AREA_X, score_area_y))
-            score_area_y += 40
-
-    def add(self, deleted_rows):
-        """Compute lines, level and score.
+        """Blit the ground on the screen.
+           Returns:
+                list of the areas changed since the last call
+        """
+        self.screen.blit(self.image, self.rect)
+        dirty, self.dirty = self.dirty, []
+        return dirty
+
+
+class ScoreBoard:
+
+    def __init__(self, screen, score):
+        self.screen = screen
+        self.score = score
+        self.values = None
+        self.texts = []
+
+    def draw_labels(self, surface):
+        for i, text in enumerate(['LEVEL', 'LINES', 'SCORE']):
+            label = TEXTS.render(text, 30, COLOR_WHITE)
+            surface.blit(label, LAYOUT.point(SCORE_AREA_X, SCORE_AREA_Y + i * 60))
+
+    def draw(self, score=None):
+        """Draw the numbers, rendering them again only when any of them changes.
            Args:
-                deleted_rows: int, the number of deleted lines of blocks.
-
-           Clearing 10 lines brings the level up. The level starts with 1.
-           Scoring:
-                1 line   40 * level
-                2 lines  100 * level
-                3 lines  300 * level
-                4 lines  400 * level
-        """
-        self.lines += deleted_rows
-        self.level = self.lines // 10 + 1
-
-        if deleted_rows == 1:
-            self.score += 40 * self.level
-        elif deleted_rows == 2:
-            self.score += 100 * self.level
-        elif deleted_rows == 3:
-            self.score += 300 * self.level
+                score: Snapshot or Score to draw, or None for the score given at creation
+        """
+        score = self.score if score is None else score
+        if (values := (score.level, score.lines, score.score)) != self.values:
+            self.values = values
+            self.texts = [TEXTS.render(f'{num}', 30, COLOR_ORANGE) for num in values]
+        for i, text in enumerate(self.texts):
+            self.screen.blit(text, LAYOUT.point(SCORE_AREA_X, SCORE_AREA_Y + i * 60 + 20))
+
+
+class DirtyRects:
+    """Collect the changed areas of the screen and push only them to the display.
+       The whole screen is pushed when the status changes, because all of it
+       is drawn again, or when the dirty rectangles are disabled.
+
+        Args:
+            enabled (bool): if False, the whole screen is pushed in each frame.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.status = None
+        self.rects = []
+
+    def add(self, rects):
+        """Add the rects, such as the ones returned by RenderUpdates.draw.
+        """
+        self.rects.extend(rects)
+
+    def update(self, status):
+        """Push the changed areas drawn in the status to the display.
+
+            Args:
+                status (Status): the status in which the screen was drawn.
+        """
+        if not self.enabled or status != self.status:
+            pygame.display.update()
         else:
-            self.score += 1200 * self.level
+            pygame.display.update(self.rects + [LAYOUT.rect(area) for area in DIRTY_AREAS[status]])
+        self.status = status
+        self.rects = []
+
+    def reset(self):
+        """Push the whole screen at the next update.
+        """
+        self.status = None
 
 
-def main():
+def main(dirty_rects=DIRTY_RECTS, startup_report=STARTUP_REPORT, interpolate=INTERPOLATE,
+         latency_overlay=LATENCY_OVERLAY, latency_report=LATENCY_REPORT, ai=AI_PLAYER):
+    timer = StartupTimer()
+    # The files are decoded while the display is created; only convert is left to the main thread.
+    executor = ThreadPoolExecutor()
+    preload_assets(executor, open_bundle())
     pygame.init()
-    screen = pygame.display.set_mode(SCREEN.size)
+    timer.mark('init')
+    screen = pygame.display.set_mode(SCREEN.size, RESIZABLE)
     pygame.display.set_caption('PyTetris')
+    timer.mark('display')
     play = pygame.sprite.RenderUpdates()
     pause = pygame.sprite.RenderUpdates()
     start = pygame.sprite.RenderUpdates()
     gameover = pygame.sprite.RenderUpdates()
     repeat = pygame.sprite.RenderUpdates()
+    # baked into the background of the play screen
+    static = pygame.sprite.Group()
     Block.containers = play
-    Plate.containers = play
-    NextBlockDisplay.containers = play
-    StopButton.containers = play
+    Plate.containers = static
+    NextBlockDisplay.containers = static
+    StopButton.containers = static
     Pause.containers = pause
     RestartButton.containers = pause
     Start.containers = start
@@ -718,43 +1311,42 @@ def main():
     GameOver.containers = gameover
     RepeatButton.containers = repeat
 
-    tetris = PyTetris(screen)
+    tetris = PyTetris(screen, TetrisEngine(tick_rate=LOGIC_RATE))
+    if ai:
+        tetris.player = AIPlayer(tetris.engine, delay=tetris.engine.ticks(AI_DELAY))
+    executor.shutdown()
+    timer.mark('screens')
     clock = pygame.time.Clock()
-    pygame.key.set_repeat(500, 100)
+    scheduler = Scheduler(LOGIC_RATE)
+    dirty = DirtyRects(dirty_rects)
+    background = None
 
     while True:
-        clock.tick(60)
-        screen.fill(COLOR_GREEN)
-
-        if tetris.status == Status.PLAY:
-            tetris.update()
-            play.update()
-            play.draw(screen)
-            tetris.score.draw()
-        elif tetris.status == Status.PAUSE:
-            pause.update()
-            pause.draw(screen)
-        elif tetris.status == Status.START:
-            start.update()
-            start.draw(screen)
-        elif tetris.status == Status.GAMEOVER:
-            play.update()
-            tetris.score.draw()
-            play.draw(screen)
-            gameover.update()
-            gameover.draw(screen)
-        elif tetris.status == Status.REPEAT:
-            gameover.update()
-            gameover.draw(screen)
-            repeat.update()
-            repeat.draw(screen)
-
+        clock.tick(FPS)
+        # The input is handled first to be applied in the ticks of this frame.
         for event in pygame.event.get():
             if event.type == QUIT:
+                if latency_report:
+                    print(tetris.latency.report(), file=sys.stderr)
                 pygame.quit()
                 sys.exit()
+            if event.type == VIDEORESIZE:
+                sprites = itertools.chain(play, pause, start, gameover, repeat, static)
+                if tetris.resize(event.size, sprites):
+                    background = None
+                dirty.reset()
             if event.type == MOUSEBUTTONDOWN and event.button == 1:
                 tetris.click(*event.pos)
+            # The held keys are repeated by the engine, not by the key repeat of pygame.
+            if event.type == KEYDOWN and event.key in HELD_KEYS:
+                tetris.hold(HELD_KEYS[event.key])
+            if event.type == KEYUP and event.key in HELD_KEYS:
+                tetris.release(HELD_KEYS[event.key])
+            if event.type == WINDOWFOCUSLOST:
+                tetris.release()
+            if event.type == KEYDOWN and event.key == K_F3:
+                latency_overlay = not latency_overlay
+                dirty.reset()
             if tetris.status == Status.PLAY and tetris.block_status == Status.DROPPING:
                 if event.type == KEYDOWN:
                     if event.key == K_RIGHT:
@@ -765,8 +1357,62 @@ def main():
                         tetris.move_down()
                     if event.key == K_UP:
                         tetris.rotate()
+                    if event.key == K_SPACE:
+                        tetris.hard_drop()
+
+        status = tetris.status
+        if status in (Status.PLAY, Status.GAMEOVER):
+            # The background is composed again only when the status changes.
+            if background is None or status != dirty.status:
+                background = tetris.create_background(static)
+            screen.blit(background, (0, 0))
+        else:
+            screen.fill(COLOR_GREEN)
+        # The time out of play must not be caught up when the game is resumed.
+        if tetris.status != Status.PLAY:
+            scheduler.reset()
 
-        pygame.display.update()
+        if tetris.status == Status.PLAY:
+            tetris.update(scheduler.advance())
+            tetris.present(scheduler.alpha if interpolate else 1.0)
+            # Only the next blocks are drawn by the static sprites.
+            static.update()
+            play.update()
+            dirty.add(tetris.ground.draw())
+            dirty.add(play.draw(screen))
+            tetris.score.draw(tetris.snapshot)
+        elif tetris.status == Status.PAUSE:
+            pause.update()
+            dirty.add(pause.draw(screen))
+        elif tetris.status == Status.START:
+            start.update()
+            dirty.add(start.draw(screen))
+        elif tetris.status == Status.GAMEOVER:
+            static.update()
+            play.update()
+            tetris.score.draw(tetris.snapshot)
+            dirty.add(tetris.ground.draw())
+            dirty.add(play.draw(screen))
+            gameover.update()
+            dirty.add(gameover.draw(screen))
+        elif tetris.status == Status.REPEAT:
+            gameover.update()
+            dirty.add(gameover.draw(screen))
+            repeat.update()
+            dirty.add(repeat.draw(screen))
+
+        if latency_overlay:
+            dirty.add(tetris.latency.draw(screen))
+        AUDIO.flush()
+        dirty.update(status)
+        tetris.latency.present()
+        if timer is not None:
+            timer.mark('first frame')
+            if startup_report:
+                print(timer.report(), file=sys.stderr)
+            timer = None
+            # The sounds are decoded after the first frame not to delay it.
+            AUDIO.start()
 
 
 if __name__ == '__main__':
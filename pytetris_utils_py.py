@@ -0,0 +1,58 @@
+"""Pure Python implementation of the extension module pytetris_utils.
+
+It has the same functions as cython_code/pytetris_utils.pyx and is used
+when the extension module is not built for the platform.
+"""
+
+
+def update_blockset_row(blockset, step):
+    blockset[..., 0] += step
+
+
+def update_blockset_col(blockset, step):
+    blockset[..., 1] += step
+
+
+def collides(rows, masks, row):
+    """Return True if any of the (row, mask) pairs overlaps the rows moved by row.
+       Rows above the block area are empty.
+    """
+    for r, mask in masks:
+        if (r := r + row) >= 0 and rows[r] & mask:
+            return True
+    return False
+
+
+def find_full_rows(rows, changed, full):
+    """Return the full rows in ascending order, looking at only the changed rows.
+    """
+    return sorted(r for r in set(changed) if rows[r] == full)
+
+
+def collapse(rows, deleted):
+    """Move the rows above the deleted rows down in place, keeping their order.
+    """
+    if not deleted:
+        return
+    skip = set(deleted)
+    dest = deleted[-1]
+    for src in range(dest, -1, -1):
+        if src not in skip:
+            rows[dest] = rows[src]
+            dest -= 1
+    for i in range(dest + 1):
+        rows[i] = 0
+
+
+def drop_distance(rows, heights, profile, masks, bottom, row, col):
+    """Return the number of rows the blocks can fall.
+    """
+    n = len(rows)
+    distance = min(n - heights[c + col] - 1 - (r + row) for c, r in profile)
+    # The blocks have been slid under other blocks.
+    if distance < 0:
+        distance = 0
+        while row + distance + 1 + bottom < n and \
+                not collides(rows, masks, row + distance + 1):
+            distance += 1
+    return distance
@@ -0,0 +1,90 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import io
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+import pygame
+
+from asset_bundle import ROOT, AssetBundle, BundleFile, open_bundle, pack
+
+
+class AssetBundleTestCase(TestCase):
+    """Tests for pack and AssetBundle
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        (self.root / 'images').mkdir()
+        (self.root / 'images' / 'a.png').write_bytes(b'abc')
+        (self.root / 'images' / 'b.png').write_bytes(b'')
+        (self.root / 'sounds').mkdir()
+        (self.root / 'sounds' / 'c.wav').write_bytes(b'0123456789')
+        self.output = self.root / 'assets.bin'
+        pack(self.root, [Path('images', 'a.png'), 'images/b.png', 'sounds/c.wav'], self.output)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_buffer(self):
+        """Each asset must be got by its relative path.
+        """
+        bundle = AssetBundle(self.output)
+        self.assertIn(Path('images', 'a.png'), bundle)
+        self.assertNotIn('images/d.png', bundle)
+        self.assertEqual(bytes(bundle.buffer('images/a.png')), b'abc')
+        self.assertEqual(bytes(bundle.buffer('images/b.png')), b'')
+        self.assertEqual(bytes(bundle.buffer(Path('sounds', 'c.wav'))), b'0123456789')
+        self.assertIsInstance(bundle.buffer('images/a.png'), memoryview)
+        bundle.close()
+
+    def test_not_bundle(self):
+        path = self.root / 'images' / 'a.png'
+        path.write_bytes(b'\0' * 16)
+        with self.assertRaises(ValueError):
+            AssetBundle(path)
+
+    def test_open_bundle(self):
+        bundle = open_bundle(self.output)
+        self.assertIsInstance(bundle, AssetBundle)
+        bundle.close()
+        self.assertIsNone(open_bundle(self.root / 'missing.bin'))
+
+
+class BundleFileTestCase(TestCase):
+    """Tests for BundleFile
+    """
+
+    def test_read_seek(self):
+        f = BundleFile(memoryview(b'0123456789'))
+        self.assertEqual(f.read(3), b'012')
+        self.assertEqual(f.tell(), 3)
+        f.seek(2, io.SEEK_CUR)
+        self.assertEqual(f.read(2), b'56')
+        f.seek(-2, io.SEEK_END)
+        self.assertEqual(f.read(), b'89')
+        self.assertEqual(f.read(1), b'')
+        f.seek(0)
+        self.assertEqual(f.read(), b'0123456789')
+
+    def test_image_load(self):
+        """Images must be decoded from the bundle in the same way as from the files.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory, 'assets.bin')
+            pack(ROOT, ['images/plate.png'], output)
+            bundle = AssetBundle(output)
+            image = pygame.image.load(bundle.open('images/plate.png'), 'plate.png')
+            expect = pygame.image.load(str(ROOT / 'images' / 'plate.png'))
+            self.assertEqual(image.get_size(), expect.get_size())
+            self.assertEqual(pygame.image.tobytes(image, 'RGBA'), pygame.image.tobytes(expect, 'RGBA'))
+            del image
+            bundle.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,18 +2,22 @@ import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-import itertools
 from collections import namedtuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase, main, mock
 
-import numpy as np
-from pygame.locals import QUIT, K_DOWN, K_RIGHT, K_LEFT, K_UP, KEYDOWN, MOUSEBUTTONDOWN
+from pygame.locals import Rect, QUIT, K_DOWN, K_RIGHT, K_LEFT, K_UP, K_SPACE, KEYDOWN, KEYUP, MOUSEBUTTONDOWN
 
-from pytetris import (ImageFiles, SoundFiles, PyTetris, BLOCKSETS, Status, Score,
+from pytetris import (ImageFiles, SoundFiles, PyTetris, BLOCKSETS, Status, Event, Action,
     Start, GameOver, GAMEOVER_LEFT, GAMEOVER_TOP, GAMEOVER_BOUND_TOP,
-    Pause, NextBlockDisplay)
+    Pause, NextBlockDisplay, GHOST_ALPHA, IMAGES, ImageCache, DirtyRects, DIRTY_AREAS, ScoreBoard,
+    SCORE_AREA_X, SCORE_AREA_Y, COLOR_GREEN, COLOR_WHITE, TEXTS, TextCache,
+    GroundBlocks, BLOCK_SIZE, COLS, ROWS, Block, BlockPool, SoundCache, SOUNDS, SoundService, SoundEffect,
+    StartupTimer, LatencyMonitor, ROOT, LAYOUT, Layout, Timeline, compile_message, REPEAT_DELAY,
+    TITLE_X, TITLE_Y, START_TEXT_X, PAUSE_TEXT_X, PAUSE_TEXT_Y)
 from pytetris import main as pytetris_main
+from tetris_engine import Snapshot
 
 
 DummyBlock = namedtuple('DummyBlock', 'row, col')
@@ -43,909 +47,672 @@ class PyTetrisAllBlocksClearTestCase(TestCase):
     @mock.patch('pytetris.PyTetris.create_screens')
     @mock.patch('pytetris.PyTetris.create_sounds')
     def test_all_blocks_clear(self, mock_create_sounds, mock_create_screen):
-        """The all of the blocks in matrix and blocks must be deleted.
+        """The all of the blocks and ghosts must be released, and the ground must be cleared.
         """
         mock_block = mock.MagicMock()
-        mock_kill = mock.MagicMock(return_value=None)
-        mock_block.kill = mock_kill
-        # matrix has 30 mock_blocks
-        matrix = [[None for _ in range(5)] for _ in range(10)]
-        for row in matrix:
-            for i in range(len(row)):
-                if i % 2 == 0:
-                    row[i] = mock_block
-        # blocks has 2 mock_blocks
-        blocks = [None for _ in range(4)]
-        for i in range(len(blocks)):
-            if i % 2 == 0:
-                blocks[i] = mock_block
-
-        mock_block = mock.MagicMock()
-        mock_block.kill.return_value = None
+        # blocks and ghosts have 2 mock_blocks each
+        blocks = [mock_block if i % 2 == 0 else None for i in range(4)]
+        ghosts = [mock_block if i % 2 == 0 else None for i in range(4)]
         tetris = PyTetris(object())
 
-        with mock.patch.object(tetris, 'matrix', matrix), \
-                mock.patch.object(tetris, 'blocks', blocks):
+        with mock.patch.object(tetris, 'blocks', blocks), \
+                mock.patch.object(tetris, 'ghosts', ghosts), \
+                mock.patch.object(tetris, 'ground', create=True) as mock_ground, \
+                mock.patch.object(tetris, 'pool', create=True) as mock_pool:
+            mock_pool.release.return_value = None
             tetris.all_blocks_clear()
 
-        for row in itertools.chain((r for r in matrix), [blocks]):
+        for row in [blocks, ghosts]:
             with self.subTest():
                 self.assertTrue(all(cell is None for cell in row))
 
-        self.assertEqual(mock_kill.call_count, 32)
+        self.assertEqual(mock_pool.release.call_count, 4)
+        mock_ground.clear.assert_called_once()
         mock_create_screen.assert_called_once()
         mock_create_sounds.assert_called_once()
 
 
-class PyTetrisGetBlocksetIndexTestCase(TestCase):
-    """Tests for PyTetris.get_blockset_index
-    """
-    def test_get_blockset_index(self):
-        """An index returned from get_blockset_index must be between 0 and 6.
-        """
-        with mock.patch('pytetris.PyTetris.create_screens'), \
-                mock.patch('pytetris.PyTetris.create_sounds'):
-            tetris = PyTetris(object())
-            for _ in range(10):
-                result = tetris.get_blockset_index()
-                with self.subTest(result):
-                    self.assertTrue(0 <= result <= len(BLOCKSETS) - 1)
-
-
-@mock.patch('pytetris.PyTetris.create_screens')
-@mock.patch('pytetris.PyTetris.create_sounds')
-@mock.patch('pytetris.PyTetris.get_blockset_index')
-@mock.patch('pytetris.Block')
-class PyTetrisCreateBlockTestCase(TestCase):
-    """Tests for PyTetris.create_block
+@mock.patch('pytetris.pygame.transform.scale')
+@mock.patch('pytetris.pygame.image.load')
+class ImageCacheTestCase(TestCase):
+    """Tests for ImageCache
     """
 
-    def test_create_block_next_block_is_none(self, mock_block, mock_get_blockset_index,
-                                             mock_create_sounds, mock_create_screens):
-        """get_blockset_index must be called two times if next_blockset is None, and
-           index must be set to 0.
+    def test_get(self, mock_load, mock_scale):
+        """Each image must be decoded once for any size and alpha.
         """
-        mock_get_blockset_index.side_effect = [1, 2]
-        mock_block.return_value = object()
-
-        mock_next_block_display = mock.MagicMock()
-        mock_set_image = mock.MagicMock()
-        mock_next_block_display.set_images = mock_set_image
-
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'next_blockset', None, create=True), \
-                mock.patch.object(tetris, 'index', 3, create=True), \
-                mock.patch.object(tetris, 'next_block_display', mock_next_block_display, create=True):
-            tetris.create_block()
-            self.assertEqual(tetris.index, 0)
-            mock_set_image.assert_called_once_with(2)
-        self.assertEqual(mock_get_blockset_index.call_count, 2)
-
-    def test_create_block_next_block_is_not_none(self, mock_block, mock_get_blockset_index,
-                                                 mock_create_sounds, mock_create_screens):
-        """get_blockset_index must be called once if next_blockset is not None, and
-           index must be set to 0.
+        cache = ImageCache()
+        image = cache.get('images/test.png')
+        self.assertIs(cache.get(Path('images', 'test.png')), image)
+        self.assertIs(image, mock_load.return_value.convert.return_value)
+
+        scaled = cache.get('images/test.png', (20, 5))
+        self.assertIs(cache.get('images/test.png', (20, 5)), scaled)
+        mock_scale.assert_called_once_with(image, (20, 5))
+
+        ghost = cache.get('images/test.png', alpha=80)
+        image.copy.assert_called_once()
+        ghost.set_alpha.assert_called_once_with(80)
+        mock_load.assert_called_once_with(str(ROOT / 'images/test.png'), 'test.png')
+
+        cache.get('images/test.png', alpha=True)
+        self.assertEqual(mock_load.call_count, 2)
+        mock_load.return_value.convert_alpha.assert_called_once()
+
+    def test_preload(self, mock_load, mock_scale):
+        """The preloaded images must be decoded by the executor and converted when they are got,
+           and the decoded images must not be kept after the conversion.
         """
-        mock_get_blockset_index.return_value = 1
-        mock_block.return_value = object()
-
-        mock_next_block_display = mock.MagicMock()
-        mock_set_image = mock.MagicMock()
-        mock_next_block_display.set_images = mock_set_image
-
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'next_blockset', BLOCKSETS[0], create=True), \
-                mock.patch.object(tetris, 'index', 3, create=True), \
-                mock.patch.object(tetris, 'next_block_display', mock_next_block_display, create=True):
-            tetris.create_block()
-            self.assertEqual(tetris.index, 0)
-            mock_set_image.assert_called_once_with(1)
-        self.assertEqual(mock_get_blockset_index.call_count, 1)
-
-
-class PyTetrisUpdateMovingBlockTestCase(TestCase):
-    """Tests for PyTetris.update_moving_block
+        cache = ImageCache()
+        with ThreadPoolExecutor(1) as executor:
+            cache.preload([Path('images', 'test.png')], executor)
+        mock_load.assert_called_once_with(str(ROOT / 'images/test.png'), 'test.png')
+        mock_load.return_value.convert.assert_not_called()
+
+        image = cache.get('images/test.png')
+        self.assertIs(image, mock_load.return_value.convert.return_value)
+        self.assertEqual(cache.decoding, {})
+        mock_load.assert_called_once()
+
+    def test_scale(self, mock_load, mock_scale):
+        """The images for the other scale must be scaled from the original images,
+           and discarded when the scale is changed again.
+        """
+        cache = ImageCache()
+        image = cache.get('images/test.png')
+        image.get_size.return_value = (20, 20)
+
+        with mock.patch.object(LAYOUT, 'scale', 1.5):
+            scaled = cache.get('images/test.png')
+            plate = cache.get('images/test.png', (20, 5))
+            ghost = cache.get('images/test.png', alpha=80)
+        self.assertIs(scaled, mock_scale.return_value)
+        self.assertEqual(
+            mock_scale.call_args_list, [mock.call(image, (30, 30)), mock.call(image, (30, 8))])
+        self.assertIs(ghost, scaled.copy.return_value)
+        mock_load.assert_called_once()
+
+        cache.discard(2)
+        self.assertEqual({key[3] for key in cache.surfaces}, {1})
+        self.assertIs(cache.get('images/test.png'), image)
+
+
+@mock.patch('pytetris.pygame.mixer.Sound')
+class SoundCacheTestCase(TestCase):
+    """Tests for SoundCache
     """
 
-    def setUp(self):
-        patchers = [
-            mock.patch('pytetris.PyTetris.create_screens'),
-            mock.patch('pytetris.PyTetris.create_sounds')]
-        for patcher in patchers:
-            patcher.start()
-
-        patcher_create_block = mock.patch('pytetris.PyTetris.create_block')
-        patcher_update_matrix = mock.patch('pytetris.PyTetris.update_matrix')
-        patcher_judge_ground = mock.patch('pytetris.PyTetris.judge_ground')
-        patcher_correct_top = mock.patch('pytetris.PyTetris.correct_top')
-        patcher_move_down = mock.patch('pytetris.PyTetris.move_down')
-        patcher_set_block_center = mock.patch('pytetris.PyTetris.set_block_center')
-        self.mock_create_block = patcher_create_block.start()
-        self.mock_update_matrix = patcher_update_matrix.start()
-        self.mock_judge_ground = patcher_judge_ground.start()
-        self.mock_correct_top = patcher_correct_top.start()
-        self.mock_move_down = patcher_move_down.start()
-        self.mock_set_block_center = patcher_set_block_center.start()
-
     def tearDown(self):
-        mock.patch.stopall()
+        SOUNDS.clear()
 
-    def test_update_moving_block_move_down(self):
-        """If status is Status.Play and drop_timer is 0,
-           move_down is called and drop_timer set to default.
+    def test_get(self, mock_sound):
+        """Each sound must be decoded once.
         """
-        blocks = [DummyBlock(3, 4) for _ in range(4)]
-        timer_value = 40
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
-                mock.patch.object(tetris, 'drop_timer', 1, create=True), \
-                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
-                mock.patch.object(tetris, 'judge_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'blocks', blocks):
-            tetris.update_moving_block()
-            self.assertEqual(tetris.drop_timer, timer_value)
-            self.assertEqual(tetris.judge_timer, timer_value - 1)
-
-        self.mock_move_down.assert_called_once()
-        self.mock_correct_top.assert_not_called()
-        self.mock_judge_ground.assert_not_called()
-        self.mock_update_matrix.assert_not_called()
-        self.mock_create_block.assert_not_called()
-        self.assertEqual(self.mock_set_block_center.call_count, 4)
-
-    def test_update_moving_block_correct_top(self):
-        """If one of the blocks has row less than 0, correct_top must be called.
+        cache = SoundCache()
+        sound = cache.get('sounds/test.wav')
+        self.assertIs(cache.get(Path('sounds', 'test.wav')), sound)
+        mock_sound.assert_called_once_with(str(ROOT / 'sounds/test.wav'))
+
+    @mock.patch('pytetris.Path.read_bytes', return_value=b'RIFF')
+    def test_preload(self, mock_read_bytes, mock_sound):
+        """The preloaded sounds must be decoded from the bytes read by the executor.
         """
-        blocks = [DummyBlock(row, 4) for row in (-2, -1, 0, 1)]
-        timer_value = 40
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
-                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'judge_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'blocks', blocks):
-            tetris.update_moving_block()
-            self.assertEqual(tetris.drop_timer, timer_value - 1)
-            self.assertEqual(tetris.judge_timer, timer_value - 1)
+        cache = SoundCache()
+        with ThreadPoolExecutor(1) as executor:
+            cache.preload(['sounds/test.wav'], executor)
+        mock_read_bytes.assert_called_once()
+        mock_sound.assert_not_called()
 
-        self.mock_move_down.assert_not_called()
-        self.mock_correct_top.assert_called_with(-2)
-        self.mock_judge_ground.assert_not_called()
-        self.mock_update_matrix.assert_not_called()
-        self.mock_create_block.assert_not_called()
-        self.assertEqual(self.mock_set_block_center.call_count, 4)
-
-    def test_update_moving_block_judge_timer(self):
-        """If judge_timer is 0, it must be set to timer_value.
-        """
-        blocks = [DummyBlock(row, 4) for row in range(4)]
-        self.mock_judge_ground.side_effect = [False] * 4
-        timer_value = 40
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
-                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
-                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
-                mock.patch.object(tetris, 'blocks', blocks):
-            tetris.update_moving_block()
-            self.assertEqual(tetris.drop_timer, timer_value - 1)
-            self.assertEqual(tetris.judge_timer, timer_value)
-
-        self.assertEqual(self.mock_judge_ground.call_count, 4)
-        self.assertEqual(self.mock_set_block_center.call_count, 4)
-        self.mock_update_matrix.assert_not_called()
-        self.mock_correct_top.assert_not_called()
-        self.mock_move_down.assert_not_called()
-        self.mock_create_block.assert_not_called()
+        cache.get('sounds/test.wav')
+        self.assertEqual(mock_sound.call_args.kwargs['file'].getvalue(), b'RIFF')
 
-    def test_update_moving_block_waiting(self):
-        """If judge_ground returns True at least one time, ground_timer must be set to 50.
+    def test_sound_effect(self, mock_sound):
+        """The sound effect must only be requested to the service.
         """
-        blocks = [DummyBlock(row, 4) for row in range(4)]
-        matrix = [[None, None, None],
-                  [DummyBlock(2, 0), DummyBlock(2, 1), DummyBlock(2, 2)],
-                  [None, None, None]]
-        self.mock_judge_ground.side_effect = [False, True, False, False]
-        timer_value = 40
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
-                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
-                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
-                mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'block_status', Status.DROPPING, create=True), \
-                mock.patch.object(tetris, 'matrix', matrix):
-            tetris.update_moving_block()
-            self.assertEqual(tetris.drop_timer, timer_value - 1)
-            self.assertEqual(tetris.judge_timer, timer_value)
-            self.assertEqual(tetris.ground_timer, 50)
-            self.assertEqual(tetris.block_status, Status.WAITING)
-            self.assertEqual(tetris.update, tetris.update_ground_blocks)
-
-        self.assertEqual(self.mock_judge_ground.call_count, 2)
-        self.assertEqual(self.mock_set_block_center.call_count, 4)
-        self.mock_update_matrix.assert_called_once()
-        self.mock_move_down.assert_not_called()
-        self.mock_correct_top.assert_not_called()
-        self.mock_create_block.assert_not_called()
-
-    def test_update_moving_block_gameover(self):
-        """If judge_ground returns True at least one time, ground_timer must be set to 50.
-        """
-        blocks = [DummyBlock(row, 4) for row in range(4)]
-        matrix = [[None, DummyBlock(2, 0), None],
-                  [None, None, None],
-                  [None, None, None]]
-        self.mock_judge_ground.side_effect = [False, True, False, False]
-        timer_value = 40
-        mock_play = mock.MagicMock()
-        mock_gameover_sound = mock.MagicMock()
-        mock_gameover_sound.play = mock_play
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
-                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
-                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
-                mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'block_status', Status.DROPPING, create=True), \
-                mock.patch.object(tetris, 'gameover_sound', mock_gameover_sound, create=True), \
-                mock.patch.object(tetris, 'matrix', matrix):
-            tetris.update_moving_block()
-            self.assertEqual(tetris.drop_timer, timer_value - 1)
-            self.assertEqual(tetris.judge_timer, timer_value)
-            self.assertEqual(tetris.block_status, Status.DROPPING)
-            self.assertEqual(tetris.status, Status.GAMEOVER)
-
-        self.assertEqual(self.mock_judge_ground.call_count, 2)
-        self.assertEqual(self.mock_set_block_center.call_count, 4)
-        self.mock_update_matrix.assert_called_once()
-        self.mock_move_down.assert_not_called()
-        self.mock_correct_top.assert_not_called()
-        mock_play.assert_called_once()
-        self.mock_create_block.assert_not_called()
-
-    def test_update_moving_block_create_block(self):
-        """If blocks are grounded, create_block must be called.
-        """
-        blocks = [DummyBlock(row, 4) for row in range(4)]
-        matrix = [[None, None, None],
-                  [None, DummyBlock(2, 0), None],
-                  [None, None, None]]
-        self.mock_judge_ground.side_effect = [False, True, False, False]
-        timer_value = 40
-        mock_play = mock.MagicMock()
-        mock_gameover_sound = mock.MagicMock()
-        mock_gameover_sound.play = mock_play
-        tetris = PyTetris(object())
+        service = mock.MagicMock()
+        SoundEffect(SoundFiles.ROTATE, service).play()
+        service.play.assert_called_once_with(SoundFiles.ROTATE)
+        mock_sound.assert_not_called()
 
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
-                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
-                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
-                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
-                mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'block_status', Status.DROPPING, create=True), \
-                mock.patch.object(tetris, 'matrix', matrix):
-            tetris.update_moving_block()
-            self.assertEqual(tetris.drop_timer, 1)
-            self.assertEqual(tetris.judge_timer, timer_value)
-            self.assertEqual(tetris.block_status, Status.DROPPING)
-            self.assertEqual(tetris.status, Status.PLAY)
-
-        self.assertEqual(self.mock_judge_ground.call_count, 2)
-        self.assertEqual(self.mock_set_block_center.call_count, 4)
-        self.mock_update_matrix.assert_called_once()
-        self.mock_create_block.assert_called_once()
-        self.mock_move_down.assert_not_called()
-        self.mock_correct_top.assert_not_called()
 
-
-class PyTetrisUpdateGroundBlocksTestCase(TestCase):
-    """Tests for PyTetris.update_moving_blocks
+@mock.patch('pytetris.SOUNDS')
+@mock.patch('pytetris.pygame.mixer')
+class SoundServiceTestCase(TestCase):
+    """Tests for SoundService
     """
 
-    def setUp(self):
-        patchers = [
-            mock.patch('pytetris.PyTetris.create_screens'),
-            mock.patch('pytetris.PyTetris.create_sounds')]
-        for patcher in patchers:
-            patcher.start()
-
-        patcher_clear_block = mock.patch('pytetris.PyTetris.create_block')
-        patcher_move_ground_blocks = mock.patch('pytetris.PyTetris.move_ground_blocks')
-        patcher_delete_blocks = mock.patch('pytetris.PyTetris.delete_blocks')
-        self.mock_create_block = patcher_clear_block.start()
-        self.mock_move_ground_blocks = patcher_move_ground_blocks.start()
-        self.mock_delete_blocks = patcher_delete_blocks.start()
-        self.mock_break_sound = mock.MagicMock()
-        self.mock_play = mock.MagicMock()
-        self.mock_break_sound.play = self.mock_play
-
-    def tearDown(self):
-        mock.patch.stopall()
-
-    def test_no_deleted_rows(self):
-        """If ground_timer is 40 and deleted_rows is 0, no methods are called.
+    def test_start(self, mock_mixer, mock_sounds):
+        """A channel must be reserved and a sound must be decoded for each sound effect.
         """
-        self.mock_delete_blocks.return_value = 0
-        mock_score = mock.MagicMock()
-        mock_add = mock.MagicMock()
-        mock_score.add = mock_add
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'ground_timer', 41, create=True), \
-                mock.patch.object(tetris, 'break_sound', self.mock_break_sound, create=True), \
-                mock.patch.object(tetris, 'score', mock_score, create=True), \
-                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True):
-            tetris.update_ground_blocks()
-            self.assertEqual(tetris.ground_timer, 40)
-            self.assertEqual(tetris.block_status, Status.WAITING)
-
-        self.mock_delete_blocks.assert_called_once()
-        self.mock_play.assert_not_called()
-        mock_add.assert_not_called()
-        self.mock_move_ground_blocks.assert_not_called()
-        self.mock_create_block.assert_not_called()
-
-    def test_deleted_rows_same_level(self):
-        """If deleted_rows is not 0 but level is not changed, play and add methods are called.
+        service = SoundService()
+        service.start()
+        self.assertTrue(service.enabled)
+        mock_mixer.set_reserved.assert_called_once_with(len(SoundFiles))
+        self.assertEqual(mock_mixer.Channel.call_args_list, [mock.call(i) for i in range(len(SoundFiles))])
+        self.assertEqual(
+            mock_sounds.get.call_args_list, [mock.call(file.path) for file in SoundFiles])
+
+    def test_no_mixer(self, mock_mixer, mock_sounds):
+        """If the mixer is not initialized, nothing must be done.
         """
-        self.mock_delete_blocks.return_value = 3
-        mock_score = mock.MagicMock(level=1)
-        mock_add = mock.MagicMock()
-        mock_score.add = mock_add
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'ground_timer', 41, create=True), \
-                mock.patch.object(tetris, 'break_sound', self.mock_break_sound, create=True), \
-                mock.patch.object(tetris, 'score', mock_score, create=True), \
-                mock.patch.object(tetris, 'level', 1, create=True), \
-                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True):
-            tetris.update_ground_blocks()
-            self.assertEqual(tetris.ground_timer, 40)
-            self.assertEqual(tetris.block_status, Status.WAITING)
-
-        self.mock_delete_blocks.assert_called_once()
-        self.mock_play.assert_called_once()
-        mock_add.assert_called_once_with(self.mock_delete_blocks.return_value)
-        self.mock_move_ground_blocks.assert_not_called()
-        self.mock_create_block.assert_not_called()
-
-    def test_deleted_rows_not_same_level(self):
-        """If deleted_rows is not 0 and level is changed, play and add methods are called.
+        mock_mixer.get_init.return_value = None
+        service = SoundService()
+        service.start()
+        service.play(SoundFiles.ROTATE)
+        service.flush()
+        self.assertFalse(service.enabled)
+        self.assertEqual(len(service.queue), 0)
+        mock_mixer.set_reserved.assert_not_called()
+        mock_sounds.get.assert_not_called()
+
+    def test_play_flush(self, mock_mixer, mock_sounds):
+        """The requests must be played on the channels only when they are flushed.
         """
-        self.mock_delete_blocks.return_value = 3
-        mock_score = mock.MagicMock(level=2)
-        mock_add = mock.MagicMock()
-        mock_score.add = mock_add
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'ground_timer', 41, create=True), \
-                mock.patch.object(tetris, 'timer_value', 20, create=True), \
-                mock.patch.object(tetris, 'break_sound', self.mock_break_sound, create=True), \
-                mock.patch.object(tetris, 'score', mock_score, create=True), \
-                mock.patch.object(tetris, 'level', 1, create=True), \
-                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True):
-            tetris.update_ground_blocks()
-            self.assertEqual(tetris.ground_timer, 40)
-            self.assertEqual(tetris.timer_value, 18)
-            self.assertEqual(tetris.level, 2)
-            self.assertEqual(tetris.block_status, Status.WAITING)
-
-        self.mock_delete_blocks.assert_called_once()
-        self.mock_play.assert_called_once()
-        mock_add.assert_called_once_with(self.mock_delete_blocks.return_value)
-        self.mock_move_ground_blocks.assert_not_called()
-        self.mock_create_block.assert_not_called()
-
-    def test_move_ground_blocks(self):
-        """If ground_timer is 20, move_ground_blocks must be called.
+        channels = {file: mock.MagicMock() for file in SoundFiles}
+        mock_mixer.Channel.side_effect = list(channels.values())
+        service = SoundService()
+        service.start()
+        service.play(SoundFiles.FANFARE)
+        service.play(SoundFiles.GAMEOVER)
+        channels[SoundFiles.FANFARE].play.assert_not_called()
+        service.flush()
+        channels[SoundFiles.FANFARE].play.assert_called_once_with(mock_sounds.get.return_value)
+        channels[SoundFiles.GAMEOVER].play.assert_called_once_with(mock_sounds.get.return_value)
+        channels[SoundFiles.ROTATE].play.assert_not_called()
+        self.assertEqual(len(service.queue), 0)
+
+    def test_play_interval(self, mock_mixer, mock_sounds):
+        """The requests repeated within the interval must be ignored.
         """
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'ground_timer', 21, create=True):
-            tetris.update_ground_blocks()
-
-        self.mock_delete_blocks.assert_not_called()
-        self.mock_move_ground_blocks.assert_called_once()
-        self.mock_create_block.assert_not_called()
-
-    def test_create_block(self):
-        """If ground_timer is 0, create_block must be called.
-        """
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'ground_timer', 1, create=True), \
-                mock.patch.object(tetris, 'drop_timer', 20, create=True), \
-                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True), \
-                mock.patch.object(tetris, 'update', tetris.update_ground_blocks, create=True):
-            tetris.update_ground_blocks()
-            self.assertEqual(tetris.ground_timer, 0)
-            self.assertEqual(tetris.drop_timer, 1)
-            self.assertEqual(tetris.block_status, Status.DROPPING)
-            self.assertEqual(tetris.update, tetris.update_moving_block)
-
-        self.mock_delete_blocks.assert_not_called()
-        self.mock_move_ground_blocks.assert_not_called()
-        self.mock_create_block.assert_called_once()
-
-
-@mock.patch('pytetris.PyTetris.create_screens')
-@mock.patch('pytetris.PyTetris.create_sounds')
-class PyTetrisDeleteBlocksTestCase(TestCase):
-    """Tests for PyTetris.delete_blocks
+        clock = mock.MagicMock(side_effect=[1.0, 1.05, 1.1, 1.1])
+        service = SoundService({SoundFiles.ROTATE: 0.1}, clock)
+        service.start()
+        service.play(SoundFiles.ROTATE)
+        service.play(SoundFiles.ROTATE)
+        service.play(SoundFiles.ROTATE)
+        service.play(SoundFiles.FANFARE)
+        self.assertEqual(list(service.queue), [SoundFiles.ROTATE, SoundFiles.ROTATE, SoundFiles.FANFARE])
+
+
+class StartupTimerTestCase(TestCase):
+    """Tests for StartupTimer
     """
 
-    def test_no_deleted_rows(self, mock_create_sounds, mock_create_screens):
-        tetris = PyTetris(object())
-        result = tetris.delete_blocks()
-
-        self.assertEqual(result, 0)
-
-    def test_deleted_rows(self, mock_create_sounds, mock_create_screens):
-        mock_block = mock.MagicMock()
-        mock_kill = mock.MagicMock()
-        mock_block.kill = mock_kill
-        matrix = [[None, None, None],
-                  [mock_block, mock_block, mock_block],
-                  [mock_block, mock_block, mock_block],
-                  [None, None, None],
-                  [None, None, None]]
-        tetris = PyTetris(object())
+    def test_report(self):
+        clock = mock.MagicMock(side_effect=[1.0, 1.25, 1.5])
+        timer = StartupTimer(clock)
+        timer.mark('init')
+        timer.mark('first frame')
+        self.assertEqual(timer.phases, [('init', 0.25), ('first frame', 0.25)])
+        self.assertEqual(
+            timer.report().splitlines(),
+            [f'{"init":<16}{250.0:>8.1f}ms', f'{"first frame":<16}{250.0:>8.1f}ms', f'{"total":<16}{500.0:>8.1f}ms'])
 
-        with mock.patch.object(tetris, 'matrix', matrix):
-            result = tetris.delete_blocks()
-            self.assertEqual(result, 2)
 
-        self.assertEqual(mock_kill.call_count, 6)
-
-
-@mock.patch('pytetris.PyTetris.set_block_center')
-@mock.patch('pytetris.PyTetris.create_screens')
-@mock.patch('pytetris.PyTetris.create_sounds')
-class PyTetrisMoveGroundBlocksTestCase(TestCase):
-    """Tests for PyTetris.move_ground_blocks
+class LatencyMonitorTestCase(TestCase):
+    """Tests for LatencyMonitor
     """
 
-    def test_move_ground_blocks_1(self, mock_create_sounds,
-                                  mock_create_screens, mock_set_block_center):
-        matrices = (
-            [[None, None, None, None, None],
-             [None, mock.MagicMock(row=1), None, None, None],
-             [mock.MagicMock(row=2), mock.MagicMock(row=2), None, None, None],
-             [None, None, None, None, mock.MagicMock(row=3)],
-             [None, None, None, None, None],
-             [None, None, None, None, None]],
-            [[None, None, None, None, None],
-             [None, mock.MagicMock(row=1), None, None, None],
-             [mock.MagicMock(row=2), mock.MagicMock(row=2), None, mock.MagicMock(row=2), None],
-             [None, None, None, None, None],
-             [None, None, None, None, None],
-             [None, mock.MagicMock(row=5), None, mock.MagicMock(row=5), None]]
-        )
-        expects = (
-            [[None, None, None, None, None],
-             [None, None, None, None, None],
-             [None, None, None, None, None],
-             [None, mock.MagicMock(row=3), None, None, None],
-             [mock.MagicMock(row=4), mock.MagicMock(row=4), None, None, None],
-             [None, None, None, None, mock.MagicMock(row=5)]],
-            [[None, None, None, None, None],
-             [None, None, None, None, None],
-             [None, None, None, None, None],
-             [None, mock.MagicMock(row=3), None, None, None],
-             [mock.MagicMock(row=4), mock.MagicMock(row=4), None, mock.MagicMock(row=4), None],
-             [None, mock.MagicMock(row=5), None, mock.MagicMock(row=5), None]]
-        )
-        calls_expects = [4, 6]
-        tetris = PyTetris(object())
-
-        for matrix, expect, calls in zip(matrices, expects, calls_expects):
-            with mock.patch.object(tetris, 'matrix', matrix):
-                tetris.move_ground_blocks()
+    def test_present(self):
+        """The latency must be measured only for the inputs applied before the present.
+        """
+        clock = mock.MagicMock(side_effect=[1.0, 1.5, 2.0, 3.0, 4.0])
+        monitor = LatencyMonitor(clock=clock)
+        monitor.input()
+        monitor.input()
+        monitor.apply()
+        monitor.input()
+        monitor.present()
+        self.assertEqual(list(monitor.samples), [2.0, 1.5])
+        monitor.present()
+        self.assertEqual(len(monitor.samples), 2)
+        monitor.apply()
+        monitor.present()
+        self.assertEqual(list(monitor.samples), [2.0, 1.5, 2.0])
+
+    def test_percentiles(self):
+        monitor = LatencyMonitor(size=100)
+        self.assertEqual(monitor.percentiles(), {})
+        self.assertEqual(monitor.report(), 'input latency: no samples')
+        monitor.samples.extend(i / 1000 for i in range(200, 0, -1))
+        self.assertEqual(monitor.percentiles(), {50: 0.05, 95: 0.095, 99: 0.099})
+        self.assertEqual(
+            monitor.report(), 'input latency  p50 50.0ms  p95 95.0ms  p99 99.0ms  (100 samples)')
+
+    @mock.patch('pytetris.TEXTS')
+    def test_draw(self, mock_texts):
+        """The report must be rendered again only when it changes.
+        """
+        mock_screen = mock.MagicMock()
+        mock_screen.blit.side_effect = [Rect(10, 10, 50, 10), Rect(10, 10, 50, 10), Rect(10, 10, 60, 10)]
+        monitor = LatencyMonitor()
+        self.assertEqual(monitor.draw(mock_screen), [Rect(0, 0, 0, 0), Rect(10, 10, 50, 10)])
+        monitor.draw(mock_screen)
+        monitor.samples.append(0.01)
+        self.assertEqual(monitor.draw(mock_screen), [Rect(10, 10, 50, 10), Rect(10, 10, 60, 10)])
+        self.assertEqual(mock_texts.font.return_value.render.call_count, 2)
+
+
+@mock.patch('pytetris.pygame.font.SysFont')
+class TextCacheTestCase(TestCase):
+    """Tests for TextCache
+    """
 
-            for matrix_row, expect_row in zip(matrix, expect):
-                for matrix_block, expect_block in zip(matrix_row, expect_row):
-                    with self.subTest((matrix_block, expect_block)):
-                        if expect_block is None:
-                            self.assertTrue(matrix_block is None)
-                        else:
-                            self.assertEqual(matrix_block.row, expect_block.row)
-            self.assertEqual(mock_set_block_center.call_count, calls)
-            mock_set_block_center.reset_mock()
+    def test_render(self, mock_sysfont):
+        """A font must be created once for each size, and each text must be rendered once.
+        """
+        cache = TextCache()
+        text = cache.render('NEXT', 30, COLOR_WHITE)
+        self.assertIs(cache.render('NEXT', 30, COLOR_WHITE), text)
+        cache.render('LINES', 30, COLOR_WHITE)
+        cache.render('NEXT', 50, COLOR_WHITE)
+        cache.render('NEXT', 30, COLOR_WHITE, False)
+        self.assertEqual(mock_sysfont.call_args_list, [mock.call(None, 30), mock.call(None, 50)])
+        self.assertEqual(mock_sysfont.return_value.render.call_count, 4)
+
+    def test_render_least_recently_used(self, mock_sysfont):
+        """Over maxsize, the least recently used surface must be discarded.
+        """
+        cache = TextCache(maxsize=2)
+        cache.render('A', 30, COLOR_WHITE)
+        cache.render('B', 30, COLOR_WHITE)
+        cache.render('A', 30, COLOR_WHITE)
+        cache.render('C', 30, COLOR_WHITE)
+        self.assertEqual(
+            list(cache.surfaces), [('A', 30, COLOR_WHITE, True), ('C', 30, COLOR_WHITE, True)])
 
 
-class PyTetrisCneckAndJudgeMethosTestCase(TestCase):
-    """Tests for judge and check methos of PyTetris
+class PyTetrisUpdateTestCase(TestCase):
+    """Tests for PyTetris.update and PyTetris.handle_events
     """
 
     def setUp(self):
-        self.matrix = [
-            [None, None, None, None, None],
-            [DummyBlock(1, 0), DummyBlock(1, 1), None, None, None],
-            [None, None, None, None, DummyBlock(2, 4)],
-            [None, None, None, None, None],
-            [None, None, None, None, None]
-        ]
         patchers = [
             mock.patch('pytetris.PyTetris.create_screens'),
             mock.patch('pytetris.PyTetris.create_sounds')]
         for patcher in patchers:
             patcher.start()
 
+        patcher_set_block_center = mock.patch('pytetris.PyTetris.set_block_center')
+        self.mock_set_block_center = patcher_set_block_center.start()
+
     def tearDown(self):
         mock.patch.stopall()
 
-    def test_check_matrix(self):
-        """Test for check_matrix
-        """
-        tests = [(0, 1), (1, 1), (1, 4), (2, 1), (2, 4)]
-        expects = [False, True, False, False, True]
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'matrix', self.matrix):
-            for test, expect in zip(tests, expects):
-                with self.subTest():
-                    result = tetris.check_matrix(*test)
-                    self.assertEqual(result, expect)
+    def create_snapshot(self, blocks, ghosts=(), piece=1, block_status=Status.DROPPING):
+        return Snapshot(
+            0, Status.PLAY, block_status, piece, 0, 1, tuple(blocks), tuple(ghosts), (0,) * ROWS, 1, 0, 0)
 
-    def test_judge_left(self):
-        """Test for judge_left
+    def test_update(self):
+        """The actions must be passed to the engine and cleared, and
+           the snapshots of the last two ticks must be kept.
         """
-        tests = [DummyBlock(1, 0), DummyBlock(1, 1), DummyBlock(1, 3)]
-        expects = [False, False, True]
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'matrix', self.matrix):
-            for test, expect in zip(tests, expects):
-                with self.subTest((test, expect)):
-                    result = tetris.judge_left(test)
-                    self.assertEqual(result, expect)
-
-    def test_judge_right(self):
-        """Test for judge_right
+        mock_engine = mock.MagicMock(status=Status.PLAY, block_status=Status.DROPPING)
+        mock_engine.step.return_value = []
+        snapshots = [mock.MagicMock() for _ in range(3)]
+        mock_engine.snapshot.side_effect = snapshots
+        tetris = PyTetris(object(), mock_engine)
+        tetris.move_left()
+        tetris.rotate()
+
+        tetris.update()
+        mock_engine.step.assert_called_once_with([Action.LEFT, Action.ROTATE], [])
+        self.assertEqual(tetris.actions, [])
+        self.assertEqual((tetris.previous, tetris.snapshot), (snapshots[0], snapshots[1]))
+        tetris.update()
+        self.assertEqual((tetris.previous, tetris.snapshot), (snapshots[1], snapshots[2]))
+        self.mock_set_block_center.assert_not_called()
+
+    def test_update_ticks(self):
+        """The engine must be advanced by the ticks, applying the actions in the first tick.
         """
-        tests = [DummyBlock(1, 9), DummyBlock(2, 3), DummyBlock(1, 3)]
-        expects = [False, False, True]
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'matrix', self.matrix):
-            for test, expect in zip(tests, expects):
-                with self.subTest((test, expect)):
-                    result = tetris.judge_right(test)
-                    self.assertEqual(result, expect)
-
-    def test_judge_down(self):
-        """Test for judge_down
+        mock_engine = mock.MagicMock(status=Status.PLAY, block_status=Status.WAITING)
+        mock_engine.step.side_effect = [[Event.GROUNDED], [], [Event.CREATED]]
+        tetris = PyTetris(object(), mock_engine)
+        mock_handler = mock.MagicMock()
+        handlers = {event: getattr(mock_handler, event.name) for event in Event}
+        tetris.rotate()
+
+        with mock.patch.object(tetris, 'handlers', handlers):
+            tetris.update(3)
+
+        self.assertEqual(
+            mock_engine.step.call_args_list, [mock.call([Action.ROTATE], []), mock.call([], []), mock.call([], [])])
+        self.assertEqual(mock_handler.mock_calls, [mock.call.GROUNDED(), mock.call.CREATED()])
+
+    def test_update_no_ticks(self):
+        """If no ticks are due, the actions must be kept for the next tick.
         """
-        tests = [DummyBlock(20, 0), DummyBlock(0, 1), DummyBlock(0, 4)]
-        expects = [False, False, True]
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'matrix', self.matrix):
-            for test, expect in zip(tests, expects):
-                with self.subTest((test, expect)):
-                    result = tetris.judge_down(test)
-                    self.assertEqual(result, expect)
-
-    def test_judge_ground(self):
-        """Test for judge_ground
+        mock_engine = mock.MagicMock(status=Status.PLAY, block_status=Status.WAITING)
+        tetris = PyTetris(object(), mock_engine)
+        tetris.rotate()
+        tetris.update(0)
+
+        mock_engine.step.assert_not_called()
+        self.assertEqual(tetris.actions, [Action.ROTATE])
+
+    def test_present(self):
+        """The blocks and ghosts must follow the latest snapshot.
         """
-        tests = [DummyBlock(19, 0), DummyBlock(0, 1), DummyBlock(0, 4)]
-        expects = [True, True, False]
-        tetris = PyTetris(object())
-        with mock.patch.object(tetris, 'matrix', self.matrix):
-            for test, expect in zip(tests, expects):
-                with self.subTest((test, expect)):
-                    result = tetris.judge_ground(test)
-                    self.assertEqual(result, expect)
-
-    @mock.patch('pytetris.min')
-    @mock.patch('pytetris.max')
-    def test_judge_rotate(self, mock_max, mock_min):
-        """Test for judge_rotate
+        tetris = PyTetris(object(), mock.MagicMock())
+        blocks = [mock.MagicMock(row=0, col=0) for _ in range(4)]
+        ghosts = [mock.MagicMock(row=0, col=0) for _ in range(4)]
+        tetris.previous = self.create_snapshot([(row, 4) for row in range(4)])
+        tetris.snapshot = self.create_snapshot(
+            [(row, 5) for row in range(4)], [(row, 5) for row in range(16, 20)])
+
+        with mock.patch.object(tetris, 'blocks', blocks), mock.patch.object(tetris, 'ghosts', ghosts):
+            tetris.present(0.5)
+
+        self.assertEqual([(block.row, block.col) for block in blocks], [(row, 5) for row in range(4)])
+        self.assertEqual([(ghost.row, ghost.col) for ghost in ghosts], [(row, 5) for row in range(16, 20)])
+        self.assertEqual(self.mock_set_block_center.call_count, 8)
+
+    def test_present_interpolate(self):
+        """The blocks which fell by a row in the last tick must be drawn between the rows,
+           but not the ones of the new blockset.
         """
-        mock_max.side_effect = [1, 1, 0, 0, 0, 0]
-        mock_min.side_effect = [-1, -1, 0, 0]
-        tests = [
-            np.array([[3, 3], [3, 4], [2, 4], [2, 5]]),
-            np.array([[4, 3], [4, 4], [3, 4], [3, 5]]),
-            np.array([[3, -1], [3, 0], [4, 0], [4, 1]]),
-            np.array([[1, -1], [1, 0], [2, 0], [2, 1]]),
-            np.array([[3, 1], [3, 2], [4, 2], [4, 3]]),
-            np.array([[2, 3], [2, 4], [3, 2], [3, 3]])]
-        expects = [(False, 0), (True, 1), (True, -1), (False, 0), (True, 0), (False, 0)]
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'matrix', self.matrix):
-            for test, expect in zip(tests, expects):
-                with self.subTest((test, expect)):
-                    result = tetris.judge_rotate(test)
-                    self.assertEqual(result, expect)
+        tetris = PyTetris(object(), mock.MagicMock())
+        blocks = [mock.MagicMock(row=0, col=0) for _ in range(4)]
+        tetris.previous = self.create_snapshot([(row, 4) for row in range(4)])
+        tetris.snapshot = self.create_snapshot([(row, 4) for row in range(1, 5)])
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.present(0.25)
+            self.assertEqual([block.row for block in blocks], [0.25, 1.25, 2.25, 3.25])
+            tetris.present()
+            self.assertEqual([block.row for block in blocks], [1, 2, 3, 4])
+            tetris.snapshot = tetris.snapshot._replace(piece=2)
+            tetris.present(0.25)
+            self.assertEqual([block.row for block in blocks], [1, 2, 3, 4])
+
+    def test_present_waiting(self):
+        """While grounded blocks are waiting to be deleted, the blocks must not be moved.
+        """
+        tetris = PyTetris(object(), mock.MagicMock())
+        blocks = [mock.MagicMock(row=0, col=0) for _ in range(4)]
+        tetris.snapshot = self.create_snapshot([(row, 4) for row in range(4)], block_status=Status.WAITING)
 
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.present()
 
-class PyTetrisCorrectTopTestCase(TestCase):
-    """Tests for correct_top
-    """
+        self.assertTrue(all((block.row, block.col) == (0, 0) for block in blocks))
+        self.mock_set_block_center.assert_not_called()
 
-    @mock.patch('pytetris.PyTetris.create_screens')
-    @mock.patch('pytetris.PyTetris.create_sounds')
-    def test_correct_top(self, mock_create_sounds, mock_create_screens):
-        mock_block = mock.MagicMock()
-        mock_kill = mock.MagicMock()
-        mock_block.kill = mock_kill
-        expects = [(-2, 3), (-1, 3), (0, 3), (1, 3)]
-        blocks = []
-        for row, col in expects:
-            blocks.append(mock.MagicMock(row=row, col=col))
-        matrix = [
-            [None, None, None, None, None],
-            [None, None, None, None, None],
-            [None, None, None, mock_block, None],
-            [None, None, None, mock_block, None],
-            [None, None, None, mock_block, None],
-            [None, None, None, mock_block, None]]
+    def test_hold_release(self):
+        """The held keys must be passed to the engine in the order they were pressed.
+        """
+        mock_engine = mock.MagicMock(status=Status.PLAY, block_status=Status.DROPPING)
+        mock_engine.step.return_value = []
+        tetris = PyTetris(object(), mock_engine)
+        tetris.hold(Action.RIGHT)
+        tetris.hold(Action.LEFT)
+        tetris.hold(Action.RIGHT)
+        self.assertEqual(tetris.held, [Action.RIGHT, Action.LEFT])
+        tetris.release(Action.RIGHT)
+        tetris.release(Action.DOWN)
+        tetris.update()
+        mock_engine.step.assert_called_once_with([], [Action.LEFT])
+        tetris.release()
+        self.assertEqual(tetris.held, [])
+
+    def test_latency(self):
+        """The inputs must be marked when received and applied in the tick which runs them.
+        """
+        mock_engine = mock.MagicMock(status=Status.PLAY, block_status=Status.DROPPING)
+        mock_engine.step.return_value = []
+        tetris = PyTetris(object(), mock_engine)
+        tetris.latency = mock.MagicMock()
+        for operation in [tetris.move_right, tetris.move_left, tetris.move_down, tetris.rotate]:
+            operation()
+        self.assertEqual(tetris.latency.input.call_count, 4)
+        tetris.update(0)
+        tetris.latency.apply.assert_not_called()
+        tetris.update(2)
+        tetris.latency.apply.assert_called_once()
+
+    def test_player(self):
+        """The actions of the player must be passed to the engine in every tick.
+        """
+        mock_engine = mock.MagicMock(status=Status.PLAY, block_status=Status.DROPPING)
+        mock_engine.step.return_value = []
+        tetris = PyTetris(object(), mock_engine)
+        tetris.player = mock.MagicMock()
+        tetris.player.act.side_effect = [[Action.ROTATE, Action.LEFT], []]
+        tetris.update(2)
+        self.assertEqual(
+            mock_engine.step.call_args_list, [mock.call([Action.ROTATE, Action.LEFT], []), mock.call([], [])])
+
+    def test_handle_events(self):
+        """The handler of each event must be called in order.
+        """
         tetris = PyTetris(object())
+        mock_handler = mock.MagicMock()
+        handlers = {event: getattr(mock_handler, event.name) for event in Event}
 
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'matrix', matrix):
-            tetris.correct_top(-2)
-        self.assertEqual(mock_kill.call_count, 2)
+        with mock.patch.object(tetris, 'handlers', handlers):
+            tetris.handle_events([Event.GROUNDED, Event.CREATED])
 
-        for block, (row, col) in zip(blocks, expects):
-            with self.subTest():
-                self.assertEqual((block.row - 2, block.col), (row, col))
+        self.assertEqual(
+            mock_handler.mock_calls, [mock.call.GROUNDED(), mock.call.CREATED()])
 
 
-class PyTetrisUpdateMatrixTestCase(TestCase):
-    """Tests for update_matrix
+@mock.patch('pytetris.PyTetris.create_screens')
+@mock.patch('pytetris.PyTetris.create_sounds')
+class PyTetrisCreateBlockTestCase(TestCase):
+    """Tests for PyTetris.create_block
     """
 
-    @mock.patch('pytetris.PyTetris.create_screens')
-    @mock.patch('pytetris.PyTetris.create_sounds')
-    def test_update_matrix(self, mock_create_sounds, mock_create_screens):
-        blocks = [
-            DummyBlock(2, 4),
-            DummyBlock(3, 4),
-            DummyBlock(4, 4),
-            DummyBlock(5, 4)]
-        matrix = [[None for _ in range(5)] for _ in range(10)]
-        expects = set((block.row, block.col) for block in blocks)
-        tetris = PyTetris(object())
+    def test_create_block(self, mock_create_sounds, mock_create_screens):
+        """Sprites must be taken from the pool at the positions of the blocks of the engine.
+        """
+        mock_engine = mock.MagicMock(blockset_index=2, next_blockset=5)
+        mock_engine.blocks = [DummyBlock(-1, 4), DummyBlock(-1, 5), DummyBlock(0, 3), DummyBlock(0, 4)]
+        mock_engine.ghost_blocks.return_value = [(18, 4), (18, 5), (19, 3), (19, 4)]
+        mock_next_block_display = mock.MagicMock()
+        mock_pool = mock.MagicMock()
+        tetris = PyTetris(object(), mock_engine)
 
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'matrix', matrix):
-            tetris.update_matrix()
+        with mock.patch.object(tetris, 'next_block_display', mock_next_block_display, create=True), \
+                mock.patch.object(tetris, 'pool', mock_pool, create=True):
+            tetris.create_block()
 
-        for i, row in enumerate(matrix):
-            for j, cell in enumerate(row):
-                with self.subTest():
-                    if (i, j) in expects:
-                        self.assertTrue(matrix[i][j])
-                    else:
-                        self.assertTrue(matrix[i][j] is None)
+        mock_next_block_display.set_images.assert_called_once_with(5)
+        self.assertEqual(
+            mock_pool.acquire.call_args_list,
+            [mock.call(BLOCKSETS[2].file.path, row, col, GHOST_ALPHA)
+             for row, col in mock_engine.ghost_blocks.return_value]
+            + [mock.call(BLOCKSETS[2].file.path, block.row, block.col) for block in mock_engine.blocks])
+        self.assertEqual(tetris.blocks, [mock_pool.acquire.return_value] * 4)
 
 
-class PyTetrisMoveMethodsTestCase(TestCase):
-    """Tests for move methods in PyTetris
+@mock.patch('pytetris.IMAGES')
+@mock.patch('pytetris.pygame.sprite.Sprite.add')
+@mock.patch('pytetris.pygame.sprite.Sprite.kill')
+class BlockPoolTestCase(TestCase):
+    """Tests for BlockPool
     """
 
     def setUp(self):
-        patchers = [
-            mock.patch('pytetris.PyTetris.create_screens'),
-            mock.patch('pytetris.PyTetris.create_sounds')]
-        for patcher in patchers:
-            patcher.start()
-
-        patcher_all = mock.patch('pytetris.all')
-        patcher_update_blockset_col = mock.patch('pytetris.update_blockset_col')
-        patcher_update_blockset_row = mock.patch('pytetris.update_blockset_row')
-        self.mock_all = patcher_all.start()
-        self.mock_update_blockset_col = patcher_update_blockset_col.start()
-        self.mock_update_blockset_row = patcher_update_blockset_row.start()
-        self.blockset = [[None, None, None], [None, None, None]]
+        Block.containers = ()
 
-    def tearDown(self):
-        mock.patch.stopall()
-
-    def get_brockset(self):
-        blocks = [
-            mock.MagicMock(row=2, col=4),
-            mock.MagicMock(row=2, col=5),
-            mock.MagicMock(row=3, col=4),
-            mock.MagicMock(row=3, col=5)]
-        return blocks
-
-    def test_move_right_all_return_true(self):
-        """If all returns True, columns of blocks must be incremented by +1.
+    def test_acquire_release(self, mock_kill, mock_add, mock_images):
+        """The sprites must be reused with the new image and position.
         """
-        self.mock_all.return_value = True
-        tetris = PyTetris(object())
-        expect = [(2, 5), (2, 6), (3, 5), (3, 6)]
-        blocks = self.get_brockset()
-
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True):
-            tetris.move_right()
-            self.mock_update_blockset_col.assert_called_once_with(tetris.blockset, 1)
-
-        for i in range(len(blocks)):
-            with self.subTest():
-                block = blocks[i]
-                self.assertEqual((block.row, block.col), expect[i])
-
-    def test_move_right_all_return_false(self):
-        """If all returns True, columns of blocks must not be changed.
-        """
-        self.mock_all.return_value = False
-        tetris = PyTetris(object())
-        expect = [(2, 4), (2, 5), (3, 4), (3, 5)]
-        blocks = self.get_brockset()
-
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True):
-            tetris.move_right()
-            self.mock_update_blockset_col.assert_not_called()
-
-        for i in range(len(blocks)):
-            with self.subTest():
-                block = blocks[i]
-                self.assertEqual((block.row, block.col), expect[i])
-
-    def test_move_left_all_return_true(self):
-        """If all returns True, columns of blocks must be incremented by -1.
+        pool = BlockPool(2)
+        self.assertEqual(mock_kill.call_count, 2)
+        free = pool.free[:]
+        mock_add.reset_mock()
+
+        block = pool.acquire('test.png', 3, 4, GHOST_ALPHA)
+        self.assertIn(block, free)
+        self.assertEqual((block.row, block.col), (3, 4))
+        mock_images.get.assert_called_with('test.png', alpha=GHOST_ALPHA)
+        self.assertIs(block.image, mock_images.get.return_value)
+        mock_add.assert_called_once_with(())
+
+        self.assertIsNone(pool.release(block))
+        self.assertEqual(mock_kill.call_count, 3)
+        self.assertEqual(len(pool.free), 2)
+
+    def test_acquire_empty(self, mock_kill, mock_add, mock_images):
+        """If no sprite is free, a new sprite must be created.
         """
-        self.mock_all.return_value = True
-        tetris = PyTetris(object())
-        expect = [(2, 3), (2, 4), (3, 3), (3, 4)]
-        blocks = self.get_brockset()
+        pool = BlockPool(0)
+        with mock.patch('pytetris.Block') as mock_block:
+            block = pool.acquire('test.png', 3, 4)
+        mock_block.assert_called_once_with('test.png', 3, 4, False)
+        self.assertIs(block, mock_block.return_value)
 
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True):
-            tetris.move_left()
-            self.mock_update_blockset_col.assert_called_once_with(tetris.blockset, -1)
 
-        for i in range(len(blocks)):
-            with self.subTest():
-                block = blocks[i]
-                self.assertEqual((block.row, block.col), expect[i])
+@mock.patch('pytetris.PyTetris.create_screens')
+@mock.patch('pytetris.PyTetris.create_sounds')
+class PyTetrisGroundBlocksTestCase(TestCase):
+    """Tests for update_matrix, delete_blocks and move_ground_blocks of PyTetris
+    """
 
-    def test_move_left_all_return_false(self):
-        """If all returns True, columns of blocks must not be changed.
+    def test_update_matrix(self, mock_create_sounds, mock_create_screens):
+        """Grounded blocks must be drawn on the ground and their sprites must be released.
         """
-        self.mock_all.return_value = False
-        tetris = PyTetris(object())
-        expect = [(2, 4), (2, 5), (3, 4), (3, 5)]
-        blocks = self.get_brockset()
+        mock_engine = mock.MagicMock(grounded_blocks=[(2, 4), (3, 4), (4, 4), (5, 4)])
+        blocks = [mock.MagicMock() for _ in range(4)]
+        ghosts = [mock.MagicMock() for _ in range(4)]
+        images = [block.filename for block in blocks]
+        tetris = PyTetris(object(), mock_engine)
+        tetris.ground = mock.MagicMock()
+        tetris.pool = mock.MagicMock(**{'release.return_value': None})
+        tetris.ghosts = ghosts[:]
+
+        with mock.patch.object(tetris, 'blocks', blocks[:]):
+            tetris.update_matrix()
+            self.assertEqual(tetris.blocks, [None] * 4)
 
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True):
-            tetris.move_left()
-            self.mock_update_blockset_col.assert_not_called()
+        self.assertEqual(tetris.ghosts, [None] * 4)
+        self.assertEqual(
+            tetris.pool.release.call_args_list, [mock.call(block) for block in ghosts + blocks])
+        self.assertEqual(
+            tetris.ground.put.call_args_list,
+            [mock.call(row, col, image) for (row, col), image in zip(mock_engine.grounded_blocks, images)])
 
-        for i in range(len(blocks)):
-            with self.subTest():
-                block = blocks[i]
-                self.assertEqual((block.row, block.col), expect[i])
-
-    def test_move_down_all_return_true(self):
-        """If all returns True, rows of blocks must be incremented by +1.
+    def test_delete_blocks(self, mock_create_sounds, mock_create_screens):
+        """The deleted rows must be deleted from the ground.
         """
-        self.mock_all.return_value = True
-        tetris = PyTetris(object())
-        expect = [(3, 4), (3, 5), (4, 4), (4, 5)]
-        blocks = self.get_brockset()
-
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True):
-            tetris.move_down()
-            self.mock_update_blockset_row.assert_called_once_with(tetris.blockset, 1)
-
-        for i in range(len(blocks)):
-            with self.subTest():
-                block = blocks[i]
-                self.assertEqual((block.row, block.col), expect[i])
+        mock_break_sound = mock.MagicMock()
+        mock_engine = mock.MagicMock(deleted_rows=[1, 2])
+        tetris = PyTetris(object(), mock_engine)
+        tetris.ground = mock.MagicMock()
 
-    def test_move_down_all_return_false(self):
-        """If all returns True, rows of blocks must not be changed.
-        """
-        self.mock_all.return_value = False
-        tetris = PyTetris(object())
-        expect = [(2, 4), (2, 5), (3, 4), (3, 5)]
-        blocks = self.get_brockset()
+        with mock.patch.object(tetris, 'break_sound', mock_break_sound, create=True):
+            tetris.delete_blocks()
 
-        with mock.patch.object(tetris, 'blocks', blocks), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True):
-            tetris.move_down()
-            self.mock_update_blockset_row.assert_not_called()
+        mock_break_sound.play.assert_called_once()
+        tetris.ground.delete_rows.assert_called_once_with([1, 2])
 
-        for i in range(len(blocks)):
-            with self.subTest():
-                block = blocks[i]
-                self.assertEqual((block.row, block.col), expect[i])
+    def test_move_ground_blocks(self, mock_create_sounds, mock_create_screens):
+        mock_engine = mock.MagicMock(deleted_rows=[17, 19])
+        tetris = PyTetris(object(), mock_engine)
+        tetris.ground = mock.MagicMock()
+        tetris.move_ground_blocks()
+        tetris.ground.collapse.assert_called_once_with([17, 19])
 
 
-class PyTetrisRotateTestCase(TestCase):
-    """Tests for rotate mothod
+@mock.patch('pytetris.IMAGES')
+@mock.patch('pytetris.pygame.Surface')
+class GroundBlocksTestCase(TestCase):
+    """Tests for GroundBlocks
     """
 
-    def setUp(self):
-        patchers = [
-            mock.patch('pytetris.PyTetris.create_screens'),
-            mock.patch('pytetris.PyTetris.create_sounds')]
-        for patcher in patchers:
-            patcher.start()
-
-        patcher_create_screens = mock.patch('pytetris.PyTetris.judge_rotate')
-        self.mock_judge_rotate = patcher_create_screens.start()
-        self.mock_rotate_sound = mock.MagicMock()
-        self.mock_play = mock.MagicMock()
-        self.mock_rotate_sound.play = self.mock_play
-        self.blockset = np.array(
-            [[[-1, 4], [0, 3], [0, 4], [0, 5]],
-             [[-1, 4], [0, 4], [1, 4], [0, 3]],
-             [[-1, 3], [-1, 4], [-1, 5], [0, 4]],
-             [[-1, 4], [0, 4], [1, 4], [0, 5]]])
-        self.blocks = [
-            mock.MagicMock(row=-1, col=3),
-            mock.MagicMock(row=-1, col=4),
-            mock.MagicMock(row=-1, col=5),
-            mock.MagicMock(row=0, col=4)]
+    def create_ground(self, mock_surface):
+        mock_surface.return_value.convert.return_value.get_rect.return_value = \
+            Rect(0, 0, COLS * BLOCK_SIZE, ROWS * BLOCK_SIZE)
+        mock_screen = mock.MagicMock()
+        ground = GroundBlocks(mock_screen)
+        ground.draw()
+        ground.image.reset_mock()
+        return ground
 
-    def tearDown(self):
-        mock.patch.stopall()
+    def drawn_rows(self, ground):
+        return [(rect.top - ground.rect.top) // BLOCK_SIZE for rect in ground.draw()]
 
-    def test_rotatable_is_true(self):
-        """If judge_rotate returns True, block must be rotated.
+    def test_put(self, mock_surface, mock_images):
+        """The block must be drawn only in its cell.
         """
-        self.mock_judge_rotate.return_value = (True, 2)
-        expects = [(-1, 2), (0, 2), (1, 2), (0, 3)]
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'index', 2, create=True), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True), \
-                mock.patch.object(tetris, 'rotate_sound', self.mock_rotate_sound, create=True), \
-                mock.patch.object(tetris, 'blocks', self.blocks, create=True):
-            tetris.rotate()
-            self.mock_play.assert_called_once()
-            self.assertEqual(tetris.index, 3)
-
-        for block, expect in zip(self.blocks, expects):
-            with self.subTest():
-                self.assertEqual((block.row, block.col), expect)
-
-    def test_rotatable_is_false(self):
-        """If judge_rotate returns True, block is not rotated.
+        ground = self.create_ground(mock_surface)
+        ground.put(3, 4, 'image')
+        self.assertEqual(ground.matrix[3][4], 'image')
+        mock_images.get.assert_called_once_with('image')
+        ground.image.blit.assert_called_once_with(
+            mock_images.get.return_value, Rect(4 * BLOCK_SIZE, 3 * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
+        self.assertEqual(
+            ground.draw(),
+            [Rect(ground.rect.left + 4 * BLOCK_SIZE, ground.rect.top + 3 * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)])
+        ground.screen.blit.assert_called_with(ground.image, ground.rect)
+        self.assertEqual(ground.draw(), [])
+
+    def test_delete_rows(self, mock_surface, mock_images):
+        ground = self.create_ground(mock_surface)
+        ground.put(ROWS - 1, 0, 'image')
+        ground.put(ROWS - 2, 0, 'image')
+        ground.draw()
+        ground.delete_rows([ROWS - 1])
+        self.assertEqual(ground.matrix[ROWS - 1], [None] * COLS)
+        self.assertEqual(ground.matrix[ROWS - 2][0], 'image')
+        self.assertEqual(self.drawn_rows(ground), [ROWS - 1])
+
+    def test_collapse(self, mock_surface, mock_images):
+        """The rows above the deleted rows must be moved down, and only
+           the changed rows must be drawn again.
         """
-        self.mock_judge_rotate.return_value = (False, 0)
-        expects = [(-1, 3), (-1, 4), (-1, 5), (0, 4)]
-        tetris = PyTetris(object())
-
-        with mock.patch.object(tetris, 'index', 1, create=True), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True), \
-                mock.patch.object(tetris, 'rotate_sound', self.mock_rotate_sound, create=True):
-            tetris.rotate()
-            self.mock_play.assert_not_called()
-            self.assertEqual(tetris.index, 1)
-
-        for block, expect in zip(self.blocks, expects):
-            with self.subTest():
-                self.assertEqual((block.row, block.col), expect)
-
-    def test_rotatable_index_set_to_0(self):
-        """If judge_rotate returns True, block must be rotated.
+        ground = self.create_ground(mock_surface)
+        for row, col in [(ROWS - 6, 1), (ROWS - 5, 0), (ROWS - 5, 1), (ROWS - 3, 9)]:
+            ground.put(row, col, f'{row},{col}')
+        ground.delete_rows([ROWS - 2, ROWS - 1])
+        ground.draw()
+        ground.collapse([ROWS - 2, ROWS - 1])
+
+        expect = [[None] * COLS for _ in range(ROWS)]
+        expect[ROWS - 4][1] = f'{ROWS - 6},1'
+        expect[ROWS - 3][:2] = [f'{ROWS - 5},0', f'{ROWS - 5},1']
+        expect[ROWS - 1][9] = f'{ROWS - 3},9'
+        self.assertEqual(ground.matrix, expect)
+        self.assertEqual(
+            sorted(self.drawn_rows(ground)), [ROWS - 6, ROWS - 5, ROWS - 4, ROWS - 3, ROWS - 1])
+
+        # The rows must not share the list after they are moved.
+        self.assertEqual(len({id(row) for row in ground.matrix}), ROWS)
+
+    def test_collapse_under_empty_rows(self, mock_surface, mock_images):
+        """The empty rows moved onto empty rows must not share the list.
         """
-        self.mock_judge_rotate.return_value = (True, 0)
-        expects = [(-1, 4), (0, 3), (0, 4), (0, 5)]
-        tetris = PyTetris(object())
+        ground = self.create_ground(mock_surface)
+        for row, col in [(ROWS - 3, 1), (ROWS - 2, 0), (ROWS - 1, 0)]:
+            ground.put(row, col, f'{row},{col}')
+        ground.delete_rows([ROWS - 1])
+        ground.collapse([ROWS - 1])
+        ground.put(ROWS - 2, 5, 'image')
+        self.assertEqual(sum(row.count('image') for row in ground.matrix), 1)
+        self.assertEqual(len({id(row) for row in ground.matrix}), ROWS)
+
+    def test_collapse_nothing(self, mock_surface, mock_images):
+        ground = self.create_ground(mock_surface)
+        ground.collapse([])
+        self.assertEqual(ground.draw(), [])
+
+    def test_layout(self, mock_surface, mock_images):
+        """The surface must be created for the new scale, and the blocks must be drawn on it again.
+        """
+        ground = self.create_ground(mock_surface)
+        ground.put(ROWS - 1, 2, 'image')
+        mock_images.get.reset_mock()
+        mock_surface.reset_mock()
 
-        with mock.patch.object(tetris, 'index', 3, create=True), \
-                mock.patch.object(tetris, 'blockset', self.blockset, create=True), \
-                mock.patch.object(tetris, 'rotate_sound', self.mock_rotate_sound, create=True), \
-                mock.patch.object(tetris, 'blocks', self.blocks, create=True):
-            tetris.rotate()
-            self.mock_play.assert_called_once()
-            self.assertEqual(tetris.index, 0)
-
-        for block, expect in zip(self.blocks, expects):
-            with self.subTest():
-                self.assertEqual((block.row, block.col), expect)
+        with mock.patch.object(LAYOUT, 'scale', 1.5):
+            ground.layout()
+        mock_surface.assert_called_once_with((COLS * 30, ROWS * 30))
+        mock_images.get.assert_called_once_with('image')
+        ground.image.blit.assert_called_once_with(
+            mock_images.get.return_value, (2 * 30, (ROWS - 1) * 30))
+        self.assertEqual(ground.draw(), [ground.rect])
 
 
 class PyTetrisClickTestCase(TestCase):
@@ -972,7 +739,7 @@ class PyTetrisClickTestCase(TestCase):
         mock_collidepoint.return_value = True
         tetris = PyTetris(object())
 
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
+        with mock.patch.object(tetris.engine, 'status', Status.PLAY), \
                 mock.patch.object(tetris, 'stop_button', mock_stop_button, create=True):
             tetris.click(3, 3)
             self.assertEqual(tetris.status, Status.START)
@@ -990,13 +757,11 @@ class PyTetrisClickTestCase(TestCase):
         mock_pause_collidepoint.return_value = True
         tetris = PyTetris(object())
 
-        with mock.patch.object(tetris, 'status', Status.PLAY), \
+        with mock.patch.object(tetris.engine, 'status', Status.PLAY), \
                 mock.patch.object(tetris, 'stop_button', mock_stop_button, create=True), \
-                mock.patch.object(tetris, 'pause_button', mock_pause_button, create=True), \
-                mock.patch.object(tetris, 'update', tetris.update_moving_block, create=True):
+                mock.patch.object(tetris, 'pause_button', mock_pause_button, create=True):
             tetris.click(3, 3)
             self.assertEqual(tetris.status, Status.PAUSE)
-        self.assertEqual(tetris.update_before_pause, tetris.update_moving_block)
 
     def test_click_restart_button(self):
         mock_collidepoint = mock.MagicMock()
@@ -1005,12 +770,10 @@ class PyTetrisClickTestCase(TestCase):
         mock_collidepoint.return_value = True
         tetris = PyTetris(object())
 
-        with mock.patch.object(tetris, 'status', Status.PAUSE), \
-                mock.patch.object(tetris, 'restart_button', mock_restart_button, create=True), \
-                mock.patch.object(tetris, 'update_before_pause', tetris.update_ground_blocks, create=True):
+        with mock.patch.object(tetris.engine, 'status', Status.PAUSE), \
+                mock.patch.object(tetris, 'restart_button', mock_restart_button, create=True):
             tetris.click(3, 3)
             self.assertEqual(tetris.status, Status.PLAY)
-        self.assertEqual(tetris.update, tetris.update_ground_blocks)
 
     def test_click_start_button(self):
         mock_collidepoint = mock.MagicMock()
@@ -1019,9 +782,8 @@ class PyTetrisClickTestCase(TestCase):
         mock_collidepoint.return_value = True
         tetris = PyTetris(object())
 
-        with mock.patch.object(tetris, 'status', Status.START), \
-                mock.patch.object(tetris, 'start_button', mock_start_button, create=True), \
-                mock.patch.object(tetris, 'update_before_pause', tetris.update_ground_blocks, create=True):
+        with mock.patch.object(tetris.engine, 'status', Status.START), \
+                mock.patch.object(tetris, 'start_button', mock_start_button, create=True):
             tetris.click(3, 3)
             self.assertEqual(tetris.status, Status.START)
         self.mock_initialize.assert_called_once()
@@ -1036,7 +798,7 @@ class PyTetrisClickTestCase(TestCase):
         mock_gameover_screen.initialize = mock_gameover_initialize
         tetris = PyTetris(object())
 
-        with mock.patch.object(tetris, 'status', Status.REPEAT), \
+        with mock.patch.object(tetris.engine, 'status', Status.REPEAT), \
                 mock.patch.object(tetris, 'repeat_button', mock_repeat_button, create=True), \
                 mock.patch.object(tetris, 'gameover_screen', mock_gameover_screen, create=True):
             tetris.click(3, 3)
@@ -1045,24 +807,6 @@ class PyTetrisClickTestCase(TestCase):
         mock_gameover_initialize.assert_called_once()
 
 
-class ScoreTestCase(TestCase):
-    """Tests for Score class
-    """
-
-    @mock.patch('pytetris.pygame.font.SysFont')
-    def test_add(self, mock_sysfont):
-        tests = [1, 2, 3, 4]
-        # (lines, level, score)
-        expects = [(1, 1, 40), (3, 1, 140), (6, 1, 440), (10, 2, 2840)]
-        score = Score(object())
-
-        for test, expect in zip(tests, expects):
-            with self.subTest():
-                score.add(test)
-                self.assertEqual(
-                    (score.lines, score.level, score.score), expect)
-
-
 class GameOverTestCase(TestCase):
     """Tests for GameOver class
     """
@@ -1087,104 +831,54 @@ class GameOverTestCase(TestCase):
 
     def tearDown(self):
         mock.patch.stopall()
+        TEXTS.clear()
 
-    @mock.patch('pytetris.GameOver.draw_image')
-    @mock.patch('pytetris.GameOver.draw_text')
-    def test_update_status_is_none(self, mock_draw_text, mock_draw_image):
-        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
-        with mock.patch.object(gameover, 'timer', 1):
-            gameover.update()
-            self.assertEqual(gameover.timer, 20)
-            self.assertEqual(gameover.status, Status.REPEAT)
-            self.assertEqual(gameover.game.status, Status.REPEAT)
-        mock_draw_image.assert_called_once()
-        mock_draw_text.assert_not_called()
-
-    @mock.patch('pytetris.GameOver.draw_image')
-    @mock.patch('pytetris.GameOver.draw_text')
-    def test_update_status_is_none_timer_not_zero(self, mock_draw_text, mock_draw_image):
-        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
-        with mock.patch.object(gameover, 'timer', 100):
-            gameover.update()
-            self.assertEqual(gameover.timer, 99)
-            self.assertEqual(gameover.status, None)
-        mock_draw_image.assert_called_once()
-        mock_draw_text.assert_not_called()
-
-    @mock.patch('pytetris.GameOver.draw_image')
-    @mock.patch('pytetris.GameOver.draw_text')
-    def test_update_status_is_not_none(self, mock_draw_text, mock_draw_image):
-        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
-        with mock.patch.object(gameover, 'status', Status.REPEAT):
-            gameover.update()
-            self.assertEqual(gameover.timer, 100)
-        mock_draw_image.assert_called_once()
-        mock_draw_text.assert_called_once()
-
-    def test_draw_image_top_less_than_gameovertop(self):
-        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
-        gameover.draw_image()
-        self.assertEqual(gameover.top, 20)
-        self.assertEqual(gameover.is_drop, True)
-        self.assertEqual(gameover.rect.left, GAMEOVER_LEFT)
-        self.assertEqual(gameover.rect.top, 20)
-
-    def test_draw_image_top_more_than_gameovertop(self):
-        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
-
-        with mock.patch.object(gameover, 'top', GAMEOVER_TOP + 20):  # GAMEOVER_TOP + 20 is 240
-            gameover.draw_image()
-            self.assertEqual(gameover.stop, 1)
-            self.assertEqual(gameover.is_drop, False)
-            self.assertEqual(gameover.top, GAMEOVER_TOP + 15)  # GAMEOVER_TOP + 15 is 235
-
-        self.assertEqual(gameover.rect.left, GAMEOVER_LEFT)
-        self.assertEqual(gameover.rect.top, GAMEOVER_TOP + 15)
-
-    def test_draw_image_top_less_than_gameoverboundtop(self):
-        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
-
-        # GAMEOVER_BOUND_TOP -5 is 165
-        with mock.patch.object(gameover, 'top', GAMEOVER_BOUND_TOP - 5), \
-                mock.patch.object(gameover, 'stop', 1), \
-                mock.patch.object(gameover, 'is_drop', False):
-            gameover.draw_image()
-            self.assertEqual(gameover.stop, 1)
-            self.assertEqual(gameover.is_drop, True)
-
-        self.assertEqual(gameover.rect.left, GAMEOVER_LEFT)
-        self.assertEqual(gameover.rect.top, GAMEOVER_BOUND_TOP - 5)
-
-    def test_draw_text(self):
-        mock_render = mock.MagicMock()
-        mock_font = mock.MagicMock()
-        mock_font.render = mock_render
-        self.mock_sysfont.return_value = mock_font
+    def test_update_repeat(self):
+        """The status must be changed to REPEAT after REPEAT_DELAY frames,
+           and the message must be drawn from the next frame.
+        """
         mock_screen = mock.MagicMock()
-        mock_screen.blit = mock.MagicMock()
-
         gameover = GameOver('test.png', mock_screen, mock.MagicMock())
+        for _ in range(REPEAT_DELAY - 1):
+            gameover.update()
+        self.assertIsNone(gameover.status)
 
-        with mock.patch.object(gameover, 'timer', 1):
-            gameover.draw_text()
-            self.assertEqual(gameover.index, 0)
-            self.assertEqual(gameover.timer, 20)
+        gameover.update()
+        self.assertEqual(gameover.status, Status.REPEAT)
+        self.assertEqual(gameover.game.status, Status.REPEAT)
+        mock_screen.blit.assert_not_called()
 
-    def test_draw_text_index_more_than_messagesize(self):
-        mock_render = mock.MagicMock()
-        mock_font = mock.MagicMock()
-        mock_font.render = mock_render
-        self.mock_sysfont.return_value = mock_font
-        mock_screen = mock.MagicMock()
-        mock_screen.blit = mock.MagicMock()
+        gameover.update()
+        mock_screen.blit.assert_called_once_with(*gameover.message[1])
 
-        gameover = GameOver('test.png', mock_screen, mock.MagicMock())
+    def test_initialize(self):
+        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
+        for _ in range(REPEAT_DELAY + 5):
+            gameover.update()
+        gameover.initialize()
+        self.assertIsNone(gameover.status)
+        self.assertEqual(gameover.elapsed, 0)
 
-        with mock.patch.object(gameover, 'timer', 1), \
-                mock.patch.object(gameover, 'index', 3):
-            gameover.draw_text()
-            self.assertEqual(gameover.index, -1)
-            self.assertEqual(gameover.timer, 20)
+    def test_compile_drop(self):
+        """The image must drop, bounce once and rest.
+        """
+        tops = GameOver.compile_drop()
+        self.assertEqual(tops[:3], [0, 20, 40])
+        bottom = tops.index(max(tops))
+        self.assertEqual(tops[bottom], GAMEOVER_TOP + 20)
+        self.assertEqual(tops[bottom + 1], GAMEOVER_TOP + 15)
+        self.assertEqual(min(tops[bottom:]), GAMEOVER_BOUND_TOP - 5)
+        self.assertEqual(tops[-1], tops[-2])
+        self.assertGreater(tops[-1], GAMEOVER_TOP)
+
+    def test_update_drop(self):
+        gameover = GameOver('test.png', mock.MagicMock(), mock.MagicMock())
+        self.assertEqual(gameover.rect.topleft, (GAMEOVER_LEFT, 0))
+        gameover.update()
+        self.assertEqual(gameover.rect.topleft, (GAMEOVER_LEFT, 20))
+        for _ in range(200):
+            gameover.update()
+        self.assertEqual(gameover.rect.topleft, (GAMEOVER_LEFT, GameOver.compile_drop()[-1]))
 
 
 class StartTestCase(TestCase):
@@ -1213,29 +907,21 @@ class StartTestCase(TestCase):
 
     def tearDown(self):
         mock.patch.stopall()
+        TEXTS.clear()
 
-    def test_draw_text_timer_set_to_20(self):
-        mock_screen = mock.MagicMock()
-        mock_blit = mock.MagicMock()
-        mock_screen.blit = mock_blit
-        start = Start('test.png', mock_screen)
-
-        with mock.patch.object(start, 'timer', 1):
-            start.draw_text()
-            self.assertEqual(start.timer, 20)
-            self.assertEqual(start.index, 0)
-
-    def test_draw_text_index_set_to_default(self):
+    def test_update(self):
+        """The message must be shifted to the left only while it is enlarged.
+        """
         mock_screen = mock.MagicMock()
-        mock_blit = mock.MagicMock()
-        mock_screen.blit = mock_blit
         start = Start('test.png', mock_screen)
-
-        with mock.patch.object(start, 'timer', 1), \
-                mock.patch.object(start, 'index', 2):
-            start.draw_text()
-            self.assertEqual(start.timer, 20)
-            self.assertEqual(start.index, -1)
+        lefts = []
+        for _ in range(160):
+            start.update()
+            message, title = mock_screen.blit.call_args_list[-2:]
+            lefts.append(message.args[1][0])
+            self.assertEqual(title, mock.call(start.title, (TITLE_X, TITLE_Y)))
+        expect = [START_TEXT_X - 10 if (n // 20) % 4 == 2 else START_TEXT_X for n in range(1, 161)]
+        self.assertEqual(lefts, expect)
 
 
 class PauseTestCase(TestCase):
@@ -1250,40 +936,49 @@ class PauseTestCase(TestCase):
         for patcher in patchers:
             patcher.start()
 
-        mock_image = mock.MagicMock()
-        mock_image.get_rect.return_value = mock.MagicMock()
-
-        def generator():
-            for _ in range(7):
-                yield mock_image
-
+        self.images = [mock.MagicMock() for _ in range(7)]
         patcher_create_image = mock.patch('pytetris.Pause.create_image')
         mock_create_image = patcher_create_image.start()
-        mock_create_image.return_value = generator()
+        mock_create_image.return_value = iter(self.images)
 
     def tearDown(self):
         mock.patch.stopall()
+        TEXTS.clear()
 
-    def test_draw_image_timer_is_0(self):
+    def test_update(self):
+        """Each image must be shown for 20 frames, and the first one for 40 frames at first.
+        """
         pause = Pause('images', mock.MagicMock())
-        with mock.patch.object(pause, 'timer', 1):
-            pause.draw_image()
-            self.assertEqual(pause.timer, 20)
-            self.assertEqual(pause.index, 1)
+        self.assertIs(pause.image, self.images[0])
+        shown = []
+        for _ in range(20 + 20 * 7 * 2):
+            pause.update()
+            shown.append(pause.image)
+        expect = [self.images[0]] * 20 + [image for image in self.images for _ in range(20)] * 2
+        self.assertEqual(shown[:-1], expect[1:])
+        pause.screen.blit.assert_called_with(pause.text, (PAUSE_TEXT_X, PAUSE_TEXT_Y))
+
+
+class TimelineTestCase(TestCase):
+    """Tests for Timeline and compile_message
+    """
 
-    def test_draw_image_index_timer_is_20(self):
-        pause = Pause('images', mock.MagicMock())
-        pause.draw_image()
-        self.assertEqual(pause.timer, 19)
-        self.assertEqual(pause.index, 0)
+    def test_hold(self):
+        timeline = Timeline.compile([('a', 2), ('b', 1)])
+        self.assertEqual(len(timeline), 3)
+        self.assertEqual([timeline[i] for i in range(5)], ['a', 'a', 'b', 'b', 'b'])
 
-    def test_draw_image_index_set_to_default(self):
-        pause = Pause('images', mock.MagicMock())
-        with mock.patch.object(pause, 'timer', 1), \
-                mock.patch.object(pause, 'index', 7):
-            pause.draw_image()
-            self.assertEqual(pause.timer, 20)
-            self.assertEqual(pause.index, 1)
+    def test_loop(self):
+        timeline = Timeline(['a', 'b', 'c'], loop=1)
+        self.assertEqual([timeline[i] for i in range(7)], ['a', 'b', 'c', 'b', 'c', 'b', 'c'])
+
+    @mock.patch('pytetris.TEXTS')
+    def test_compile_message(self, mock_texts):
+        mock_texts.render.side_effect = lambda text, size, color: size
+        timeline = compile_message('TEST', COLOR_WHITE, 100, 50, sizes=(10, 30), duration=2)
+        self.assertEqual(
+            [timeline[i] for i in range(8)],
+            [(30, (80, 50))] * 2 + [(10, (100, 50))] * 2 + [(30, (80, 50))] * 2 + [(30, (80, 50))] * 2)
 
 
 class NextBlockDisplayTestCase(TestCase):
@@ -1311,18 +1006,26 @@ class NextBlockDisplayTestCase(TestCase):
         load_return = mock.MagicMock()
         load_return.convert = self.mock_convert
         mock_load.return_value = load_return
+        IMAGES.clear()
 
     def tearDown(self):
         mock.patch.stopall()
+        TEXTS.clear()
+        IMAGES.clear()
 
     def test_assemble_blocks(self):
+        """Each image must be loaded once and shared by the 4 blocks.
+        """
         next_block_display = NextBlockDisplay(
             'test.png', mock.MagicMock())
+        self.assertEqual(self.mock_convert.call_count, 8)
         self.mock_convert.reset_mock()
         with mock.patch.object(next_block_display, 'images', {}):
             next_block_display.assemble_blocks()
-            self.assertEqual(self.mock_convert.call_count, 28)
+            self.assertEqual(self.mock_convert.call_count, 0)
             self.assertEqual(len(next_block_display.images), 7)
+        for images in next_block_display.images.values():
+            self.assertTrue(all(image is images[0] for image in images))
 
     def test_update(self):
         mock_blit = mock.MagicMock()
@@ -1335,8 +1038,19 @@ class NextBlockDisplayTestCase(TestCase):
         with mock.patch.object(next_block_display, 'positions', positions, create=True), \
                 mock.patch.object(next_block_display, 'next_blocks', next_blocks, create=True):
             next_block_display.update()
+        self.mock_render.assert_not_called()
+        self.assertEqual(mock_blit.call_count, 4)
+
+    def test_draw_label(self):
+        """The label must be drawn on the given surface, not on the screen.
+        """
+        mock_screen = mock.MagicMock()
+        mock_surface = mock.MagicMock()
+        next_block_display = NextBlockDisplay('test.png', mock_screen)
+        next_block_display.draw_label(mock_surface)
         self.mock_render.assert_called_once()
-        self.assertEqual(mock_blit.call_count, 5)
+        mock_surface.blit.assert_called_once()
+        mock_screen.blit.assert_not_called()
 
     def test_set_images(self):
         green = [[1.5, 2], [1.5, 3], [2.5, 1], [2.5, 2]]
@@ -1345,6 +1059,172 @@ class NextBlockDisplayTestCase(TestCase):
         self.assertEqual(next_block_display.positions, green)
 
 
+class PyTetrisCreateBackgroundTestCase(TestCase):
+    """Tests for PyTetris.create_background
+    """
+
+    @mock.patch('pytetris.PyTetris.create_sounds')
+    @mock.patch('pytetris.PyTetris.create_screens')
+    @mock.patch('pytetris.pygame.Surface')
+    def test_create_background(self, mock_surface, mock_create_screens, mock_create_sounds):
+        """The static sprites and the labels must be drawn on the background, not on the screen.
+        """
+        mock_screen = mock.MagicMock()
+        mock_group = mock.MagicMock()
+        tetris = PyTetris(mock_screen)
+        tetris.next_block_display = mock.MagicMock()
+        tetris.score = mock.MagicMock()
+        background = tetris.create_background(mock_group)
+
+        self.assertIs(background, mock_surface.return_value.convert.return_value)
+        background.fill.assert_called_once_with(COLOR_GREEN)
+        mock_group.draw.assert_called_once_with(background)
+        tetris.next_block_display.draw_label.assert_called_once_with(background)
+        tetris.score.draw_labels.assert_called_once_with(background)
+        mock_screen.blit.assert_not_called()
+
+
+class ScoreBoardTestCase(TestCase):
+    """Tests for ScoreBoard
+    """
+
+    def setUp(self):
+        patcher_font_sysfont = mock.patch('pytetris.pygame.font.SysFont')
+        self.mock_sysfont = patcher_font_sysfont.start().return_value
+
+    def tearDown(self):
+        mock.patch.stopall()
+        TEXTS.clear()
+
+    def test_draw(self):
+        """Only the numbers must be drawn under the labels.
+        """
+        mock_screen = mock.MagicMock()
+        score = mock.MagicMock(level=1, lines=12, score=1200)
+        ScoreBoard(mock_screen, score).draw()
+        texts = [c.args[0] for c in self.mock_sysfont.render.call_args_list]
+        self.assertEqual(texts, ['1', '12', '1200'])
+        positions = [c.args[1] for c in mock_screen.blit.call_args_list]
+        self.assertEqual(
+            positions,
+            [(SCORE_AREA_X, SCORE_AREA_Y + 20), (SCORE_AREA_X, SCORE_AREA_Y + 80), (SCORE_AREA_X, SCORE_AREA_Y + 140)])
+
+    def test_draw_labels(self):
+        mock_surface = mock.MagicMock()
+        ScoreBoard(mock.MagicMock(), mock.MagicMock()).draw_labels(mock_surface)
+        texts = [c.args[0] for c in self.mock_sysfont.render.call_args_list]
+        self.assertEqual(texts, ['LEVEL', 'LINES', 'SCORE'])
+        self.assertEqual(mock_surface.blit.call_count, 3)
+
+    def test_draw_changed(self):
+        """The numbers must be rendered again only when any of them changes.
+        """
+        score = mock.MagicMock(level=1, lines=0, score=50)
+        score_board = ScoreBoard(mock.MagicMock(), score)
+        score_board.draw()
+        score_board.draw()
+        self.assertEqual(self.mock_sysfont.render.call_count, 3)
+        score.lines = 2
+        score.score = 200
+        score_board.draw()
+        texts = [c.args[0] for c in self.mock_sysfont.render.call_args_list[3:]]
+        self.assertEqual(texts, ['2', '200'])
+
+
+class LayoutTestCase(TestCase):
+    """Tests for Layout
+    """
+
+    def test_scale(self):
+        layout = Layout(1.5)
+        self.assertEqual(layout(20), 30)
+        self.assertEqual(layout.point(150, 5), (225, 8))
+        self.assertEqual(layout.rect(Rect(10, 20, 30, 40)), Rect(15, 30, 45, 60))
+
+    def test_fit(self):
+        """SCREEN must fit into the window with the scale rounded to SCALE_STEP.
+        """
+        layout = Layout()
+        tests = [((1400, 1200), 2), ((1400, 900), 1.5), ((1052, 1000), 1.5), ((300, 200), 0.35), ((10, 10), 0.05)]
+        for size, expect in tests:
+            with self.subTest(size=size):
+                layout.fit(size)
+                self.assertAlmostEqual(layout.scale, expect)
+        self.assertFalse(layout.fit((20, 20)))
+        self.assertTrue(layout.fit((700, 600)))
+        self.assertEqual(layout.scale, 1)
+
+
+@mock.patch('pytetris.PyTetris.create_screens')
+@mock.patch('pytetris.PyTetris.create_sounds')
+class PyTetrisResizeTestCase(TestCase):
+    """Tests for PyTetris.resize
+    """
+
+    @mock.patch('pytetris.IMAGES')
+    @mock.patch('pytetris.LAYOUT')
+    def test_resize(self, mock_layout, mock_images, mock_create_sounds, mock_create_screens):
+        """The sprites and the ground must be laid out again only when the scale is changed.
+        """
+        tetris = PyTetris(object())
+        tetris.ground = mock.MagicMock()
+        tetris.score = mock.MagicMock()
+        sprites = [mock.MagicMock() for _ in range(3)]
+        block = mock.MagicMock(row=2, col=3)
+        tetris.blocks = [block, None, None, None]
+
+        mock_layout.fit.return_value = False
+        self.assertFalse(tetris.resize((700, 600), sprites))
+        sprites[0].layout.assert_not_called()
+
+        mock_layout.fit.return_value = True
+        mock_layout.side_effect = lambda value: value * 2
+        self.assertTrue(tetris.resize((1400, 1200), sprites))
+        mock_images.discard.assert_called_once_with(mock_layout.scale)
+        for sprite in sprites:
+            sprite.layout.assert_called_once()
+        tetris.ground.layout.assert_called_once()
+        self.assertIsNone(tetris.score.values)
+        self.assertEqual(
+            (block.rect.centerx, block.rect.centery), (2 * (150 + 3 * BLOCK_SIZE), 2 * (100 + 2 * BLOCK_SIZE)))
+
+
+@mock.patch('pytetris.pygame.display.update')
+class DirtyRectsTestCase(TestCase):
+    """Tests for DirtyRects
+    """
+
+    def test_update_status_changed(self, mock_update):
+        """When the status changes, the whole screen must be pushed.
+        """
+        dirty = DirtyRects()
+        dirty.add([Rect(0, 0, 10, 10)])
+        dirty.update(Status.PLAY)
+        mock_update.assert_called_once_with()
+        self.assertEqual(dirty.rects, [])
+        self.assertEqual(dirty.status, Status.PLAY)
+
+    def test_update_same_status(self, mock_update):
+        """In the same status, only the added rects and the dirty areas of the status must be pushed.
+        """
+        dirty = DirtyRects()
+        dirty.status = Status.PLAY
+        rects = [Rect(0, 0, 10, 10), Rect(20, 20, 10, 10)]
+        dirty.add(rects)
+        dirty.update(Status.PLAY)
+        mock_update.assert_called_once_with(rects + list(DIRTY_AREAS[Status.PLAY]))
+        self.assertEqual(dirty.rects, [])
+
+    def test_update_disabled(self, mock_update):
+        """If disabled, the whole screen must be pushed in each frame.
+        """
+        dirty = DirtyRects(False)
+        dirty.status = Status.PLAY
+        dirty.add([Rect(0, 0, 10, 10)])
+        dirty.update(Status.PLAY)
+        mock_update.assert_called_once_with()
+
+
 class MainTestCase(TestCase):
     """Tests for main
     """
@@ -1353,8 +1233,8 @@ class MainTestCase(TestCase):
         patchers = [
             mock.patch('pytetris.pygame.display.set_caption'),
             mock.patch('pytetris.pygame.time'),
-            mock.patch('pytetris.pygame.key.set_repeat'),
-            mock.patch('pytetris.pygame.display.update')]
+            mock.patch('pytetris.pygame.display.update'),
+            mock.patch('pytetris.preload_assets')]
         for patcher in patchers:
             patcher.start()
 
@@ -1414,6 +1294,7 @@ class MainTestCase(TestCase):
         self.mock_move_left = mock.MagicMock()
         self.mock_move_down = mock.MagicMock()
         self.mock_rotate = mock.MagicMock()
+        self.mock_hard_drop = mock.MagicMock()
 
         mock_pytetris = patcher_pytetris.start()
         self.mock_pytetris_instance = mock.MagicMock()
@@ -1424,6 +1305,7 @@ class MainTestCase(TestCase):
         self.mock_pytetris_instance.move_left = self.mock_move_left
         self.mock_pytetris_instance.move_down = self.mock_move_down
         self.mock_pytetris_instance.rotate = self.mock_rotate
+        self.mock_pytetris_instance.hard_drop = self.mock_hard_drop
         mock_pytetris.return_value = self.mock_pytetris_instance
 
         patcher_event_get = mock.patch('pytetris.pygame.event.get')
@@ -1438,7 +1320,8 @@ class MainTestCase(TestCase):
         """
         def dummy_event_get():
             yield mock.MagicMock(type=QUIT)
-        self.mock_event_get.return_value = dummy_event_get()
+        # The input is handled before drawing, so the game quits in the second frame.
+        self.mock_event_get.side_effect = [[], dummy_event_get()]
 
         with mock.patch.object(self.mock_pytetris_instance, 'status', Status.PLAY, create=True):
             with self.assertRaises(SystemExit):
@@ -1463,7 +1346,8 @@ class MainTestCase(TestCase):
         """
         def dummy_event_get():
             yield mock.MagicMock(type=QUIT)
-        self.mock_event_get.return_value = dummy_event_get()
+        # The input is handled before drawing, so the game quits in the second frame.
+        self.mock_event_get.side_effect = [[], dummy_event_get()]
 
         with mock.patch.object(self.mock_pytetris_instance, 'status', Status.PAUSE, create=True):
             with self.assertRaises(SystemExit):
@@ -1488,7 +1372,8 @@ class MainTestCase(TestCase):
         """
         def dummy_event_get():
             yield mock.MagicMock(type=QUIT)
-        self.mock_event_get.return_value = dummy_event_get()
+        # The input is handled before drawing, so the game quits in the second frame.
+        self.mock_event_get.side_effect = [[], dummy_event_get()]
 
         with mock.patch.object(self.mock_pytetris_instance, 'status', Status.START, create=True):
             with self.assertRaises(SystemExit):
@@ -1513,7 +1398,8 @@ class MainTestCase(TestCase):
         """
         def dummy_event_get():
             yield mock.MagicMock(type=QUIT)
-        self.mock_event_get.return_value = dummy_event_get()
+        # The input is handled before drawing, so the game quits in the second frame.
+        self.mock_event_get.side_effect = [[], dummy_event_get()]
 
         with mock.patch.object(self.mock_pytetris_instance, 'status', Status.GAMEOVER, create=True):
             with self.assertRaises(SystemExit):
@@ -1538,7 +1424,8 @@ class MainTestCase(TestCase):
         """
         def dummy_event_get():
             yield mock.MagicMock(type=QUIT)
-        self.mock_event_get.return_value = dummy_event_get()
+        # The input is handled before drawing, so the game quits in the second frame.
+        self.mock_event_get.side_effect = [[], dummy_event_get()]
 
         with mock.patch.object(self.mock_pytetris_instance, 'status', Status.REPEAT, create=True):
             with self.assertRaises(SystemExit):
@@ -1567,6 +1454,40 @@ class MainTestCase(TestCase):
                 pytetris_main()
                 self.mock_quit.assert_called_once()
 
+    def test_hold_keys(self):
+        """The keys must be told to be held until they are released, in any status,
+           before the game is updated.
+        """
+        def dummy_event_get():
+            yield mock.MagicMock(type=KEYDOWN, key=K_LEFT)
+            yield mock.MagicMock(type=KEYDOWN, key=K_UP)
+            yield mock.MagicMock(type=KEYUP, key=K_LEFT)
+            yield mock.MagicMock(type=QUIT)
+        self.mock_event_get.return_value = dummy_event_get()
+
+        with mock.patch.object(self.mock_pytetris_instance, 'status', Status.PAUSE, create=True):
+            with self.assertRaises(SystemExit):
+                pytetris_main()
+        self.mock_pytetris_instance.hold.assert_called_once_with(Action.LEFT)
+        self.mock_pytetris_instance.release.assert_called_once_with(Action.LEFT)
+        self.mock_move_left.assert_not_called()
+
+    @mock.patch('builtins.print')
+    def test_latency(self, mock_print):
+        """The latency must be recorded after the frame is pushed, and printed at exit.
+        """
+        def dummy_event_get():
+            yield mock.MagicMock(type=QUIT)
+        self.mock_event_get.side_effect = [[], dummy_event_get()]
+
+        with mock.patch.object(self.mock_pytetris_instance, 'status', Status.START, create=True):
+            with self.assertRaises(SystemExit):
+                pytetris_main(latency_overlay=True, latency_report=True)
+        latency = self.mock_pytetris_instance.latency
+        latency.draw.assert_called_once_with(self.mock_screen)
+        latency.present.assert_called_once()
+        mock_print.assert_called_once_with(latency.report.return_value, file=sys.stderr)
+
     def test_press_right_arrow_key(self):
         """If RIGHT ARROW key is pressed, PyTetris.move_right method must be called.
         """
@@ -1639,6 +1560,23 @@ class MainTestCase(TestCase):
         self.mock_move_down.assert_not_called()
         self.mock_rotate.assert_called_once()
 
+    def test_press_space_key(self):
+        """If SPACE key is pressed, PyTetris.hard_drop method must be called.
+        """
+        def dummy_event_get():
+            yield mock.MagicMock(type=KEYDOWN, key=K_SPACE)
+            yield mock.MagicMock(type=QUIT)
+        self.mock_event_get.return_value = dummy_event_get()
+
+        with mock.patch.object(self.mock_pytetris_instance, 'status', Status.PLAY, create=True), \
+                mock.patch.object(self.mock_pytetris_instance, 'block_status', Status.DROPPING, create=True):
+            with self.assertRaises(SystemExit):
+                pytetris_main()
+                self.mock_quit.assert_called_once()
+        self.mock_hard_drop.assert_called_once()
+        self.mock_move_down.assert_not_called()
+        self.mock_rotate.assert_not_called()
+
 
 if __name__ == '__main__':
     main()
@@ -4,17 +4,23 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 import copy
-from unittest import TestCase, main
+from unittest import TestCase, main, skipIf
 
 import numpy as np
 
-from pytetris_utils import update_blockset_row, update_blockset_col
+import pytetris_utils_py
+try:
+    import pytetris_utils
+except ImportError:
+    pytetris_utils = None
 
 
-class PytetrisUtilsTestCase(TestCase):
-    """Test extension module pytetris_utils
+class PytetrisUtilsTests:
+    """Tests shared by the extension module and the pure Python implementation
     """
 
+    utils = None
+
     def setUp(self):
         test_array_1 = np.array([
             [[-1, 4], [0, 4], [1, 4], [2, 4]],
@@ -37,7 +43,7 @@ class PytetrisUtilsTestCase(TestCase):
     def test_updcate_blockset_row(self):
         for test, step in zip(self.tests, self.steps):
             before = copy.deepcopy(test)
-            update_blockset_row(test, step)
+            self.utils.update_blockset_row(test, step)
             for before_row, after_row in zip(before, test):
                 for before_item, after_item in zip(before_row, after_row):
                     with self.subTest(step):
@@ -46,12 +52,78 @@ class PytetrisUtilsTestCase(TestCase):
     def test_update_blockset_col(self):
         for test, step in zip(self.tests, self.steps):
             before = copy.deepcopy(test)
-            update_blockset_col(test, step)
+            self.utils.update_blockset_col(test, step)
             for before_row, after_row in zip(before, test):
                 for before_item, after_item in zip(before_row, after_row):
                     with self.subTest(step):
                         self.assertEqual(before_item[1], after_item[1] - step)
 
+    def test_collides(self):
+        rows = [0, 0b00011, 0b10000]
+        masks = ((-1, 0b10000), (0, 0b11000))
+        tests = [-1, 0, 1, 2]
+        expects = [False, False, False, True]
+
+        for test, expect in zip(tests, expects):
+            with self.subTest((test, expect)):
+                self.assertEqual(bool(self.utils.collides(rows, masks, test)), expect)
+
+    def test_find_full_rows(self):
+        full = 0b11111
+        rows = [full, 0b1, full, full, 0]
+        self.assertEqual(self.utils.find_full_rows(rows, [3, 1, 3, 4, 2], full), [2, 3])
+        self.assertEqual(self.utils.find_full_rows(rows, (r for r in [1, 4]), full), [])
+
+    def test_collapse(self):
+        tests = (
+            ([0, 0b00010, 0b00011, 0b10000, 0, 0], [4, 5]),
+            ([0b00010, 0, 0b00011, 0, 0b10000, 0b01010], [1, 3]),
+            ([0, 0b00010], [])
+        )
+        expects = (
+            [0, 0, 0, 0b00010, 0b00011, 0b10000],
+            [0, 0, 0b00010, 0b00011, 0b10000, 0b01010],
+            [0, 0b00010]
+        )
+
+        for (rows, deleted), expect in zip(tests, expects):
+            with self.subTest(expect):
+                self.utils.collapse(rows, deleted)
+                self.assertEqual(rows, expect)
+
+    def test_drop_distance(self):
+        # vertical blocks in the column 1: [[-1, 1], [0, 1], [1, 1], [2, 1]]
+        profile = ((1, 2),)
+        masks = ((-1, 0b10), (0, 0b10), (1, 0b10), (2, 0b10))
+        tests = (
+            ([0] * 10, [0, 0, 0], 0),
+            ([0] * 9 + [0b10], [0, 1, 0], 0),
+            ([0] * 9 + [0b10], [0, 1, 0], 3),
+            # under the blocks in the row 2
+            ([0, 0, 0b10] + [0] * 7, [0, 8, 0], 4)
+        )
+        expects = [7, 6, 3, 3]
+
+        for (rows, heights, row), expect in zip(tests, expects):
+            with self.subTest((rows, row, expect)):
+                self.assertEqual(
+                    self.utils.drop_distance(rows, heights, profile, masks, 2, row, 0), expect)
+
+
+@skipIf(pytetris_utils is None, 'the extension module is not built')
+class PytetrisUtilsTestCase(PytetrisUtilsTests, TestCase):
+    """Test extension module pytetris_utils
+    """
+
+    utils = pytetris_utils
+
+
+class PytetrisUtilsPyTestCase(PytetrisUtilsTests, TestCase):
+    """Test the pure Python implementation of pytetris_utils
+    """
+
+    utils = pytetris_utils_py
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,150 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+import tetris_ai
+import tetris_engine
+from tetris_ai import ROTATIONS, AIPlayer, Planner, Weights, play
+from tetris_engine import COLLISION_TABLE, COLS, FULL, ROWS, Action, Status, TetrisEngine
+
+
+# the indexes of the blocksets in SHAPES
+BLUE = 0
+YELLOW = 6
+
+
+class RotationsTestCase(TestCase):
+    """Tests for ROTATIONS
+    """
+
+    def test_unique(self):
+        self.assertEqual([index for index, _ in ROTATIONS[YELLOW]], [0])
+        self.assertEqual([index for index, _ in ROTATIONS[BLUE]], [0, 1])
+        self.assertEqual(len(ROTATIONS[1]), 4)
+
+
+class PlannerTestCase(TestCase):
+    """Tests for Planner
+    """
+
+    def test_analyze(self):
+        rows = [0] * ROWS
+        rows[ROWS - 3] = 0b0000000001
+        rows[ROWS - 2] = 0b0000000010
+        rows[ROWS - 1] = 0b1111111100
+        heights, aggregate, holes, bumpiness = Planner().analyze(rows)
+        self.assertEqual(heights, [3, 2] + [1] * 8)
+        self.assertEqual((aggregate, holes, bumpiness), (13, 3, 2))
+
+    def test_placements(self):
+        """Every column must be tried for each rotation which differs from the others.
+        """
+        planner = Planner()
+        rows = [0] * ROWS
+        heights = planner.analyze(rows)[0]
+        placements = list(planner.placements(rows, heights, YELLOW))
+        self.assertEqual([col for _, col, _, _, _ in placements], list(range(-4, 5)))
+        placements = list(planner.placements(rows, heights, BLUE))
+        self.assertEqual(len(placements), COLS + COLS - 3)
+        # The vertical bar lands with its bottom on the floor.
+        index, col, row, placed, lines = placements[0]
+        self.assertEqual(row + COLLISION_TABLE[BLUE][index].bottom, ROWS - 1)
+        self.assertEqual(lines, 0)
+
+    def test_placements_lines(self):
+        """The full rows must be deleted from the rows after the placement.
+        """
+        planner = Planner()
+        rows = [0] * ROWS
+        rows[ROWS - 2] = FULL & ~0b11
+        rows[ROWS - 1] = FULL & ~0b11
+        heights = planner.analyze(rows)[0]
+        results = {(col, lines): placed for _, col, _, placed, lines in planner.placements(rows, heights, YELLOW)}
+        self.assertEqual(results[-4, 2], [0] * ROWS)
+
+    def test_placements_unreachable(self):
+        """The columns behind a wall of blocks on the row of the blocks must not be tried.
+        """
+        planner = Planner()
+        rows = [0] * ROWS
+        for r in range(ROWS):
+            rows[r] = 0b0010000000
+        heights = planner.analyze(rows)[0]
+        cols = {col for _, col, _, _, _ in planner.placements(rows, heights, YELLOW, row=1, col=0)}
+        self.assertEqual(cols, set(range(-4, 2)))
+
+    def test_search(self):
+        """The placement which deletes the rows must be chosen.
+        """
+        planner = Planner()
+        rows = [0] * ROWS
+        rows[ROWS - 1] = FULL & ~0b1111
+        placement = planner.search(rows, BLUE)
+        rotation = COLLISION_TABLE[BLUE][placement.index]
+        self.assertEqual(
+            sorted(col + placement.col for _, col in rotation.cells), [0, 1, 2, 3])
+        self.assertEqual(planner.evaluated, COLS + COLS - 3)
+
+        planner.search(rows, BLUE, YELLOW)
+        self.assertGreater(planner.evaluated, (COLS + COLS - 3) * 9)
+
+    def test_kernel(self):
+        """The planner must use the same kernel as the engine.
+        """
+        self.assertIs(tetris_ai.kernel, tetris_engine.kernel)
+
+    def test_weights(self):
+        """The score must follow the weights.
+        """
+        planner = Planner(Weights(holes=-1, aggregate_height=-2, bumpiness=-3, lines=4))
+        self.assertEqual(planner.score(aggregate=1, holes=2, bumpiness=3, lines=4), -2 - 2 - 9 + 16)
+
+
+class AIPlayerTestCase(TestCase):
+    """Tests for AIPlayer
+    """
+
+    def create_engine(self):
+        engine = TetrisEngine(seed=0)
+        engine.initialize()
+        return engine
+
+    def test_plan(self):
+        """The actions must rotate and move the blocks to the placement, and drop them.
+        """
+        engine = self.create_engine()
+        player = AIPlayer(engine)
+        moves = player.plan()
+        self.assertEqual(moves[-1], Action.HARD_DROP)
+        placement = player.planner.search(
+            engine.board.rows, engine.blockset_index, engine.next_blockset, engine.row, engine.col)
+        engine.step(moves[:-1])
+        self.assertEqual((engine.index, engine.col), placement[:2])
+
+    def test_act_delay(self):
+        """With the delay, one action must be given every delay ticks.
+        """
+        engine = self.create_engine()
+        player = AIPlayer(engine, delay=3)
+        actions = [player.act() for _ in range(7)]
+        self.assertEqual([len(action) for action in actions], [1, 0, 0, 1, 0, 0, 1])
+
+    def test_act_not_dropping(self):
+        engine = self.create_engine()
+        engine.block_status = Status.WAITING
+        self.assertEqual(AIPlayer(engine).act(), [])
+
+    def test_play(self):
+        """The game must be played headless until the pieces are used.
+        """
+        engine = TetrisEngine(seed=1)
+        play(engine, AIPlayer(engine), pieces=60)
+        self.assertEqual(engine.status, Status.PLAY)
+        self.assertEqual(engine.pieces, 61)
+        self.assertGreater(engine.score.lines, 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from unittest import TestCase, main
+
+import numpy as np
+
+from tetris_engine import FULL, ROWS
+from tetris_batch import TetrisBatch, SHAPE_TABLE, NOOP, LEFT, RIGHT, DOWN, ROTATE
+
+
+class TetrisBatchCollideTestCase(TestCase):
+    """Tests for TetrisBatch.collide
+    """
+
+    def test_collide(self):
+        batch = TetrisBatch(4, seed=0)
+        batch.boards[:] = 0
+        batch.boards[3, 10] = 0b10000
+        coordinates = np.array([
+            [[0, -1], [0, 0], [1, 0], [2, 0]],     # left wall
+            [[17, 9], [18, 9], [19, 9], [20, 9]],  # floor
+            [[-1, 4], [0, 4], [1, 4], [2, 4]],     # above the board
+            [[8, 4], [9, 4], [10, 4], [11, 4]]])   # block on the board
+        result = batch.collide(coordinates)
+        self.assertEqual(result.tolist(), [True, True, False, True])
+
+
+class TetrisBatchStepTestCase(TestCase):
+    """Tests for TetrisBatch.step
+    """
+
+    def setUp(self):
+        self.batch = TetrisBatch(5, seed=0)
+        self.batch.blockset[:] = 0
+        self.batch.index[:] = 0
+        self.batch.offset[:] = 0
+        self.batch.drop_timer[:] = 10
+
+    def test_move(self):
+        """Each game must be operated by its own action.
+        """
+        before = self.batch.coordinates.copy()
+        self.batch.step(np.array([NOOP, LEFT, RIGHT, DOWN, ROTATE]))
+        after = self.batch.coordinates
+
+        self.assertTrue((after[0] == before[0]).all())
+        self.assertTrue((after[1] == before[1] + [0, -1]).all())
+        self.assertTrue((after[2] == before[2] + [0, 1]).all())
+        self.assertTrue((after[3] == before[3] + [1, 0]).all())
+        self.assertTrue((after[4] == SHAPE_TABLE[0, 1]).all())
+        self.assertEqual(self.batch.drop_timer.tolist(), [9] * 5)
+
+    def test_move_blocked(self):
+        """Blocks must not be moved into the walls.
+        """
+        self.batch.offset[:, 1] = -4
+        before = self.batch.coordinates.copy()
+        self.batch.step(np.full(5, LEFT))
+        self.assertTrue((self.batch.coordinates == before).all())
+
+    def test_grounded(self):
+        """Blocks which cannot drop must be put on the board and new blocks must be created.
+        """
+        self.batch.offset[:, 0] = ROWS - 4
+        self.batch.drop_timer[:] = 1
+        self.batch.step(np.zeros(5, dtype=np.int64))
+
+        self.assertEqual(self.batch.boards[:, ROWS - 4:].tolist(), [[0b10000] * 4] * 5)
+        self.assertTrue((self.batch.offset == 0).all())
+        self.assertTrue((self.batch.index == 0).all())
+        self.assertFalse(self.batch.gameover.any())
+
+    def test_delete_rows(self):
+        """Full rows must be deleted and the rows above them must be moved down.
+        """
+        self.batch.boards[:, ROWS - 4:] = [0b1, FULL ^ 0b10000, FULL ^ 0b10000, FULL ^ 0b10000]
+        self.batch.boards[0, ROWS - 4:] = [0b1, FULL ^ 0b10000, 0b10, FULL ^ 0b10000]
+        self.batch.offset[:, 0] = ROWS - 4
+        self.batch.drop_timer[:] = 1
+        deleted = self.batch.step(np.zeros(5, dtype=np.int64))
+
+        self.assertEqual(deleted.tolist(), [2, 3, 3, 3, 3])
+        self.assertEqual(self.batch.boards[0, ROWS - 3:].tolist(), [0, 0b10001, 0b10010])
+        self.assertEqual(self.batch.boards[1, ROWS - 2:].tolist(), [0, 0b10001])
+        self.assertEqual(self.batch.lines.tolist(), [2, 3, 3, 3, 3])
+        self.assertEqual(self.batch.score.tolist(), [100, 300, 300, 300, 300])
+
+    def test_gameover(self):
+        """If new blocks cannot be put, the game must be over and must not be operated.
+        """
+        self.batch.boards[2, :4] = FULL ^ 0b1
+        self.batch.offset[2, 0] = ROWS - 4
+        self.batch.drop_timer[2] = 1
+        self.batch.step(np.zeros(5, dtype=np.int64))
+        self.assertEqual(self.batch.gameover.tolist(), [False, False, True, False, False])
+
+        before = self.batch.coordinates.copy()
+        self.batch.step(np.full(5, DOWN))
+        self.assertTrue((self.batch.coordinates[2] == before[2]).all())
+
+        self.batch.initialize(self.batch.gameover.copy())
+        self.assertFalse(self.batch.gameover.any())
+        self.assertEqual(self.batch.boards[2].tolist(), [0] * ROWS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1093 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import types
+from collections import namedtuple
+from unittest import TestCase, main, mock
+
+import pytetris_utils_py
+
+from tetris_engine import (
+    TetrisEngine, Board, Block, Scheduler, COLLISION_TABLE, COLS, ROWS, SHAPES, FULL, Status, Score, Action, Event,
+    KERNEL_FUNCTIONS, load_kernel)
+
+
+DummyBlock = namedtuple('DummyBlock', 'row, col')
+
+
+class BoardTestCase(TestCase):
+    """Tests for Board
+    """
+
+    def test_is_filled(self):
+        board = Board([0b00011, 0b10000, 0])
+        tests = [(0, 0), (0, 1), (0, 2), (1, 4), (2, 4), (-1, 0)]
+        expects = [True, True, False, True, False, False]
+
+        for test, expect in zip(tests, expects):
+            with self.subTest((test, expect)):
+                self.assertEqual(board.is_filled(*test), expect)
+
+    def test_fill(self):
+        board = Board([0, 0])
+        board.fill(1, 3)
+        board.fill(1, 0)
+        self.assertEqual(board.rows, [0, 0b01001])
+
+    def test_full_and_empty_rows(self):
+        board = Board([0, FULL, 0b1])
+        self.assertTrue(board.has_full_rows())
+        self.assertEqual([board.is_full(i) for i in range(3)], [False, True, False])
+        self.assertEqual([board.is_empty(i) for i in range(3)], [True, False, False])
+        board.clear(1)
+        self.assertFalse(board.has_full_rows())
+
+    def test_find_full_rows(self):
+        board = Board([FULL, 0b1, FULL, FULL, 0])
+        self.assertEqual(board.find_full_rows([3, 1, 3, 4, 2]), [2, 3])
+        self.assertEqual(board.find_full_rows([1, 4]), [])
+
+    def test_heights(self):
+        """heights must follow fill, and collapse after the rows are cleared.
+        """
+        board = Board([0, 0b00100, 0b00011, FULL])
+        self.assertEqual(board.heights[:5], [2, 2, 3, 1, 1])
+        board.fill(0, 4)
+        self.assertEqual(board.heights[:5], [2, 2, 3, 1, 4])
+        with mock.patch.object(Board, 'update_heights') as mock_update_heights:
+            board.clear(3)
+        mock_update_heights.assert_not_called()
+        board.collapse([3])
+        self.assertEqual(board.rows, [0, 0b10000, 0b00100, 0b00011])
+        self.assertEqual(board.heights[:5], [1, 1, 2, 0, 3])
+
+    def test_copy(self):
+        board = Board([0, 0b1])
+        copied = board.copy()
+        copied.fill(0, 1)
+        self.assertEqual(board.rows, [0, 0b1])
+        self.assertEqual(copied.rows, [0b10, 0b1])
+
+
+class TetrisEngineGetBlocksetIndexTestCase(TestCase):
+    """Tests for TetrisEngine.get_blockset_index
+    """
+    def test_get_blockset_index(self):
+        """An index returned from get_blockset_index must be between 0 and 6.
+        """
+        tetris = TetrisEngine()
+        for _ in range(10):
+            result = tetris.get_blockset_index()
+            with self.subTest(result):
+                self.assertTrue(0 <= result <= len(SHAPES) - 1)
+
+    def test_get_blockset_index_seed(self):
+        """The same seed must give the same sequence of blocks.
+        """
+        tetris_1 = TetrisEngine(seed=1)
+        tetris_2 = TetrisEngine(seed=1)
+        result_1 = [tetris_1.get_blockset_index() for _ in range(10)]
+        result_2 = [tetris_2.get_blockset_index() for _ in range(10)]
+        self.assertEqual(result_1, result_2)
+
+
+@mock.patch('tetris_engine.TetrisEngine.get_blockset_index')
+class TetrisEngineCreateBlockTestCase(TestCase):
+    """Tests for TetrisEngine.create_block
+    """
+
+    def test_create_block_next_block_is_none(self, mock_get_blockset_index):
+        """get_blockset_index must be called two times if next_blockset is None, and
+           index must be set to 0.
+        """
+        mock_get_blockset_index.side_effect = [1, 2]
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'next_blockset', None, create=True), \
+                mock.patch.object(tetris, 'index', 3, create=True):
+            tetris.create_block()
+            self.assertEqual(tetris.index, 0)
+            self.assertEqual(tetris.blockset_index, 1)
+            self.assertEqual(tetris.next_blockset, 2)
+            self.assertEqual(tetris.events, [Event.CREATED])
+        self.assertEqual(mock_get_blockset_index.call_count, 2)
+        self.assertEqual(
+            [[block.row, block.col] for block in tetris.blocks], SHAPES[1][0].tolist())
+
+    def test_create_block_next_block_is_not_none(self, mock_get_blockset_index):
+        """get_blockset_index must be called once if next_blockset is not None, and
+           index must be set to 0.
+        """
+        mock_get_blockset_index.return_value = 1
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'next_blockset', 0, create=True), \
+                mock.patch.object(tetris, 'index', 3, create=True):
+            tetris.create_block()
+            self.assertEqual(tetris.index, 0)
+            self.assertEqual(tetris.blockset_index, 0)
+            self.assertEqual(tetris.next_blockset, 1)
+        self.assertEqual(mock_get_blockset_index.call_count, 1)
+        self.assertEqual(
+            [[block.row, block.col] for block in tetris.blocks], SHAPES[0][0].tolist())
+
+    def test_create_block_reuse_blocks(self, mock_get_blockset_index):
+        """The blocks must be reused and put at the top with the offset reset.
+        """
+        mock_get_blockset_index.return_value = 1
+        tetris = TetrisEngine()
+        blocks = tetris.blocks[:]
+        tetris.row, tetris.col, tetris.index = 10, 3, 2
+
+        with mock.patch.object(tetris, 'next_blockset', 5, create=True):
+            tetris.create_block()
+
+        self.assertEqual((tetris.row, tetris.col, tetris.index), (0, 0, 0))
+        self.assertTrue(all(a is b for a, b in zip(tetris.blocks, blocks)))
+        self.assertEqual(
+            [[block.row, block.col] for block in tetris.blocks], SHAPES[5][0].tolist())
+
+
+class TetrisEngineUpdateMovingBlockTestCase(TestCase):
+    """Tests for TetrisEngine.update_moving_block
+    """
+
+    def setUp(self):
+        patcher_create_block = mock.patch('tetris_engine.TetrisEngine.create_block')
+        patcher_update_matrix = mock.patch('tetris_engine.TetrisEngine.update_matrix')
+        patcher_fits = mock.patch('tetris_engine.TetrisEngine.fits')
+        patcher_correct_top = mock.patch('tetris_engine.TetrisEngine.correct_top')
+        patcher_move_down = mock.patch('tetris_engine.TetrisEngine.move_down')
+        self.mock_create_block = patcher_create_block.start()
+        self.mock_update_matrix = patcher_update_matrix.start()
+        self.mock_fits = patcher_fits.start()
+        self.mock_correct_top = patcher_correct_top.start()
+        self.mock_move_down = patcher_move_down.start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_update_moving_block_move_down(self):
+        """If status is Status.Play and drop_timer is 0,
+           move_down is called and drop_timer set to default.
+        """
+        blocks = [DummyBlock(3, 4) for _ in range(4)]
+        timer_value = 40
+        tetris = TetrisEngine()
+        with mock.patch.object(tetris, 'status', Status.PLAY), \
+                mock.patch.object(tetris, 'drop_timer', 1, create=True), \
+                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
+                mock.patch.object(tetris, 'judge_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'blocks', blocks):
+            tetris.update_moving_block()
+            self.assertEqual(tetris.drop_timer, timer_value)
+            self.assertEqual(tetris.judge_timer, timer_value - 1)
+
+        self.mock_move_down.assert_called_once()
+        self.mock_correct_top.assert_not_called()
+        self.mock_fits.assert_not_called()
+        self.mock_update_matrix.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_update_moving_block_correct_top(self):
+        """If one of the blocks has row less than 0, correct_top must be called.
+        """
+        blocks = [DummyBlock(row, 4) for row in (-2, -1, 0, 1)]
+        timer_value = 40
+        tetris = TetrisEngine()
+        with mock.patch.object(tetris, 'status', Status.PLAY), \
+                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'judge_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'blocks', blocks):
+            tetris.update_moving_block()
+            self.assertEqual(tetris.drop_timer, timer_value - 1)
+            self.assertEqual(tetris.judge_timer, timer_value - 1)
+
+        self.mock_move_down.assert_not_called()
+        self.mock_correct_top.assert_called_with(-2)
+        self.mock_fits.assert_not_called()
+        self.mock_update_matrix.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_update_moving_block_judge_timer(self):
+        """If judge_timer is 0, it must be set to timer_value.
+        """
+        blocks = [DummyBlock(row, 4) for row in range(4)]
+        self.mock_fits.return_value = True
+        timer_value = 40
+        tetris = TetrisEngine()
+        with mock.patch.object(tetris, 'status', Status.PLAY), \
+                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
+                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
+                mock.patch.object(tetris, 'blocks', blocks):
+            tetris.update_moving_block()
+            self.assertEqual(tetris.drop_timer, timer_value - 1)
+            self.assertEqual(tetris.judge_timer, timer_value)
+
+        self.assertEqual(self.mock_fits.call_count, 1)
+        self.mock_update_matrix.assert_not_called()
+        self.mock_correct_top.assert_not_called()
+        self.mock_move_down.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_update_moving_block_waiting(self):
+        """If blocks cannot drop any more and full rows are found, ground_timer must be set to 50.
+        """
+        blocks = [DummyBlock(row, 4) for row in range(4)]
+        board = Board([0, FULL, 0])
+        self.mock_fits.return_value = False
+        timer_value = 40
+        tetris = TetrisEngine()
+        with mock.patch.object(tetris, 'status', Status.PLAY), \
+                mock.patch.object(tetris, 'full_rows', [1]), \
+                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
+                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
+                mock.patch.object(tetris, 'blocks', blocks), \
+                mock.patch.object(tetris, 'block_status', Status.DROPPING, create=True), \
+                mock.patch.object(tetris, 'board', board):
+            tetris.update_moving_block()
+            self.assertEqual(tetris.drop_timer, timer_value - 1)
+            self.assertEqual(tetris.judge_timer, timer_value)
+            self.assertEqual(tetris.ground_timer, 50)
+            self.assertEqual(tetris.block_status, Status.WAITING)
+            self.assertEqual(tetris.update, tetris.update_ground_blocks)
+
+        self.assertEqual(self.mock_fits.call_count, 1)
+        self.mock_update_matrix.assert_called_once()
+        self.mock_move_down.assert_not_called()
+        self.mock_correct_top.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_update_moving_block_gameover(self):
+        """If grounded blocks are in the top row, status must be set to Status.GAMEOVER.
+        """
+        blocks = [DummyBlock(row, 4) for row in range(4)]
+        board = Board([0b010, 0, 0])
+        self.mock_fits.return_value = False
+        timer_value = 40
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'status', Status.PLAY), \
+                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
+                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
+                mock.patch.object(tetris, 'blocks', blocks), \
+                mock.patch.object(tetris, 'block_status', Status.DROPPING, create=True), \
+                mock.patch.object(tetris, 'board', board):
+            tetris.update_moving_block()
+            self.assertEqual(tetris.drop_timer, timer_value - 1)
+            self.assertEqual(tetris.judge_timer, timer_value)
+            self.assertEqual(tetris.block_status, Status.DROPPING)
+            self.assertEqual(tetris.status, Status.GAMEOVER)
+            self.assertEqual(tetris.events, [Event.GAMEOVER])
+
+        self.assertEqual(self.mock_fits.call_count, 1)
+        self.mock_update_matrix.assert_called_once()
+        self.mock_move_down.assert_not_called()
+        self.mock_correct_top.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_update_moving_block_create_block(self):
+        """If blocks are grounded, create_block must be called.
+        """
+        blocks = [DummyBlock(row, 4) for row in range(4)]
+        board = Board([0, 0b010, 0])
+        self.mock_fits.return_value = False
+        timer_value = 40
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'status', Status.PLAY), \
+                mock.patch.object(tetris, 'timer_value', timer_value, create=True), \
+                mock.patch.object(tetris, 'drop_timer', timer_value, create=True), \
+                mock.patch.object(tetris, 'judge_timer', 1, create=True), \
+                mock.patch.object(tetris, 'blocks', blocks), \
+                mock.patch.object(tetris, 'block_status', Status.DROPPING, create=True), \
+                mock.patch.object(tetris, 'board', board):
+            tetris.update_moving_block()
+            self.assertEqual(tetris.drop_timer, 1)
+            self.assertEqual(tetris.judge_timer, timer_value)
+            self.assertEqual(tetris.block_status, Status.DROPPING)
+            self.assertEqual(tetris.status, Status.PLAY)
+
+        self.assertEqual(self.mock_fits.call_count, 1)
+        self.mock_update_matrix.assert_called_once()
+        self.mock_create_block.assert_called_once()
+        self.mock_move_down.assert_not_called()
+        self.mock_correct_top.assert_not_called()
+
+
+class TetrisEngineUpdateGroundBlocksTestCase(TestCase):
+    """Tests for TetrisEngine.update_moving_blocks
+    """
+
+    def setUp(self):
+        patcher_clear_block = mock.patch('tetris_engine.TetrisEngine.create_block')
+        patcher_move_ground_blocks = mock.patch('tetris_engine.TetrisEngine.move_ground_blocks')
+        patcher_delete_blocks = mock.patch('tetris_engine.TetrisEngine.delete_blocks')
+        self.mock_create_block = patcher_clear_block.start()
+        self.mock_move_ground_blocks = patcher_move_ground_blocks.start()
+        self.mock_delete_blocks = patcher_delete_blocks.start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_no_deleted_rows(self):
+        """If ground_timer is 40 and deleted_rows is 0, no methods are called.
+        """
+        self.mock_delete_blocks.return_value = 0
+        mock_score = mock.MagicMock()
+        mock_add = mock.MagicMock()
+        mock_score.add = mock_add
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'ground_timer', 41, create=True), \
+                mock.patch.object(tetris, 'score', mock_score, create=True), \
+                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True):
+            tetris.update_ground_blocks()
+            self.assertEqual(tetris.ground_timer, 40)
+            self.assertEqual(tetris.block_status, Status.WAITING)
+
+        self.mock_delete_blocks.assert_called_once()
+        self.assertEqual(tetris.events, [])
+        mock_add.assert_not_called()
+        self.mock_move_ground_blocks.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_deleted_rows_same_level(self):
+        """If deleted_rows is not 0 but level is not changed, add method is called.
+        """
+        self.mock_delete_blocks.return_value = 3
+        mock_score = mock.MagicMock(level=1)
+        mock_add = mock.MagicMock()
+        mock_score.add = mock_add
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'ground_timer', 41, create=True), \
+                mock.patch.object(tetris, 'score', mock_score, create=True), \
+                mock.patch.object(tetris, 'level', 1, create=True), \
+                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True):
+            tetris.update_ground_blocks()
+            self.assertEqual(tetris.ground_timer, 40)
+            self.assertEqual(tetris.block_status, Status.WAITING)
+
+        self.mock_delete_blocks.assert_called_once()
+        self.assertEqual(tetris.events, [Event.DELETED])
+        mock_add.assert_called_once_with(self.mock_delete_blocks.return_value)
+        self.mock_move_ground_blocks.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_deleted_rows_not_same_level(self):
+        """If deleted_rows is not 0 and level is changed, add method is called.
+        """
+        self.mock_delete_blocks.return_value = 3
+        mock_score = mock.MagicMock(level=2)
+        mock_add = mock.MagicMock()
+        mock_score.add = mock_add
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'ground_timer', 41, create=True), \
+                mock.patch.object(tetris, 'timer_value', 20, create=True), \
+                mock.patch.object(tetris, 'score', mock_score, create=True), \
+                mock.patch.object(tetris, 'level', 1, create=True), \
+                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True):
+            tetris.update_ground_blocks()
+            self.assertEqual(tetris.ground_timer, 40)
+            self.assertEqual(tetris.timer_value, 18)
+            self.assertEqual(tetris.level, 2)
+            self.assertEqual(tetris.block_status, Status.WAITING)
+
+        self.mock_delete_blocks.assert_called_once()
+        self.assertEqual(tetris.events, [Event.DELETED])
+        mock_add.assert_called_once_with(self.mock_delete_blocks.return_value)
+        self.mock_move_ground_blocks.assert_not_called()
+        self.mock_create_block.assert_not_called()
+
+    def test_move_ground_blocks(self):
+        """If ground_timer is 20, move_ground_blocks must be called.
+        """
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'ground_timer', 21, create=True):
+            tetris.update_ground_blocks()
+            self.assertEqual(tetris.events, [Event.MOVED])
+
+        self.mock_delete_blocks.assert_not_called()
+        self.mock_move_ground_blocks.assert_called_once()
+        self.mock_create_block.assert_not_called()
+
+    def test_create_block(self):
+        """If ground_timer is 0, create_block must be called.
+        """
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'ground_timer', 1, create=True), \
+                mock.patch.object(tetris, 'drop_timer', 20, create=True), \
+                mock.patch.object(tetris, 'block_status', Status.WAITING, create=True), \
+                mock.patch.object(tetris, 'update', tetris.update_ground_blocks, create=True):
+            tetris.update_ground_blocks()
+            self.assertEqual(tetris.ground_timer, 0)
+            self.assertEqual(tetris.drop_timer, 1)
+            self.assertEqual(tetris.block_status, Status.DROPPING)
+            self.assertEqual(tetris.update, tetris.update_moving_block)
+
+        self.mock_delete_blocks.assert_not_called()
+        self.mock_move_ground_blocks.assert_not_called()
+        self.mock_create_block.assert_called_once()
+
+
+class TetrisEngineDeleteBlocksTestCase(TestCase):
+    """Tests for TetrisEngine.delete_blocks
+    """
+
+    def test_no_deleted_rows(self):
+        tetris = TetrisEngine()
+        result = tetris.delete_blocks()
+
+        self.assertEqual(result, 0)
+
+    def test_deleted_rows(self):
+        board = Board([0, FULL, FULL, 0b010, 0])
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'board', board), \
+                mock.patch.object(tetris, 'full_rows', [1, 2]):
+            result = tetris.delete_blocks()
+            self.assertEqual(result, 2)
+            self.assertEqual(tetris.deleted_rows, [1, 2])
+            self.assertEqual(tetris.full_rows, [])
+
+        self.assertEqual(board.rows, [0, 0, 0, 0b010, 0])
+
+
+class TetrisEngineMoveGroundBlocksTestCase(TestCase):
+    """Tests for TetrisEngine.move_ground_blocks
+    """
+
+    def test_move_ground_blocks(self):
+        """Only the rows above the deleted rows must be moved down.
+        """
+        tests = (
+            ([0, 0b00010, 0b00011, 0b10000, 0, 0], [4, 5]),
+            ([0, 0b00010, 0b01011, 0, 0, 0b01010], [3, 4]),
+            ([0b00010, 0, 0b00011, 0, 0b10000, 0b01010], [1, 3]),
+            ([0, 0b00010, 0b00011, 0b10000], [])
+        )
+        expects = (
+            [0, 0, 0, 0b00010, 0b00011, 0b10000],
+            [0, 0, 0, 0b00010, 0b01011, 0b01010],
+            [0, 0, 0b00010, 0b00011, 0b10000, 0b01010],
+            [0, 0b00010, 0b00011, 0b10000]
+        )
+        tetris = TetrisEngine()
+
+        for (test, deleted_rows), expect in zip(tests, expects):
+            with mock.patch.object(tetris, 'board', Board(test)), \
+                    mock.patch.object(tetris, 'deleted_rows', deleted_rows):
+                tetris.move_ground_blocks()
+                with self.subTest(expect):
+                    self.assertEqual(tetris.board.rows, expect)
+
+
+class LoadKernelTestCase(TestCase):
+    """Tests for load_kernel
+    """
+
+    def create_module(self, names):
+        module = types.ModuleType('pytetris_utils')
+        for name in names:
+            setattr(module, name, getattr(pytetris_utils_py, name))
+        return module
+
+    def test_outdated(self):
+        """The pure Python implementation must be used instead of an extension
+           module built from an older version.
+        """
+        module = self.create_module(['update_blockset_row', 'update_blockset_col'])
+        with mock.patch.dict(sys.modules, {'pytetris_utils': module}):
+            self.assertIs(load_kernel(), pytetris_utils_py)
+
+    def test_not_built(self):
+        with mock.patch.dict(sys.modules, {'pytetris_utils': None}):
+            self.assertIs(load_kernel(), pytetris_utils_py)
+
+    def test_built(self):
+        module = self.create_module(KERNEL_FUNCTIONS)
+        with mock.patch.dict(sys.modules, {'pytetris_utils': module}):
+            self.assertIs(load_kernel(), module)
+
+
+class CollisionTableTestCase(TestCase):
+    """Tests for COLLISION_TABLE
+    """
+
+    def test_collision_table(self):
+        """Masks must have the same cells as SHAPES, and the range of columns
+           must keep blocks inside the walls.
+        """
+        for i, shape in enumerate(SHAPES):
+            for j, rotation in enumerate(COLLISION_TABLE[i]):
+                with self.subTest((i, j)):
+                    cols = shape[j][:, 1]
+                    self.assertEqual(rotation.left, -cols.min())
+                    self.assertEqual(rotation.right, COLS - 1 - cols.max())
+                    self.assertEqual(rotation.bottom, shape[j][:, 0].max())
+                    self.assertEqual(
+                        rotation.profile,
+                        tuple((col, shape[j][shape[j][:, 1] == col][:, 0].max()) for col in sorted(set(cols))))
+                    self.assertEqual(list(rotation.masks), list(range(rotation.left, rotation.right + 1)))
+                    for col, masks in rotation.masks.items():
+                        cells = set((row, c) for row, mask in masks
+                                    for c in range(COLS) if mask >> c & 1)
+                        self.assertEqual(cells, set((row, c + col) for row, c in shape[j]))
+
+
+class TetrisEngineFitsTestCase(TestCase):
+    """Tests for fits and judge_rotate of TetrisEngine
+    """
+
+    def setUp(self):
+        self.board = Board([0] * (ROWS - 2) + [0b00011, 0b10000])
+        self.tetris = TetrisEngine()
+        # BLUE: [[-1, 4], [0, 4], [1, 4], [2, 4]] and [[-1, 4], [-1, 5], [-1, 6], [-1, 7]]
+        self.tetris.blockset_index = 0
+
+    def test_fits(self):
+        """Test for fits
+        """
+        tests = [
+            (0, 0, 0), (0, 0, -4), (0, 0, -5), (0, 0, 5), (0, 0, 6),
+            (0, -3, 0), (0, ROWS - 4, 0), (0, ROWS - 3, 0), (0, ROWS - 2, -4),
+            (1, ROWS - 1, -4), (1, ROWS - 1, -2), (1, ROWS, -4), (1, ROWS, -3), (1, ROWS + 1, 0)]
+        expects = [
+            True, True, False, True, False,
+            True, True, False, False,
+            False, True, True, False, False]
+
+        with mock.patch.object(self.tetris, 'board', self.board):
+            for test, expect in zip(tests, expects):
+                with self.subTest((test, expect)):
+                    self.assertEqual(self.tetris.fits(*test), expect)
+
+    def test_judge_rotate(self):
+        """Test for judge_rotate
+        """
+        # (row, col, index) -> (rotatable, over)
+        tests = [(0, 0, 1), (0, 3, 1), (0, 5, 1), (ROWS - 1, -3, 1), (ROWS - 2, 0, 0)]
+        expects = [(True, 0), (True, 1), (True, 3), (False, 0), (False, 0)]
+
+        with mock.patch.object(self.tetris, 'board', self.board):
+            for (row, col, index), expect in zip(tests, expects):
+                with self.subTest(((row, col, index), expect)):
+                    self.tetris.row = row
+                    self.tetris.col = col
+                    self.assertEqual(self.tetris.judge_rotate(index), expect)
+
+
+class TetrisEngineDropTestCase(TestCase):
+    """Tests for drop_distance, ghost_blocks and hard_drop of TetrisEngine
+    """
+
+    def setUp(self):
+        self.tetris = TetrisEngine()
+        self.tetris.blockset_index = 0
+        self.tetris.blocks = [Block(row, col) for row, col in SHAPES[0][0]]
+        self.tetris.judge_timer = 40
+
+    def test_drop_distance(self):
+        """The distance must be decided by the highest column under the blocks.
+        """
+        tests = [
+            ([0] * ROWS, 0),
+            ([0] * (ROWS - 1) + [0b10000], 0),
+            ([0] * (ROWS - 5) + [0b10000] + [0] * 4, 0),
+            ([0] * ROWS, 1)]
+        # BLUE in the column 4 and rotated at the row -1
+        expects = [ROWS - 3, ROWS - 4, ROWS - 8, ROWS]
+
+        for (rows, index), expect in zip(tests, expects):
+            with self.subTest((rows, index, expect)):
+                self.tetris.board = Board(rows)
+                self.tetris.index = index
+                self.assertEqual(self.tetris.drop_distance(), expect)
+                self.assertEqual(self.tetris.landing_row(), expect)
+
+    def test_drop_distance_under_blocks(self):
+        """Blocks slid under other blocks must drop until they are grounded.
+        """
+        self.tetris.board = Board([0] * (ROWS - 4) + [0b10000, 0, 0, 0])
+        self.tetris.index = 1
+        self.tetris.row = ROWS - 3
+        self.assertEqual(self.tetris.drop_distance(), 3)
+
+    def test_ghost_blocks(self):
+        self.tetris.board = Board([0] * (ROWS - 1) + [0b10000])
+        self.assertEqual(
+            self.tetris.ghost_blocks(), [(ROWS - 5, 4), (ROWS - 4, 4), (ROWS - 3, 4), (ROWS - 2, 4)])
+
+    def test_hard_drop(self):
+        """Blocks must be moved to the landing row and grounded in the next update.
+        """
+        self.tetris.board = Board()
+        with mock.patch.object(self.tetris, 'move_down') as mock_move_down:
+            self.tetris.hard_drop()
+            mock_move_down.assert_called_once_with(ROWS - 3)
+        self.assertEqual(self.tetris.judge_timer, 1)
+
+
+class TetrisEngineCorrectTopTestCase(TestCase):
+    """Tests for correct_top
+    """
+
+    def test_correct_top(self):
+        expects = [(-2, 3), (-1, 3), (0, 3), (1, 3)]
+        blocks = []
+        for row, col in expects:
+            blocks.append(mock.MagicMock(row=row, col=col))
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.correct_top(-2)
+            self.assertEqual(tetris.row, 2)
+
+        for block, (row, col) in zip(blocks, expects):
+            with self.subTest():
+                self.assertEqual((block.row - 2, block.col), (row, col))
+
+
+class TetrisEngineUpdateMatrixTestCase(TestCase):
+    """Tests for update_matrix
+    """
+
+    def test_update_matrix(self):
+        blocks = [
+            DummyBlock(2, 4),
+            DummyBlock(3, 4),
+            DummyBlock(4, 4),
+            DummyBlock(5, 4)]
+        board = Board([0] * 10)
+        expects = set((block.row, block.col) for block in blocks)
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'blocks', blocks), \
+                mock.patch.object(tetris, 'board', board):
+            tetris.update_matrix()
+            self.assertEqual(tetris.grounded_blocks, [(2, 4), (3, 4), (4, 4), (5, 4)])
+            self.assertEqual(tetris.full_rows, [])
+            self.assertEqual(tetris.events, [Event.GROUNDED])
+
+        for i in range(10):
+            for j in range(5):
+                with self.subTest((i, j)):
+                    self.assertEqual(board.is_filled(i, j), (i, j) in expects)
+
+
+class TetrisEngineMoveMethodsTestCase(TestCase):
+    """Tests for move methods in TetrisEngine
+    """
+
+    def setUp(self):
+        patcher_fits = mock.patch('tetris_engine.TetrisEngine.fits')
+        self.mock_fits = patcher_fits.start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def get_brockset(self):
+        blocks = [
+            mock.MagicMock(row=2, col=4),
+            mock.MagicMock(row=2, col=5),
+            mock.MagicMock(row=3, col=4),
+            mock.MagicMock(row=3, col=5)]
+        return blocks
+
+    def test_move_right_fits_return_true(self):
+        """If fits returns True, columns of blocks must be incremented by +1.
+        """
+        self.mock_fits.return_value = True
+        tetris = TetrisEngine()
+        expect = [(2, 5), (2, 6), (3, 5), (3, 6)]
+        blocks = self.get_brockset()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.move_right()
+            self.assertEqual(tetris.col, 1)
+
+        for i in range(len(blocks)):
+            with self.subTest():
+                block = blocks[i]
+                self.assertEqual((block.row, block.col), expect[i])
+
+    def test_move_right_fits_return_false(self):
+        """If fits returns False, columns of blocks must not be changed.
+        """
+        self.mock_fits.return_value = False
+        tetris = TetrisEngine()
+        expect = [(2, 4), (2, 5), (3, 4), (3, 5)]
+        blocks = self.get_brockset()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.move_right()
+            self.assertEqual(tetris.col, 0)
+
+        for i in range(len(blocks)):
+            with self.subTest():
+                block = blocks[i]
+                self.assertEqual((block.row, block.col), expect[i])
+
+    def test_move_left_fits_return_true(self):
+        """If fits returns True, columns of blocks must be incremented by -1.
+        """
+        self.mock_fits.return_value = True
+        tetris = TetrisEngine()
+        expect = [(2, 3), (2, 4), (3, 3), (3, 4)]
+        blocks = self.get_brockset()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.move_left()
+            self.assertEqual(tetris.col, -1)
+
+        for i in range(len(blocks)):
+            with self.subTest():
+                block = blocks[i]
+                self.assertEqual((block.row, block.col), expect[i])
+
+    def test_move_left_fits_return_false(self):
+        """If fits returns False, columns of blocks must not be changed.
+        """
+        self.mock_fits.return_value = False
+        tetris = TetrisEngine()
+        expect = [(2, 4), (2, 5), (3, 4), (3, 5)]
+        blocks = self.get_brockset()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.move_left()
+            self.assertEqual(tetris.col, 0)
+
+        for i in range(len(blocks)):
+            with self.subTest():
+                block = blocks[i]
+                self.assertEqual((block.row, block.col), expect[i])
+
+    def test_move_down_fits_return_true(self):
+        """If fits returns True, rows of blocks must be incremented by +1.
+        """
+        self.mock_fits.return_value = True
+        tetris = TetrisEngine()
+        expect = [(3, 4), (3, 5), (4, 4), (4, 5)]
+        blocks = self.get_brockset()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.move_down()
+            self.assertEqual(tetris.row, 1)
+
+        for i in range(len(blocks)):
+            with self.subTest():
+                block = blocks[i]
+                self.assertEqual((block.row, block.col), expect[i])
+
+    def test_move_down_fits_return_false(self):
+        """If fits returns False, rows of blocks must not be changed.
+        """
+        self.mock_fits.return_value = False
+        tetris = TetrisEngine()
+        expect = [(2, 4), (2, 5), (3, 4), (3, 5)]
+        blocks = self.get_brockset()
+
+        with mock.patch.object(tetris, 'blocks', blocks):
+            tetris.move_down()
+            self.assertEqual(tetris.row, 0)
+
+        for i in range(len(blocks)):
+            with self.subTest():
+                block = blocks[i]
+                self.assertEqual((block.row, block.col), expect[i])
+
+
+class TetrisEngineRepeatHeldTestCase(TestCase):
+    """Tests for the moves repeated while the keys are held
+    """
+
+    def create_engine(self, **kwargs):
+        tetris = TetrisEngine(seed=0, **kwargs)
+        tetris.initialize()
+        # Keep the blocks from falling by themselves.
+        tetris.drop_timer = tetris.judge_timer = 10 ** 6
+        return tetris
+
+    def test_das_arr(self):
+        """The held side must be shifted after DAS ticks, and then every ARR ticks.
+        """
+        tetris = self.create_engine(das=3, arr=2)
+        tetris.step([Action.LEFT], [Action.LEFT])
+        cols = [tetris.col]
+        for _ in range(6):
+            tetris.step([], [Action.LEFT])
+            cols.append(tetris.col)
+        self.assertEqual(cols, [-1, -1, -1, -2, -2, -3, -3])
+
+    def test_arr_zero(self):
+        """With ARR 0, the blocks must slide to the wall at once after DAS.
+        """
+        tetris = self.create_engine(das=2, arr=0)
+        tetris.step([], [Action.RIGHT])
+        tetris.step([], [Action.RIGHT])
+        self.assertEqual(tetris.col, 0)
+        tetris.step([], [Action.RIGHT])
+        self.assertFalse(tetris.fits(tetris.index, tetris.row, tetris.col + 1))
+        self.assertEqual(max(block.col for block in tetris.blocks), COLS - 1)
+
+    def test_last_pressed(self):
+        """The side pressed last must be shifted, starting DAS again.
+        """
+        tetris = self.create_engine(das=2, arr=1)
+        for _ in range(3):
+            tetris.step([], [Action.LEFT])
+        self.assertEqual(tetris.col, -1)
+        tetris.step([], [Action.LEFT, Action.RIGHT])
+        tetris.step([], [Action.LEFT, Action.RIGHT])
+        self.assertEqual(tetris.col, -1)
+        tetris.step([], [Action.LEFT, Action.RIGHT])
+        self.assertEqual(tetris.col, 0)
+
+    def test_hard_drop(self):
+        """The blocks hard-dropped on the tick when the held side is shifted must be
+           grounded at the ghosts, without being shifted off them.
+        """
+        for direction in (Action.LEFT, Action.RIGHT):
+            for ledge in (False, True):
+                with self.subTest((direction, ledge)):
+                    tetris = self.create_engine(das=3, arr=2)
+                    if ledge:
+                        # Shifting the blocks to the right moves them off the ledge.
+                        tetris.board = Board([0] * 14 + [0b0000000111] * (ROWS - 14))
+                        tetris.slide(-1)
+                    tetris.step([], [direction])
+                    while tetris.shift_timer != 1:
+                        tetris.step([], [direction])
+                    ghosts = tetris.ghost_blocks()
+                    self.assertIn(Event.GROUNDED, tetris.step([Action.HARD_DROP], [direction]))
+                    self.assertEqual(sorted(tetris.grounded_blocks), sorted(ghosts))
+
+    def test_released(self):
+        tetris = self.create_engine(das=2, arr=1)
+        tetris.step([], [Action.LEFT])
+        tetris.step([], [])
+        tetris.step([], [Action.LEFT])
+        self.assertEqual(tetris.col, 0)
+
+    def test_soft_drop(self):
+        tetris = self.create_engine(soft_drop=2)
+        tetris.step()
+        row = tetris.row
+        for _ in range(4):
+            tetris.step([], [Action.DOWN])
+        self.assertEqual(tetris.row, row + 2)
+
+    def test_tick_rate(self):
+        """DAS and ARR must be kept in seconds at any tick rate, and ARR 0 must stay 0.
+        """
+        tetris = TetrisEngine(tick_rate=240, das=10, arr=2)
+        self.assertEqual((tetris.das, tetris.arr), (40, 8))
+        self.assertEqual(TetrisEngine(tick_rate=240, arr=0).arr, 0)
+
+
+class TetrisEngineRotateTestCase(TestCase):
+    """Tests for rotate mothod
+    """
+
+    def setUp(self):
+        patcher_judge_rotate = mock.patch('tetris_engine.TetrisEngine.judge_rotate')
+        self.mock_judge_rotate = patcher_judge_rotate.start()
+        # PURPLE
+        self.blockset_index = 4
+        self.blocks = [
+            mock.MagicMock(row=-1, col=3),
+            mock.MagicMock(row=-1, col=4),
+            mock.MagicMock(row=-1, col=5),
+            mock.MagicMock(row=0, col=4)]
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_rotatable_is_true(self):
+        """If judge_rotate returns True, block must be rotated.
+        """
+        self.mock_judge_rotate.return_value = (True, 2)
+        expects = [(-1, 2), (0, 2), (1, 2), (0, 3)]
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'index', 2, create=True), \
+                mock.patch.object(tetris, 'blockset_index', self.blockset_index), \
+                mock.patch.object(tetris, 'blocks', self.blocks, create=True):
+            tetris.rotate()
+            self.assertEqual(tetris.events, [Event.ROTATED])
+            self.assertEqual(tetris.index, 3)
+            self.assertEqual(tetris.col, -2)
+
+        for block, expect in zip(self.blocks, expects):
+            with self.subTest():
+                self.assertEqual((block.row, block.col), expect)
+
+    def test_rotatable_is_false(self):
+        """If judge_rotate returns True, block is not rotated.
+        """
+        self.mock_judge_rotate.return_value = (False, 0)
+        expects = [(-1, 3), (-1, 4), (-1, 5), (0, 4)]
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'index', 1, create=True), \
+                mock.patch.object(tetris, 'blockset_index', self.blockset_index), \
+                mock.patch.object(tetris, 'blocks', self.blocks, create=True):
+            tetris.rotate()
+            self.assertEqual(tetris.events, [])
+            self.assertEqual(tetris.index, 1)
+
+        for block, expect in zip(self.blocks, expects):
+            with self.subTest():
+                self.assertEqual((block.row, block.col), expect)
+
+    def test_rotatable_index_set_to_0(self):
+        """If judge_rotate returns True, block must be rotated.
+        """
+        self.mock_judge_rotate.return_value = (True, 0)
+        expects = [(-1, 4), (0, 3), (0, 4), (0, 5)]
+        tetris = TetrisEngine()
+
+        with mock.patch.object(tetris, 'index', 3, create=True), \
+                mock.patch.object(tetris, 'blockset_index', self.blockset_index), \
+                mock.patch.object(tetris, 'blocks', self.blocks, create=True):
+            tetris.rotate()
+            self.assertEqual(tetris.events, [Event.ROTATED])
+            self.assertEqual(tetris.index, 0)
+
+        for block, expect in zip(self.blocks, expects):
+            with self.subTest():
+                self.assertEqual((block.row, block.col), expect)
+
+
+class TetrisEngineTickRateTestCase(TestCase):
+    """Tests for the timers of TetrisEngine at tick rates other than TICK_RATE
+    """
+
+    def test_ticks(self):
+        tests = [60, 240, 30]
+        expects = [(40, 2), (160, 8), (20, 1)]
+
+        for test, expect in zip(tests, expects):
+            with self.subTest((test, expect)):
+                tetris = TetrisEngine(tick_rate=test)
+                tetris.initialize()
+                self.assertEqual((tetris.timer_value, tetris.ticks(2)), expect)
+
+    def test_drop_time(self):
+        """Blocks must drop at the same time in seconds at any tick rate.
+        """
+        for tick_rate in [60, 240]:
+            tetris = TetrisEngine(seed=0, tick_rate=tick_rate)
+            tetris.initialize()
+            for _ in range(tick_rate * 2):
+                tetris.step()
+            with self.subTest(tick_rate):
+                # 1 row corrected at the first tick, and 1 row every 40 / 60 seconds
+                self.assertEqual(tetris.row, 4)
+
+
+class TetrisEngineSnapshotTestCase(TestCase):
+    """Tests for TetrisEngine.snapshot
+    """
+
+    def test_snapshot(self):
+        tetris = TetrisEngine(seed=0)
+        tetris.initialize()
+        tetris.step()
+        snapshot = tetris.snapshot()
+        self.assertEqual((snapshot.tick, snapshot.piece, snapshot.status), (1, 1, Status.PLAY))
+        self.assertEqual(snapshot.blocks, tuple((block.row, block.col) for block in tetris.blocks))
+        self.assertEqual(snapshot.ghosts, tuple(tetris.ghost_blocks()))
+        self.assertEqual(snapshot.rows, tuple(tetris.board.rows))
+        self.assertEqual((snapshot.level, snapshot.lines, snapshot.score), (1, 0, 0))
+
+    def test_immutable(self):
+        """The snapshot must not be changed by the following ticks.
+        """
+        tetris = TetrisEngine(seed=0)
+        tetris.initialize()
+        snapshot = tetris.snapshot()
+        blocks = [(block.row, block.col) for block in tetris.blocks]
+        for _ in range(200):
+            tetris.step([Action.HARD_DROP])
+        self.assertEqual(list(snapshot.blocks), blocks)
+        self.assertEqual(snapshot.rows, (0,) * ROWS)
+        self.assertGreater(tetris.snapshot().piece, snapshot.piece)
+
+    def test_ghosts_waiting(self):
+        tetris = TetrisEngine(seed=0)
+        self.assertEqual(tetris.snapshot().ghosts, ())
+
+
+class SchedulerTestCase(TestCase):
+    """Tests for Scheduler
+    """
+
+    def setUp(self):
+        self.now = 0.0
+        self.scheduler = Scheduler(60, clock=lambda: self.now)
+
+    def test_advance(self):
+        """Ticks must be counted by the clock, keeping the remainder for the next call.
+        """
+        tests = [1 / 120, 1 / 120, 1 / 30, 0.01, 0.0]
+        expects = [0, 1, 2, 0, 0]
+
+        for test, expect in zip(tests, expects):
+            self.now += test
+            with self.subTest((self.now, expect)):
+                self.assertEqual(self.scheduler.advance(), expect)
+
+    def test_advance_max_ticks(self):
+        """After a long stall, the ticks must be limited and the rest must be dropped.
+        """
+        self.now += 10
+        self.assertEqual(self.scheduler.advance(), 15)
+        self.now += 1 / 60
+        self.assertEqual(self.scheduler.advance(), 1)
+
+    def test_alpha(self):
+        """The fraction of the next tick must be given by the remainder of the time.
+        """
+        self.now += 1.5 / 60
+        self.scheduler.advance()
+        self.assertAlmostEqual(self.scheduler.alpha, 0.5)
+        self.now += 10
+        self.scheduler.advance()
+        self.assertEqual(self.scheduler.alpha, 0.0)
+
+    def test_reset(self):
+        self.now += 1
+        self.scheduler.reset()
+        self.now += 1 / 60
+        self.assertEqual(self.scheduler.advance(), 1)
+
+
+class ScoreTestCase(TestCase):
+    """Tests for Score class
+    """
+
+    def test_add(self):
+        tests = [1, 2, 3, 4]
+        # (lines, level, score)
+        expects = [(1, 1, 40), (3, 1, 140), (6, 1, 440), (10, 2, 2840)]
+        score = Score()
+
+        for test, expect in zip(tests, expects):
+            with self.subTest():
+                score.add(test)
+                self.assertEqual(
+                    (score.lines, score.level, score.score), expect)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""AI player of PyTetris which searches every placement of the dropping blocks.
+
+Planner puts the current blockset at every rotation and column which can be reached
+from where it is, on a copy of the row masks of the board, then the next blockset on
+each of the results. The boards are scored by Weights of the holes, the aggregate
+height, the bumpiness and the deleted lines. AIPlayer turns the best placement into
+the actions of TetrisEngine.step, so the same player runs headless and in main()
+of pytetris.
+
+Play games headless and show the speed of the search:
+    python tetris_ai.py
+"""
+import time
+from collections import deque, namedtuple
+
+from tetris_engine import COLLISION_TABLE, COLS, FULL, ROWS, Action, Status, TetrisEngine, kernel
+
+
+Weights = namedtuple('Weights', 'holes aggregate_height bumpiness lines')
+Placement = namedtuple('Placement', 'index col row score')
+
+WEIGHTS = Weights(holes=-0.35663, aggregate_height=-0.510066, bumpiness=-0.184483, lines=0.760666)
+
+# the columns of the bits set in each row mask, and the number of them
+COLUMNS = [tuple(col for col in range(COLS) if mask >> col & 1) for mask in range(FULL + 1)]
+BIT_COUNTS = [len(cols) for cols in COLUMNS]
+
+
+def create_rotations():
+    """Return the (index, Rotation) pairs of each blockset, leaving out the rotations
+       which have the same cells as an earlier one.
+    """
+    table = []
+    for rotations in COLLISION_TABLE:
+        unique = {}
+        for index, rotation in enumerate(rotations):
+            unique.setdefault(frozenset(rotation.cells), (index, rotation))
+        table.append(list(unique.values()))
+    return table
+
+
+ROTATIONS = create_rotations()
+
+
+class Planner:
+    """Exhaustive search of the placements, scored by the weights.
+        Args:
+            weights: Weights of the features of the board after a placement
+    """
+
+    def __init__(self, weights=WEIGHTS):
+        self.weights = weights
+        # the number of the boards scored and the seconds spent by search
+        self.evaluated = 0
+        self.elapsed = 0.0
+
+    def analyze(self, rows):
+        """Return (heights, aggregate height, holes, bumpiness) of the row masks.
+           A hole is an empty cell under a filled cell in the same column.
+        """
+        heights = [0] * COLS
+        covered = 0
+        holes = 0
+        for i, row in enumerate(rows):
+            if new := row & ~covered:
+                height = ROWS - i
+                for col in COLUMNS[new]:
+                    heights[col] = height
+                covered |= row
+            holes += BIT_COUNTS[covered & ~row]
+        bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        return heights, sum(heights), holes, bumpiness
+
+    def placements(self, rows, heights, blockset, row=0, col=0):
+        """Yield (index, col, row, rows, lines) of each placement. The blocks are rotated
+           at the offset (row, col), moved to the columns reachable on that row and dropped.
+           The full rows are deleted from the rows after the placement.
+        """
+        for index, rotation in ROTATIONS[blockset]:
+            masks = rotation.masks
+            start = min(max(col, rotation.left), rotation.right)
+            if kernel.collides(rows, masks[start], row):
+                continue
+            left = right = start
+            while left - 1 >= rotation.left and not kernel.collides(rows, masks[left - 1], row):
+                left -= 1
+            while right + 1 <= rotation.right and not kernel.collides(rows, masks[right + 1], row):
+                right += 1
+
+            for c in range(left, right + 1):
+                cells = masks[c]
+                landed = row + kernel.drop_distance(
+                    rows, heights, rotation.profile, cells, rotation.bottom, row, c)
+                # The blocks left above the block area end the game.
+                if cells[0][0] + landed < 0:
+                    continue
+                placed = rows[:]
+                for r, mask in cells:
+                    placed[r + landed] |= mask
+                lines = sum(placed[r + landed] == FULL for r, _ in cells)
+                if lines:
+                    placed = [0] * lines + [mask for mask in placed if mask != FULL]
+                yield index, c, landed, placed, lines
+
+    def score(self, aggregate, holes, bumpiness, lines):
+        weights = self.weights
+        return (weights.aggregate_height * aggregate + weights.holes * holes
+                + weights.bumpiness * bumpiness + weights.lines * lines)
+
+    def best_score(self, rows, heights, blockset, lines):
+        """Return the best score of the placements of the blockset, or None if it cannot be put.
+        """
+        best = None
+        for _, _, _, placed, deleted in self.placements(rows, heights, blockset):
+            _, aggregate, holes, bumpiness = self.analyze(placed)
+            self.evaluated += 1
+            score = self.score(aggregate, holes, bumpiness, lines + deleted)
+            if best is None or score > best:
+                best = score
+        return best
+
+    def search(self, rows, blockset, next_blockset=None, row=0, col=0):
+        """Return the best Placement of the blockset, or None if it cannot be put anywhere.
+           Args:
+                rows: list of the row masks of the board
+                blockset: int, the index of the dropping blockset
+                next_blockset: int, the index of the next blockset to look ahead, or None
+                row: int, the row offset of the dropping blocks from SHAPES
+                col: int, the column offset of the dropping blocks from SHAPES
+        """
+        start = time.perf_counter()
+        heights = self.analyze(rows)[0]
+        best = None
+        for index, c, landed, placed, lines in self.placements(rows, heights, blockset, row, col):
+            placed_heights, aggregate, holes, bumpiness = self.analyze(placed)
+            self.evaluated += 1
+            score = self.score(aggregate, holes, bumpiness, lines)
+            if next_blockset is not None:
+                ahead = self.best_score(placed, placed_heights, next_blockset, lines)
+                # The placements after which the next blocks cannot be put come last.
+                score = float('-inf') if ahead is None else ahead
+            if best is None or score > best.score:
+                best = Placement(index, c, landed, score)
+        self.elapsed += time.perf_counter() - start
+        return best
+
+
+class AIPlayer:
+    """Player which gives the actions to move the dropping blocks to the best placement.
+        Args:
+            engine: TetrisEngine to play
+            planner: Planner, or None for the default weights
+            delay: int, ticks between the actions, or 0 to take all of them in one tick
+            lookahead: bool, True to look ahead the next blockset
+    """
+
+    def __init__(self, engine, planner=None, delay=0, lookahead=True):
+        self.engine = engine
+        self.planner = Planner() if planner is None else planner
+        self.delay = delay
+        self.lookahead = lookahead
+        self.piece = None
+        self.moves = deque()
+        self.timer = 0
+
+    def plan(self):
+        """Return the actions from the current position to the best placement.
+        """
+        engine = self.engine
+        placement = self.planner.search(
+            engine.board.rows, engine.blockset_index,
+            engine.next_blockset if self.lookahead else None, engine.row, engine.col)
+        if placement is None:
+            return [Action.HARD_DROP]
+
+        rotations = COLLISION_TABLE[engine.blockset_index]
+        index, col = engine.index, engine.col
+        moves = []
+        while index != placement.index:
+            # The rotated blocks are pushed back inside the walls as judge_rotate does.
+            index = (index + 1) % len(rotations)
+            col = min(max(col, rotations[index].left), rotations[index].right)
+            moves.append(Action.ROTATE)
+        step = Action.RIGHT if placement.col > col else Action.LEFT
+        moves.extend([step] * abs(placement.col - col))
+        moves.append(Action.HARD_DROP)
+        return moves
+
+    def act(self):
+        """Return the actions to pass to TetrisEngine.step in this tick.
+        """
+        engine = self.engine
+        if engine.status != Status.PLAY or engine.block_status != Status.DROPPING:
+            return []
+        if engine.pieces != self.piece:
+            self.piece = engine.pieces
+            self.moves = deque(self.plan())
+            self.timer = 0
+        if not self.delay:
+            moves = list(self.moves)
+            self.moves.clear()
+            return moves
+        self.timer -= 1
+        if self.timer > 0 or not self.moves:
+            return []
+        self.timer = self.delay
+        return [self.moves.popleft()]
+
+
+def play(engine, player, pieces=None):
+    """Play a game headless until it is over or the pieces are used.
+       Args:
+            engine: TetrisEngine, initialized in this function
+            player: AIPlayer of the engine
+            pieces: int, the number of the blocksets to play, or None for no limit
+       Returns:
+            the engine after the game
+    """
+    engine.initialize()
+    while engine.status == Status.PLAY and (pieces is None or engine.pieces <= pieces):
+        engine.step(player.act())
+    return engine
+
+
+def main(games=3, pieces=300, seed=0):
+    planner = Planner()
+    for i in range(games):
+        engine = TetrisEngine(seed=seed + i)
+        play(engine, AIPlayer(engine, planner), pieces)
+        print(f'game {i + 1}: {engine.pieces:>5} pieces{engine.score.lines:>6} lines{engine.score.score:>9} points')
+    rate = planner.evaluated / planner.elapsed if planner.elapsed else 0.0
+    print(f'{planner.evaluated} placements in {planner.elapsed:.2f}s, {rate:,.0f} placements/s')
+
+
+if __name__ == '__main__':
+    main()
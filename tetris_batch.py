@@ -0,0 +1,174 @@
+"""Batched game logic of PyTetris which steps many games in one NumPy call.
+
+TetrisBatch holds the boards of N games as an (N, ROWS) array of row bit masks,
+the same representation as tetris_engine.Board, and the dropping blocks as an
+(N, 4, 2) array of (row, col) coordinates like the rows of SHAPES. Moves, collisions,
+grounding and line deletion are applied to all of the games at once.
+
+The actions are given as an array of N codes, 0 for no operation and Action.value
+for the others. Unlike TetrisEngine, grounded blocks are deleted in the same step
+without waiting for the deletion animation.
+"""
+import numpy as np
+
+from tetris_engine import COLS, ROWS, FULL, SHAPES, Action
+
+
+NOOP = 0
+LEFT = Action.LEFT.value
+RIGHT = Action.RIGHT.value
+DOWN = Action.DOWN.value
+ROTATE = Action.ROTATE.value
+
+# (blockset, rotation, block, (row, col)), shifted down by 1 row
+# in the same way as TetrisEngine.correct_top does for new blocks.
+SHAPE_TABLE = np.array(SHAPES, dtype=np.int64) + np.array([1, 0])
+# score for the number of deleted rows, multiplied by level
+POINTS = np.array([0, 40, 100, 300, 1200], dtype=np.int64)
+
+
+class TetrisBatch:
+
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((n, ROWS), dtype=np.uint16)
+        self.blockset = np.zeros(n, dtype=np.int64)
+        self.next_blockset = np.zeros(n, dtype=np.int64)
+        self.index = np.zeros(n, dtype=np.int64)
+        self.offset = np.zeros((n, 2), dtype=np.int64)
+        self.drop_timer = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.gameover = np.zeros(n, dtype=bool)
+        self.initialize()
+
+    @property
+    def coordinates(self):
+        """(N, 4, 2) array, the positions of the dropping blocks of each game.
+        """
+        return self.get_coordinates(self.blockset, self.index, self.offset)
+
+    def get_coordinates(self, blockset, index, offset):
+        return SHAPE_TABLE[blockset, index] + offset[:, np.newaxis, :]
+
+    def get_timer_value(self):
+        return np.maximum(40 - 2 * (self.level - 1), 1)
+
+    def initialize(self, games=None):
+        """Start the games again.
+           Args:
+                games: bool array of N, the games to be started; all games if None.
+        """
+        if games is None:
+            games = np.ones(self.n, dtype=bool)
+        count = int(games.sum())
+        self.boards[games] = 0
+        self.level[games] = 1
+        self.lines[games] = 0
+        self.score[games] = 0
+        self.gameover[games] = False
+        self.next_blockset[games] = self.rng.integers(0, len(SHAPES), count)
+        self.create_block(games)
+
+    def create_block(self, games):
+        count = int(games.sum())
+        self.blockset[games] = self.next_blockset[games]
+        self.next_blockset[games] = self.rng.integers(0, len(SHAPES), count)
+        self.index[games] = 0
+        self.offset[games] = 0
+        self.drop_timer[games] = self.get_timer_value()[games]
+        # Game over if new blocks cannot be put.
+        self.gameover |= games & self.collide(self.coordinates)
+
+    def collide(self, coordinates):
+        """Check whether blocks overlap the walls, the floor or the blocks on the boards.
+           Args:
+                coordinates: (N, 4, 2) array, the positions of blocks
+           Returns:
+                bool array of N
+        """
+        rows = coordinates[..., 0]
+        cols = coordinates[..., 1]
+        outside = (cols < 0) | (cols >= COLS) | (rows >= ROWS)
+        inside = ~outside & (rows >= 0)
+        masks = np.take_along_axis(self.boards, np.clip(rows, 0, ROWS - 1), axis=1)
+        filled = ((masks.astype(np.int64) >> np.clip(cols, 0, COLS - 1)) & 1).astype(bool)
+        return (outside | (inside & filled)).any(axis=1)
+
+    def move(self, games, index, offset):
+        """Move the blocks of the games to the new positions if they do not collide.
+           Returns:
+                bool array of N, the games which blocks were moved.
+        """
+        moved = games & ~self.collide(self.get_coordinates(self.blockset, index, offset))
+        self.index[moved] = index[moved]
+        self.offset[moved] = offset[moved]
+        return moved
+
+    def rotate(self, games):
+        index = (self.index + 1) % 4
+        cols = self.get_coordinates(self.blockset, index, self.offset)[..., 1]
+        # Push rotated blocks back inside the walls.
+        over = np.maximum(cols.max(axis=1) - (COLS - 1), 0) + np.minimum(cols.min(axis=1), 0)
+        offset = self.offset - np.stack([np.zeros_like(over), over], axis=1)
+        return self.move(games, index, offset)
+
+    def shift(self, games, d_row, d_col):
+        return self.move(games, self.index, self.offset + np.array([d_row, d_col]))
+
+    def step(self, actions):
+        """Advance all of the games by one frame.
+           Args:
+                actions: int array of N, the operations applied to the dropping blocks.
+           Returns:
+                int array of N, the number of rows deleted in this frame.
+        """
+        actions = np.asarray(actions)
+        playing = ~self.gameover
+        self.shift(playing & (actions == LEFT), 0, -1)
+        self.shift(playing & (actions == RIGHT), 0, 1)
+        self.shift(playing & (actions == DOWN), 1, 0)
+        self.rotate(playing & (actions == ROTATE))
+
+        self.drop_timer[playing] -= 1
+        dropping = playing & (self.drop_timer <= 0)
+        self.drop_timer[dropping] = self.get_timer_value()[dropping]
+        grounded = dropping & ~self.shift(dropping, 1, 0)
+
+        deleted = np.zeros(self.n, dtype=np.int64)
+        if grounded.any():
+            self.update_boards(grounded)
+            deleted = self.delete_rows(grounded)
+            self.create_block(grounded)
+        return deleted
+
+    def update_boards(self, games):
+        coordinates = self.coordinates[games]
+        rows = coordinates[..., 0]
+        cols = coordinates[..., 1]
+        # Blocks left above the boards end the games.
+        self.gameover[np.flatnonzero(games)[(rows < 0).any(axis=1)]] = True
+        inside = rows >= 0
+        game_ids = np.broadcast_to(np.flatnonzero(games)[:, np.newaxis], rows.shape)
+        np.bitwise_or.at(
+            self.boards, (game_ids[inside], rows[inside]),
+            (np.uint16(1) << cols[inside].astype(np.uint16)))
+
+    def delete_rows(self, games):
+        """Delete full rows of the games, moving the rows above them down.
+           Returns:
+                int array of N, the number of deleted rows.
+        """
+        full = (self.boards == FULL) & games[:, np.newaxis]
+        deleted = full.sum(axis=1)
+        if deleted.any():
+            # A stable sort brings full rows to the top keeping the order of the others.
+            order = np.argsort(~full, axis=1, kind='stable')
+            self.boards = np.take_along_axis(self.boards, order, axis=1)
+            self.boards[np.arange(ROWS) < deleted[:, np.newaxis]] = 0
+            self.lines += deleted
+            self.level = self.lines // 10 + 1
+            self.score += POINTS[deleted] * self.level
+        return deleted
@@ -0,0 +1,620 @@
+"""Game logic of PyTetris which does not depend on pygame.
+
+TetrisEngine holds the block area, the dropping blocks, the timers and the score,
+and advances the game by one tick each time step is called. The events which happened
+in a tick are returned from step, so that a renderer can draw sprites and play sounds.
+After a tick, snapshot returns the state as an immutable Snapshot, which the renderer
+can draw at its own rate. Scheduler tells how many ticks are due by the wall clock.
+"""
+import random
+import time
+from collections import namedtuple
+from enum import Enum, auto
+
+import numpy as np
+
+import pytetris_utils_py
+
+
+# the functions which the extension module must export to replace pytetris_utils_py
+KERNEL_FUNCTIONS = ('collides', 'find_full_rows', 'collapse', 'drop_distance')
+
+
+def load_kernel():
+    """Return the extension module pytetris_utils, or pytetris_utils_py if it is
+       not built or is built from an older version which lacks KERNEL_FUNCTIONS.
+    """
+    try:
+        import pytetris_utils
+    except ImportError:
+        return pytetris_utils_py
+    if all(hasattr(pytetris_utils, name) for name in KERNEL_FUNCTIONS):
+        return pytetris_utils
+    return pytetris_utils_py
+
+
+kernel = load_kernel()
+
+
+# the number of columns and rows in block area
+COLS = 10
+ROWS = 20
+# the bit mask of a row filled with blocks
+FULL = (1 << COLS) - 1
+# ticks per second which the timer values of TetrisEngine are based on
+TICK_RATE = 60
+# delayed auto shift: ticks at TICK_RATE from pressing a side key until the shift is repeated
+DAS = 10
+# auto repeat rate: ticks at TICK_RATE between the repeated shifts; 0 slides the blocks to the wall
+ARR = 2
+# ticks at TICK_RATE between the soft drops while the down key is held
+SOFT_DROP = 2
+
+# the positions of blocks in the block area for each rotation.
+BLUE = np.array([[[-1, 4], [0, 4], [1, 4], [2, 4]], [[-1, 4], [-1, 5], [-1, 6], [-1, 7]], [[-1, 4], [0, 4], [1, 4], [2, 4]], [[-1, 4], [-1, 5], [-1, 6], [-1, 7]]], dtype=np.intc)
+DARK = np.array([[[-1, 3], [0, 3], [0, 4], [0, 5]], [[-1, 4], [0, 4], [1, 4], [1, 3]], [[-1, 3], [-1, 4], [-1, 5], [0, 5]], [[-1, 4], [-1, 5], [0, 4], [1, 4]]], dtype=np.intc)
+GREEN = np.array([[[-1, 4], [-1, 5], [0, 3], [0, 4]], [[-1, 3], [0, 3], [0, 4], [1, 4]], [[-1, 4], [-1, 5], [0, 3], [0, 4]], [[-1, 3], [0, 3], [0, 4], [1, 4]]], dtype=np.intc)
+ORANGE = np.array([[[-1, 5], [0, 3], [0, 4], [0, 5]], [[-1, 3], [-1, 4], [0, 4], [1, 4]], [[-1, 3], [-1, 4], [-1, 5], [0, 3]], [[-1, 4], [0, 4], [1, 4], [1, 5]]], dtype=np.intc)
+PURPLE = np.array([[[-1, 4], [0, 3], [0, 4], [0, 5]], [[-1, 4], [0, 4], [1, 4], [0, 3]], [[-1, 3], [-1, 4], [-1, 5], [0, 4]], [[-1, 4], [0, 4], [1, 4], [0, 5]]], dtype=np.intc)
+RED = np.array([[[-1, 3], [-1, 4], [0, 4], [0, 5]], [[-1, 4], [0, 3], [0, 4], [1, 3]], [[-1, 3], [-1, 4], [0, 4], [0, 5]], [[-1, 4], [0, 3], [0, 4], [1, 3]]], dtype=np.intc)
+YELLOW = np.array([[[-1, 4], [0, 4], [-1, 5], [0, 5]], [[-1, 4], [0, 4], [-1, 5], [0, 5]], [[-1, 4], [0, 4], [-1, 5], [0, 5]], [[-1, 4], [0, 4], [-1, 5], [0, 5]]], dtype=np.intc)
+SHAPES = [BLUE, DARK, GREEN, ORANGE, PURPLE, RED, YELLOW]
+
+Rotation = namedtuple('Rotation', 'cells masks left right bottom profile')
+# The state of the engine after a tick. blocks and ghosts are tuples of (row, col),
+# and rows is the tuple of the row masks of the board.
+Snapshot = namedtuple(
+    'Snapshot', 'tick status block_status piece blockset_index next_blockset blocks ghosts rows level lines score')
+
+
+class Status(Enum):
+    START = auto()
+    PLAY = auto()
+    PAUSE = auto()
+    GAMEOVER = auto()
+    REPEAT = auto()
+    WAITING = auto()
+    DROPPING = auto()
+
+
+class Action(Enum):
+    LEFT = auto()
+    RIGHT = auto()
+    DOWN = auto()
+    ROTATE = auto()
+    HARD_DROP = auto()
+
+
+# the columns to shift the blocks for the held side keys
+SHIFTS = {Action.LEFT: -1, Action.RIGHT: 1}
+
+
+class Event(Enum):
+    CREATED = auto()
+    ROTATED = auto()
+    GROUNDED = auto()
+    DELETED = auto()
+    MOVED = auto()
+    GAMEOVER = auto()
+
+
+class Block:
+
+    __slots__ = ('row', 'col')
+
+    def __init__(self, row, col):
+        self.row = row
+        self.col = col
+
+
+def create_collision_table():
+    """Make the row masks of blocks for each blockset, rotation and column offset.
+       Returns:
+            list of list of Rotation. table[blockset][rotation].cells is a tuple of (row, col)
+            pairs of the blocks in SHAPES, and masks[col] is a tuple of
+            (row, mask) pairs of the blocks moved by col columns from SHAPES. left and right
+            are the smallest and largest col inside the walls, and bottom is the lowest row.
+            profile is a tuple of (col, row) pairs of the lowest block in each column.
+    """
+    table = []
+    for shape in SHAPES:
+        rotations = []
+        for positions in shape.tolist():
+            cols = [col for _, col in positions]
+            left, right = -min(cols), COLS - 1 - max(cols)
+            masks = {}
+            for offset in range(left, right + 1):
+                row_masks = {}
+                for row, col in positions:
+                    row_masks[row] = row_masks.get(row, 0) | 1 << (col + offset)
+                masks[offset] = tuple(sorted(row_masks.items()))
+            bottom = max(row for row, _ in positions)
+            lowest = {}
+            for row, col in positions:
+                lowest[col] = max(lowest.get(col, row), row)
+            rotations.append(Rotation(
+                tuple(map(tuple, positions)), masks, left, right, bottom, tuple(sorted(lowest.items()))))
+        table.append(rotations)
+    return table
+
+
+COLLISION_TABLE = create_collision_table()
+
+
+class Board:
+    """Block area which holds each row as a bit mask. The bit of 1 << col
+       is set when the cell of the column is filled with a block.
+       heights[col] is the number of rows from the bottom to the highest block
+       in the column, 0 if the column is empty.
+    """
+
+    __slots__ = ('rows', 'heights')
+
+    def __init__(self, rows=None):
+        self.rows = [0] * ROWS if rows is None else rows
+        self.update_heights()
+
+    def update_heights(self):
+        self.heights = [0] * COLS
+        found = 0
+        for i, row in enumerate(self.rows):
+            if new := row & ~found:
+                for col in range(COLS):
+                    if new >> col & 1:
+                        self.heights[col] = len(self.rows) - i
+                if (found := found | row) == FULL:
+                    break
+
+    def copy(self):
+        return Board(self.rows[:])
+
+    def is_filled(self, row, col):
+        """Return True if the cell is filled. Rows above the block area are empty.
+        """
+        return row >= 0 and (self.rows[row] >> col & 1) == 1
+
+    def fill(self, row, col):
+        self.rows[row] |= 1 << col
+        if (height := len(self.rows) - row) > self.heights[col]:
+            self.heights[col] = height
+
+    def is_full(self, row):
+        return self.rows[row] == FULL
+
+    def is_empty(self, row):
+        return self.rows[row] == 0
+
+    def has_full_rows(self):
+        return FULL in self.rows
+
+    def find_full_rows(self, rows):
+        """Return the full rows in ascending order, looking at only the given rows.
+           Args:
+                rows: iterable of int, the rows which have been changed
+        """
+        return kernel.find_full_rows(self.rows, rows, FULL)
+
+    def clear(self, row):
+        """Empty the row. heights is not updated until the rows are collapsed,
+           which is done once after all the full rows are cleared.
+        """
+        self.rows[row] = 0
+
+    def collapse(self, rows):
+        """Move the rows above the deleted rows down in one sweep, keeping their order.
+           The rows below the lowest deleted row are not touched.
+           Args:
+                rows: list of int, the deleted rows in ascending order
+        """
+        if rows:
+            kernel.collapse(self.rows, rows)
+            self.update_heights()
+
+
+class TetrisEngine:
+
+    def __init__(self, seed=None, tick_rate=TICK_RATE, das=DAS, arr=ARR, soft_drop=SOFT_DROP):
+        self.random = random.Random(seed)
+        self.tick_rate = tick_rate
+        self.das = self.ticks(das)
+        self.arr = self.ticks(arr) if arr else 0
+        self.soft_drop = self.ticks(soft_drop)
+        # the side held and the ticks until it is shifted again
+        self.shift_direction = None
+        self.shift_timer = 0
+        self.soft_drop_timer = self.soft_drop
+        self.board = Board()
+        # The same blocks are reused for every new dropping blocks.
+        self.blocks = [Block(0, 0) for _ in range(4)]
+        self.blockset_index = 0
+        self.next_blockset = None
+        self.index = 0
+        self.row = 0
+        self.col = 0
+        # the number of the ticks run and the blocksets created
+        self.tick = 0
+        self.pieces = 0
+        self.score = Score()
+        self.events = []
+        self.grounded_blocks = []
+        self.full_rows = []
+        self.deleted_rows = []
+        self.block_status = Status.WAITING
+        self.status = Status.START
+        self.operations = {
+            Action.LEFT: self.move_left,
+            Action.RIGHT: self.move_right,
+            Action.DOWN: self.move_down,
+            Action.ROTATE: self.rotate,
+            Action.HARD_DROP: self.hard_drop
+        }
+
+    def initialize(self):
+        self.board = Board()
+        self.events = []
+        self.score.initialize()
+        self.level = self.score.level
+        self.timer_value = self.ticks(40)
+        self.drop_timer = self.timer_value
+        self.ground_timer = self.ticks(60)
+        self.judge_timer = self.timer_value
+        self.next_blockset = None
+        self.shift_direction = None
+        self.hard_dropped = False
+        self.soft_drop_timer = self.soft_drop
+        self.create_block()
+        self.block_status = Status.DROPPING
+        self.status = Status.PLAY
+        self.update = self.update_moving_block
+
+    def ticks(self, frames):
+        """Convert a timer value counted at TICK_RATE into ticks at the tick rate of the engine.
+        """
+        if self.tick_rate == TICK_RATE:
+            return frames
+        return max(round(frames * self.tick_rate / TICK_RATE), 1)
+
+    def step(self, actions=(), held=()):
+        """Advance the game by one tick.
+           Args:
+                actions: iterable of Action, the operations applied to the dropping blocks.
+                held: sequence of Action.LEFT, RIGHT and DOWN whose keys are held,
+                      in the order they were pressed.
+           Returns:
+                list of Event, the events which happened in this tick.
+        """
+        self.events = []
+        self.tick += 1
+        if self.status == Status.PLAY:
+            if self.block_status == Status.DROPPING:
+                self.hard_dropped = False
+                for action in actions:
+                    self.operations[action]()
+                # The held side must not shift the blocks off where they were hard-dropped.
+                if not self.hard_dropped:
+                    self.repeat_held(held)
+            self.update()
+        return self.events
+
+    def repeat_held(self, held):
+        """Repeat the moves of the held keys. The side pressed last is shifted after
+           das ticks and then every arr ticks, and the blocks are dropped every soft_drop
+           ticks. The first move of each key is made by its action when it is pressed.
+        """
+        direction = next((action for action in reversed(held) if action in SHIFTS), None)
+        if direction != self.shift_direction:
+            self.shift_direction = direction
+            self.shift_timer = self.das
+        elif direction is not None:
+            self.shift_timer -= 1
+            if self.shift_timer <= 0:
+                if self.arr:
+                    self.shift(SHIFTS[direction])
+                    self.shift_timer = self.arr
+                else:
+                    self.slide(SHIFTS[direction])
+
+        if Action.DOWN in held:
+            self.soft_drop_timer -= 1
+            if self.soft_drop_timer <= 0:
+                self.move_down()
+                self.soft_drop_timer = self.soft_drop
+        else:
+            self.soft_drop_timer = self.soft_drop
+
+    def snapshot(self):
+        """Return the state of the game as an immutable Snapshot. The ghosts are
+           given only while the blocks are dropping.
+        """
+        blocks = tuple((block.row, block.col) for block in self.blocks)
+        if self.status == Status.PLAY and self.block_status == Status.DROPPING:
+            ghosts = tuple(self.ghost_blocks())
+        else:
+            ghosts = ()
+        return Snapshot(
+            self.tick, self.status, self.block_status, self.pieces, self.blockset_index,
+            self.next_blockset, blocks, ghosts, tuple(self.board.rows),
+            self.score.level, self.score.lines, self.score.score)
+
+    def get_blockset_index(self):
+        index = self.random.randint(0, len(SHAPES) - 1)
+        return index
+
+    def create_block(self):
+        if self.next_blockset is None:
+            self.blockset_index = self.get_blockset_index()
+        else:
+            self.blockset_index = self.next_blockset
+
+        self.next_blockset = self.get_blockset_index()
+        # self.index is used to rotate blocks.
+        self.index = 0
+        # the offset of the blocks from SHAPES
+        self.row = 0
+        self.col = 0
+        self.place_blocks()
+        self.pieces += 1
+        self.events.append(Event.CREATED)
+
+    def place_blocks(self):
+        """Set the positions of the blocks from the shared rotation table and the offset.
+        """
+        cells = COLLISION_TABLE[self.blockset_index][self.index].cells
+        for block, (row, col) in zip(self.blocks, cells):
+            block.row = row + self.row
+            block.col = col + self.col
+
+    def update_moving_block(self):
+        self.drop_timer -= 1
+        if self.status == Status.PLAY and self.drop_timer == 0:
+            self.move_down()
+            self.drop_timer = self.timer_value
+        if (lower := min(block.row for block in self.blocks)) < 0:
+            self.correct_top(lower)
+
+        self.judge_timer -= 1
+        if self.judge_timer == 0:
+            self.judge_timer = self.timer_value
+            if not self.fits(self.index, self.row + 1, self.col):
+                self.update_matrix()
+                if self.full_rows:
+                    self.ground_timer = self.ticks(50)
+                    self.block_status = Status.WAITING
+                    self.update = self.update_ground_blocks
+                # Game over
+                elif not self.board.is_empty(0):
+                    self.status = Status.GAMEOVER
+                    self.events.append(Event.GAMEOVER)
+                else:
+                    self.create_block()
+                    self.drop_timer = 1
+
+    def update_ground_blocks(self):
+        self.ground_timer -= 1
+        if self.ground_timer == self.ticks(40):
+            if deleted_rows := self.delete_blocks():
+                self.events.append(Event.DELETED)
+                self.score.add(deleted_rows)
+                if self.level != self.score.level:
+                    self.timer_value -= self.ticks(2)
+                    self.level = self.score.level
+        if self.ground_timer == self.ticks(20):
+            self.move_ground_blocks()
+            self.events.append(Event.MOVED)
+        if self.ground_timer == 0:
+            self.create_block()
+            self.drop_timer = 1
+            self.block_status = Status.DROPPING
+            self.update = self.update_moving_block
+
+    def delete_blocks(self):
+        self.deleted_rows = self.full_rows
+        self.full_rows = []
+        for i in self.deleted_rows:
+            self.board.clear(i)
+        return len(self.deleted_rows)
+
+    def move_ground_blocks(self):
+        self.board.collapse(self.deleted_rows)
+
+    def fits(self, index, row, col):
+        """Check whether the blocks can be put at the offset with the collision table.
+           Args:
+                index: int, the rotation of the blocks
+                row: int, the offset of rows from SHAPES
+                col: int, the offset of columns from SHAPES
+        """
+        rotation = COLLISION_TABLE[self.blockset_index][index]
+        if (masks := rotation.masks.get(col)) is None or row + rotation.bottom >= ROWS:
+            return False
+        return not kernel.collides(self.board.rows, masks, row)
+
+    def drop_distance(self):
+        """Return the number of rows the dropping blocks can fall, comparing the lowest
+           block in each column with the column heights of the board.
+        """
+        rotation = COLLISION_TABLE[self.blockset_index][self.index]
+        return kernel.drop_distance(
+            self.board.rows, self.board.heights, rotation.profile,
+            rotation.masks[self.col], rotation.bottom, self.row, self.col)
+
+    def landing_row(self):
+        """Return the row offset from SHAPES where the dropping blocks will be grounded.
+        """
+        return self.row + self.drop_distance()
+
+    def ghost_blocks(self):
+        """Return the (row, col) positions where the dropping blocks will be grounded.
+        """
+        distance = self.drop_distance()
+        return [(block.row + distance, block.col) for block in self.blocks]
+
+    def correct_top(self, lower):
+        """If the blocks which rows are out of the block area are found in dropping blocks,
+           correct their rows. The blocks already on the board are overwritten by
+           the dropping blocks when they are grounded.
+           Args:
+                lower: int, the number of rows out of the block area
+        """
+        self.row += abs(lower)
+        for block in self.blocks:
+            block.row += abs(lower)
+
+    def update_matrix(self):
+        self.grounded_blocks = [(block.row, block.col) for block in self.blocks]
+        for row, col in self.grounded_blocks:
+            self.board.fill(row, col)
+        # Only the rows of the grounded blocks can become full.
+        self.full_rows = self.board.find_full_rows(row for row, _ in self.grounded_blocks)
+        self.events.append(Event.GROUNDED)
+
+    def move_right(self, step=1):
+        self.shift(step)
+
+    def move_left(self, step=-1):
+        self.shift(step)
+
+    def shift(self, step):
+        """Move the blocks to the side by the columns, if they fit there.
+        """
+        if self.fits(self.index, self.row, self.col + step):
+            self.col += step
+            for block in self.blocks:
+                block.col += step
+
+    def slide(self, step):
+        """Move the blocks to the side as far as they fit, checking each column
+           with the collision table.
+           Args:
+                step: int, 1 to the right or -1 to the left
+        """
+        col = self.col
+        while self.fits(self.index, self.row, col + step):
+            col += step
+        self.shift(col - self.col)
+
+    def move_down(self, step=1):
+        if self.fits(self.index, self.row + step, self.col):
+            self.row += step
+            for block in self.blocks:
+                block.row += step
+
+    def hard_drop(self):
+        """Drop the blocks to the landing row, and ground them in this frame.
+        """
+        if distance := self.drop_distance():
+            self.move_down(distance)
+        self.judge_timer = 1
+        self.hard_dropped = True
+
+    def judge_rotate(self, index):
+        """Check whether blocks can be rotated or not.
+           Args:
+                index: int, the rotation after rotated
+           Returns:
+                rotatable: bool
+                over: int, the number of columns to push the rotated blocks back inside the walls
+        """
+        rotation = COLLISION_TABLE[self.blockset_index][index]
+        # Check right side
+        if (over := self.col - rotation.right) > 0:
+            pass
+        # Check left side
+        elif (over := self.col - rotation.left) < 0:
+            pass
+        else:
+            over = 0
+        if self.fits(index, self.row, self.col - over):
+            return True, over
+        return False, 0
+
+    def rotate(self):
+        next_index = self.index + 1
+        if next_index > 3:
+            next_index = 0
+        rotatable, over = self.judge_rotate(next_index)
+        if rotatable:
+            self.events.append(Event.ROTATED)
+            self.index = next_index
+            self.col -= over
+            self.place_blocks()
+
+
+class Scheduler:
+    """Fixed timestep scheduler which counts the ticks due by a monotonic clock,
+       so that the game logic keeps time whatever the frame rate of rendering is.
+       Args:
+            tick_rate: int, ticks per second
+            max_ticks: int, the largest number of ticks to catch up in one call.
+                       The rest is dropped after a long stall. A quarter second if None.
+            clock: function which returns seconds
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, max_ticks=None, clock=time.monotonic):
+        self.tick_rate = tick_rate
+        self.interval = 1 / tick_rate
+        self.max_ticks = max_ticks or max(tick_rate // 4, 1)
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Forget the time passed, for example while the game is paused.
+        """
+        self.last = self.clock()
+        self.accumulator = 0.0
+
+    def advance(self):
+        """Return the number of ticks to run since the last call.
+        """
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+        # A small margin keeps an exact multiple of the interval from being rounded down.
+        ticks = int(self.accumulator * self.tick_rate + 1e-6)
+        if ticks > self.max_ticks:
+            self.accumulator = 0.0
+            return self.max_ticks
+        self.accumulator = max(self.accumulator - ticks * self.interval, 0.0)
+        return ticks
+
+    @property
+    def alpha(self):
+        """The fraction of the next tick passed since the last tick, from 0 to 1,
+           by which a renderer can interpolate between the last two snapshots.
+        """
+        return min(self.accumulator * self.tick_rate, 1.0)
+
+
+class Score:
+
+    def __init__(self):
+        self.initialize()
+
+    def initialize(self):
+        self.level = 1
+        self.lines = 0
+        self.score = 0
+
+    def add(self, deleted_rows):
+        """Compute lines, level and score.
+           Args:
+                deleted_rows: int, the number of deleted lines of blocks.
+
+           Clearing 10 lines brings the level up. The level starts with 1.
+           Scoring:
+                1 line   40 * level
+                2 lines  100 * level
+                3 lines  300 * level
+                4 lines  400 * level
+        """
+        self.lines += deleted_rows
+        self.level = self.lines // 10 + 1
+
+        if deleted_rows == 1:
+            self.score += 40 * self.level
+        elif deleted_rows == 2:
+            self.score += 100 * self.level
+        elif deleted_rows == 3:
+            self.score += 300 * self.level
+        else:
+            self.score += 1200 * self.level